@@ -315,40 +315,28 @@ class FragmentEditorDialog(QDialog):
                 if lt > lf and it == 0:
                     lt -= 1
             
-            # Analyze lines
-            all_commented = True
-            has_content = False
-            
-            for i in range(lf, lt + 1):
-                text = self.editor.text(i)
-                stripped = text.lstrip()
-                if stripped:
-                    has_content = True
-                    if not stripped.startswith(prefix):
-                        all_commented = False
-                        break
-            
-            should_uncomment = all_commented and has_content
-            
+            # Read each line once: (line, indent, content after the indent)
+            lines = []
             for i in range(lf, lt + 1):
                 text = self.editor.text(i)
                 stripped = text.lstrip()
-                
+                lines.append((i, len(text) - len(stripped), stripped))
+
+            contents = [entry for entry in lines if entry[2]]
+            should_uncomment = bool(contents) and all(stripped.startswith(prefix) for _, _, stripped in contents)
+            prefix_utf8 = prefix.encode('utf-8')
+
+            # Indentation is ASCII whitespace, so its length is also its byte offset
+            for i, indent, stripped in lines:
+                line_start = self.editor.SendScintilla(QsciScintilla.SCI_POSITIONFROMLINE, i)
                 if should_uncomment:
                     if stripped.startswith(prefix):
-                        # Find position of prefix
-                        prefix_pos = text.find(prefix)
-                        if prefix_pos != -1:
-                            # Delete prefix
-                            self.editor.deleteRange(i, prefix_pos, i, prefix_pos + len(prefix))
-                else:
-                    if text.strip(): # Comment only if not empty
-                        # Insert at start of non-whitespace
-                        indent = len(text) - len(stripped)
-                        self.editor.insertAt(prefix, i, indent)
-                    elif not text.strip() and lf == lt: 
-                         # If single empty line, just insert
-                         self.editor.insertAt(prefix, i, 0)
+                        self.editor.SendScintilla(QsciScintilla.SCI_DELETERANGE, line_start + indent, len(prefix_utf8))
+                elif stripped:
+                    self.editor.SendScintilla(QsciScintilla.SCI_INSERTTEXT, line_start + indent, prefix_utf8)
+                elif lf == lt:
+                    # If single empty line, just insert
+                    self.editor.SendScintilla(QsciScintilla.SCI_INSERTTEXT, line_start, prefix_utf8)
 
         except Exception as e:
             print(f"Toggle line comments error: {e}")
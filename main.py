@@ -6,6 +6,9 @@ A modern XML editor with tree view, syntax highlighting, and validation
 
 import sys
 import os
+import bisect
+import functools
+import itertools
 import random
 import subprocess
 from version import __version__, __build_date__, __app_name__
@@ -15,9 +18,11 @@ from PyQt6.QtWidgets import (QApplication, QMainWindow, QSplitter, QTreeWidget,
                              QTabWidget, QListWidget, QListWidgetItem, QPushButton, QLabel, 
                              QFileDialog, QMessageBox, QLineEdit, QCheckBox, QComboBox, QToolButton,
                              QDialog, QDialogButtonBox, QSpinBox, QFrame,
-                             QHeaderView, QTreeWidgetItemIterator, QMenu, QDockWidget, QProgressBar, QInputDialog, QStyle)
-from PyQt6.QtCore import Qt, QTimer, pyqtSignal, QObject, QDateTime, QSettings, QThread, QByteArray, QMimeData, QUrl, QEvent
-from PyQt6.QtGui import QAction, QIcon, QFont, QColor, QPainter, QShortcut, QKeySequence
+                             QHeaderView, QTreeWidgetItemIterator, QMenu, QDockWidget, QProgressBar, QInputDialog, QStyle,
+                             QTableView, QStyledItemDelegate, QStyleOptionViewItem, QStyleOptionButton)
+from PyQt6.QtCore import (Qt, QTimer, pyqtSignal, QObject, QDateTime, QSettings, QThread, QByteArray, QMimeData, QUrl, QEvent,
+                          QAbstractTableModel, QModelIndex, QRect, QSize, QSignalBlocker)
+from PyQt6.QtGui import QAction, QIcon, QFont, QColor, QPainter, QShortcut, QKeySequence, QPalette
 from PyQt6.Qsci import QsciScintilla, QsciLexerXML
 import re
 import zipfile
@@ -25,6 +30,7 @@ import json
 import base64
 import tempfile
 import shutil
+from collections import OrderedDict, defaultdict
 
 from xml_service import XmlService
 from models import XmlFileModel, XmlTreeNode, XmlValidationResult
@@ -54,6 +60,98 @@ from object_form import ObjectNodeForm
 from ftp_manager import FtpManager
 from ftp_dialogs import FtpBrowserDialog, FtpProfilesDialog
 
+# Markup patterns for the regex-based folding/range scans
+# Blocks of consecutive C++ style line comments (//)
+_LINE_COMMENT_BLOCK_RE = re.compile(r"(?:^\s*//.*(?:\r?\n|$))+", re.MULTILINE)
+# Markup spans and tags in a single pass: group "special" is a comment/CDATA/PI/DOCTYPE
+# span (tags inside it are consumed with it); otherwise group 2 is the closing '/', group 3
+# the tag name (non-space, non-'>' and non-'/' characters: Unicode, namespaces) and group 4
+# the rest of the tag
+_XML_SCAN_RE = re.compile(
+    r"<(?:(?P<special>!--.*?-->|!\[CDATA\[.*?\]\]>|\?.*?\?>|!DOCTYPE.*?>)|(/?)([^\s>/]+)([^>]*)>)",
+    re.DOTALL)
+# Closing / opening tags within one line (line-based path search)
+_CLOSE_TAG_NAME_RE = re.compile(r'</\s*([^\s>]+)\s*>')
+_OPEN_TAG_NAME_RE = re.compile(r'<\s*([^\s>/!?]+)([^>]*)>')
+# Tab link placeholder inserted by "move selection to tab"
+_TABREF_RE = re.compile(r"<!--\s*TABREF:\s*([A-Za-z0-9_\-]+)\s*-->")
+
+# QSettings may return flags as bool, as "true"/"false" strings (INI backend) or as other QVariants
+_TRUE_SETTING_STRINGS = frozenset(("1", "true", "yes", "on"))
+
+
+def _settings_bool(value, default: bool) -> bool:
+    """Coerce a QSettings flag value to bool; None (unset) gives default"""
+    if value is None:
+        return default
+    if isinstance(value, bool):
+        return value
+    if isinstance(value, str):
+        return value.lower() in _TRUE_SETTING_STRINGS
+    return bool(value)
+
+
+def _span_containment_test(spans):
+    """Return a pos -> bool test for "pos lies inside one of the (start, end) spans".
+
+    Spans may overlap. Each lookup bisects the sorted starts and compares
+    against the furthest end reached by any span starting at or before pos.
+    """
+    spans = sorted(spans)
+    starts = [start for start, _ in spans]
+    reach = []
+    furthest = -1
+    for _, end in spans:
+        if end > furthest:
+            furthest = end
+        reach.append(furthest)
+
+    def contains(pos):
+        idx = bisect.bisect_right(starts, pos) - 1
+        return idx >= 0 and pos < reach[idx]
+
+    return contains
+
+
+def _line_number_lookup(text):
+    """Return a pos -> 1-based line number function for text.
+
+    Equivalent to text.count('\\n', 0, pos) + 1, but the newline offsets are
+    collected once so mapping many positions costs a bisect each.
+    """
+    newlines = []
+    find = text.find
+    i = find('\n')
+    while i != -1:
+        newlines.append(i)
+        i = find('\n', i + 1)
+
+    def line_at(pos):
+        return bisect.bisect_left(newlines, pos) + 1
+
+    return line_at
+
+
+# Compact status bar children, styled once from the status bar. The flag buttons'
+# active look follows their "active" property.
+_STATUS_BAR_CHILD_STYLE = (
+    "QStatusBar > QLabel { font-size: 9px; padding: 0px; margin: 0px; }"
+    "QStatusBar > QComboBox { font-size: 9px; max-height: 22px; padding: 0px; margin: 0px; }"
+    "QStatusBar QToolButton { font-size: 9px; max-height: 22px; padding: 1px 3px; margin: 0px; }"
+    # Active state: eye-safe teal/cyan background instead of bright green
+    'QStatusBar QToolButton[active="true"] { background-color: #5B9AA0; color: white; border: 1px solid #4A8A90; }'
+)
+
+# Breadcrumb bar above the editor, per theme
+_BREADCRUMB_STYLE_DARK = (
+    "QLabel { background-color: #2d2d30; color: #d4d4d4; padding: 4px 8px;"
+    " border: 1px solid #464647; border-radius: 3px; }"
+)
+_BREADCRUMB_STYLE_LIGHT = (
+    "QLabel { background-color: #f0f0f0; color: #000000; padding: 4px 8px;"
+    " border: 1px solid #ccc; border-radius: 3px; }"
+)
+
 
 class XmlTreeWidget(QTreeWidget):
     """Custom tree widget for displaying XML structure"""
@@ -79,6 +177,14 @@ class XmlTreeWidget(QTreeWidget):
         # Quick Win #2: Enable uniform row heights for faster rendering (20-40% faster)
         self.setUniformRowHeights(True)
         
+        # Detached items kept for reuse across rebuilds (see _recycle_items)
+        self._item_pool = []
+        self._default_item_flags = QTreeWidgetItem().flags()
+        # (length, hash) of the content the tree was last built from
+        self._last_content_key = None
+        # Incremented per synchronous/background build so stale worker results are ignored
+        self._build_generation = 0
+        
         # Level collapse buttons
         self.level_buttons = []
         self.max_depth = 0
@@ -349,10 +455,20 @@ class XmlTreeWidget(QTreeWidget):
         menu.exec(self.mapToGlobal(position))
         
     def _expand_recursive(self, item):
-        """Recursively expand an item and all its children"""
-        self.expandItem(item)
-        for i in range(item.childCount()):
-            self._expand_recursive(item.child(i))
+        """Expand an item and all its children"""
+        # Expanding item by item keeps lazy loading working (it is driven by
+        # itemExpanded); suspend repaints so the whole subtree lays out once.
+        self.setUpdatesEnabled(False)
+        try:
+            stack = [item]
+            while stack:
+                current = stack.pop()
+                if not current.isExpanded():
+                    self.expandItem(current)
+                for i in range(current.childCount()):
+                    stack.append(current.child(i))
+        finally:
+            self.setUpdatesEnabled(True)
             
     def _expand_selected_2_levels(self):
         """Expand selected items by 2 levels"""
@@ -387,7 +503,7 @@ class XmlTreeWidget(QTreeWidget):
 
     def _finish_lazy_load(self, root, xml_content, progress_dialog):
         if root is None:
-            error_item = QTreeWidgetItem()
+            error_item = self._new_item()
             error_item.setText(0, "Tree building failed")
             error_item.setText(1, "File content is available in the editor")
             error_item.setForeground(0, QColor("red"))
@@ -399,6 +515,7 @@ class XmlTreeWidget(QTreeWidget):
                 if hasattr(main_window, 'status_bar'):
                     main_window.status_bar.removeWidget(progress_dialog)
                 progress_dialog.deleteLater()
+            self._restore_bulk_insert_features()
             self.setUpdatesEnabled(True)
             return
         lines = xml_content.split('\n')
@@ -407,15 +524,15 @@ class XmlTreeWidget(QTreeWidget):
         self._xml_lines = lines
         self._xml_line_index = line_index
         root_node = self._xml_service._element_to_shallow_node_with_lines(root, lines, "", 0, 1, line_index)
-        item = QTreeWidgetItem()
+        item = self._new_item()
         item.setText(0, self.compute_display_name(root_node, root))
-        item.setText(1, self._truncate_value(root_node.value) if root_node.value else "")
+        item.setText(1, root_node.truncated_value())
         item.xml_node = root_node
         item.xml_element = root
         item.lazy_loaded = False
         self.addTopLevelItem(item)
         if len(root):
-            placeholder = QTreeWidgetItem()
+            placeholder = self._new_item()
             placeholder.setText(0, "...")
             placeholder.is_placeholder = True
             item.addChild(placeholder)
@@ -432,6 +549,7 @@ class XmlTreeWidget(QTreeWidget):
             if hasattr(main_window, 'status_bar'):
                 main_window.status_bar.removeWidget(progress_dialog)
             progress_dialog.deleteLater()
+        self._restore_bulk_insert_features()
         self.setUpdatesEnabled(True)
         
         # Signal that tree is ready
@@ -445,21 +563,24 @@ class XmlTreeWidget(QTreeWidget):
         except Exception:
             self._xml_service = None
 
+    # Child tags whose text is used as a friendly label (compared lower-cased)
+    _FRIENDLY_NAME_TAGS = frozenset(("наименование", "имя", "name"))
+
     def compute_display_name(self, xml_node, xml_element=None):
         """Compute label for a node based on current mode."""
         if not xml_node:
             return ""
             
-        # 1. Calculate attributes string (common)
-        attr = getattr(xml_node, 'attributes', {}) or {}
-        attr_string = " ".join([f'{k}="{v}"' for k, v in attr.items()])
+        # 1. Attributes string (common), formatted once per node and memoized
+        attr_string = xml_node.attributes_string()
         
         # 2. Extract friendly name
         # Optimization: Skip extraction entirely if friendly labels are disabled
         # This restores fast loading for large files when the setting is OFF
         if not self.use_friendly_labels:
-             return f"{xml_node.tag} [{attr_string}]" if attr_string else f"{xml_node.tag}"
+             return f"{xml_node.tag} [{attr_string}]" if attr_string else xml_node.tag
         
+        friendly_tags = self._FRIENDLY_NAME_TAGS
         preferred_name = None
         fallback_name = None
         found = False
@@ -475,7 +596,7 @@ class XmlTreeWidget(QTreeWidget):
                         continue
                     tag_lower = tag.lower()
 
-                    if tag_lower in ("наименование", "имя", "name") and getattr(child, 'value', None):
+                    if tag_lower in friendly_tags and getattr(child, 'value', None):
                         text = child.value.strip()
                         if text:
                             preferred_name = text
@@ -505,7 +626,7 @@ class XmlTreeWidget(QTreeWidget):
                         
                     if tag:
                         tag_lower = tag.lower()
-                        if tag_lower in ("наименование", "имя", "name"):
+                        if tag_lower in friendly_tags:
                             text = getattr(child, 'text', '')
                             if text and text.strip():
                                 preferred_name = text.strip()
@@ -527,20 +648,26 @@ class XmlTreeWidget(QTreeWidget):
             return f"{preferred_name} ({xml_node.tag} [{attr_string}])" if attr_string else f"{preferred_name} ({xml_node.tag})"
             
         # Fallback for Friendly mode (no friendly name found)
-        return f"{xml_node.tag} [{attr_string}]" if attr_string else f"{xml_node.tag}"
+        return f"{xml_node.tag} [{attr_string}]" if attr_string else xml_node.tag
 
     def refresh_labels(self):
         """Refresh all labels according to mode without rebuilding structure."""
+        viewport = self.viewport()
+        viewport.setUpdatesEnabled(False)
         try:
+            compute_display_name = self.compute_display_name
             iterator = QTreeWidgetItemIterator(self)
             while iterator.value():
                 item = iterator.value()
-                if item and hasattr(item, 'xml_node') and item.xml_node:
-                    item.setText(0, self.compute_display_name(item.xml_node, getattr(item, 'xml_element', None)))
+                xml_node = getattr(item, 'xml_node', None)
+                if xml_node is not None:
+                    item.setText(0, compute_display_name(xml_node, getattr(item, 'xml_element', None)))
                 iterator += 1
-            self.viewport().update()
         except Exception as e:
             print(f"Label refresh error: {e}")
+        finally:
+            viewport.setUpdatesEnabled(True)
+            viewport.update()
 
     def set_hide_leaves(self, hide: bool):
         """Enable or disable leaf hiding and apply immediately."""
@@ -601,19 +728,6 @@ class XmlTreeWidget(QTreeWidget):
                 self.setColumnWidth(0, int(total_width * 0.4))
                 self.setColumnWidth(1, int(total_width * 0.6))
     
-    def _truncate_value(self, value: str, max_words: int = 2) -> str:
-        """Truncate value to maximum number of words with ellipsis"""
-        if not value:
-            return ""
-        
-        # Split by whitespace and take first max_words
-        words = value.strip().split()
-        if len(words) <= max_words:
-            return value
-        
-        # Join first max_words and add ellipsis
-        return " ".join(words[:max_words]) + "..."
-        
     def _on_item_clicked(self, item, column):
         """Handle tree item click"""
         if hasattr(item, 'xml_node'):
@@ -750,6 +864,7 @@ class XmlTreeWidget(QTreeWidget):
                     main_window = self.window()
                     if hasattr(main_window, 'xml_editor'):
                         content = main_window.xml_editor.get_content()
+                        self.invalidate_content_hash()
                         # Use populate_tree to rebuild. 
                         # Passing show_progress=True to show user something is happening.
                         self.populate_tree(content, show_progress=True)
@@ -782,28 +897,121 @@ class XmlTreeWidget(QTreeWidget):
     
     def expand_to_level(self, level):
         """Expand items to specific level"""
-        def expand_items_to_level(item, current_level):
+        # Only touch items whose state actually changes: every setExpanded()
+        # call costs a relayout, and redundant collapses at the boundary add up.
+        # QTreeView.expandToDepth() is not used because it does not emit
+        # itemExpanded, which drives lazy loading of children.
+        stack = [(self.topLevelItem(i), 1) for i in range(self.topLevelItemCount())]
+        while stack:
+            item, current_level = stack.pop()
             if current_level < level:
-                item.setExpanded(True)
+                if not item.isExpanded():
+                    item.setExpanded(True)
+                child_level = current_level + 1
                 for i in range(item.childCount()):
-                    child = item.child(i)
-                    expand_items_to_level(child, current_level + 1)
-            else:
+                    stack.append((item.child(i), child_level))
+            elif item.isExpanded():
                 item.setExpanded(False)
-        
-        # Start from root items
-        for i in range(self.topLevelItemCount()):
-            root_item = self.topLevelItem(i)
-            expand_items_to_level(root_item, 1)
     
+    def _suspend_bulk_insert_features(self):
+        """Turn off sorting and expand animation for a bulk rebuild, remembering prior state"""
+        if getattr(self, '_bulk_saved_state', None) is None:
+            self._bulk_saved_state = (self.isSortingEnabled(), self.isAnimated())
+        self.setSortingEnabled(False)
+        self.setAnimated(False)
+
+    def _restore_bulk_insert_features(self):
+        """Restore sorting/animation state saved by _suspend_bulk_insert_features"""
+        saved = getattr(self, '_bulk_saved_state', None)
+        if saved is None:
+            return
+        self._bulk_saved_state = None
+        was_sorting, was_animated = saved
+        if was_sorting:
+            self.setSortingEnabled(True)
+        if was_animated:
+            self.setAnimated(True)
+
+    # Upper bound on pooled items so a one-off huge tree does not pin memory
+    _ITEM_POOL_LIMIT = 50000
+
+    def _new_item(self):
+        """Take a blank item from the pool, or allocate one"""
+        pool = self._item_pool
+        return pool.pop() if pool else QTreeWidgetItem()
+
+    def _reset_item_view_state(self):
+        """Clear the hidden and selected flags of every item while the tree is still attached.
+
+        QTreeWidgetItem keeps both flags across takeChildren() and reapplies
+        them on the next insert, but setHidden()/setSelected() are ignored once
+        an item (or any ancestor) has been detached from the view.
+        """
+        stack = [self.invisibleRootItem()]
+        while stack:
+            item = stack.pop()
+            for i in range(item.childCount()):
+                child = item.child(i)
+                if child.isHidden():
+                    child.setHidden(False)
+                if child.isSelected():
+                    child.setSelected(False)
+                if child.childCount():
+                    stack.append(child)
+
+    def _recycle_items(self):
+        """Detach all items and return them to the pool instead of deleting them"""
+        pool = self._item_pool
+        limit = self._ITEM_POOL_LIMIT
+        default_flags = self._default_item_flags
+        # Hidden, expanded and selected state belong to the view; reset them
+        # before detaching so pooled items come back plain
+        self._reset_item_view_state()
+        self.collapseAll()
+        stack = self.invisibleRootItem().takeChildren()
+        while stack:
+            item = stack.pop()
+            if item.childCount():
+                stack.extend(item.takeChildren())
+            if len(pool) < limit:
+                # Drop per-item Python state (xml_node, lazy/loader flags) and visible data
+                item.__dict__.clear()
+                item.setText(0, "")
+                item.setText(1, "")
+                item.setData(0, Qt.ItemDataRole.ForegroundRole, None)
+                item.setFlags(default_flags)
+                pool.append(item)
+        self.search_matches.clear()
+
+    def invalidate_content_hash(self):
+        """Force the next populate_tree call to rebuild even if the content is unchanged"""
+        self._last_content_key = None
+
     def populate_tree(self, xml_content: str, show_progress=True, file_path: str = None, force_async=False):
         """Populate tree with XML structure"""
-        self.clear()
+        # Skip the parse and rebuild when the tree already shows exactly this content
+        # (tab switches, debounced edits that were undone, repeated refreshes).
+        # Explicit rebuilds pass force_async and always go through.
+        content_key = (len(xml_content), hash(xml_content))
+        if (not force_async and content_key == self._last_content_key
+                and self.topLevelItemCount() > 0):
+            self.tree_built.emit()
+            return
+        self._last_content_key = None
+        # Any build still running in the background is superseded by this one
+        self._build_generation += 1
+        generation = self._build_generation
+
+        # Reuse the previous tree's items rather than freeing and reallocating them
+        self._recycle_items()
         service = getattr(self, '_xml_service', None) or XmlService()
         self._xml_service = service  # Ensure service is available for async callback
         
         # Quick Win #1: Disable visual updates during tree building (30-50% faster)
         self.setUpdatesEnabled(False)
+        # Avoid a re-sort and expand animation per inserted item.
+        # Signals stay connected: lazy loading relies on itemExpanded.
+        self._suspend_bulk_insert_features()
         
         # Try to load from cache first if file path is available
         if file_path and not force_async:
@@ -822,9 +1030,11 @@ class XmlTreeWidget(QTreeWidget):
                     
                     # Apply leaf hiding
                     self.apply_hide_leaves_filter()
+                    self._restore_bulk_insert_features()
                     self.setUpdatesEnabled(True)
                     if self.status_label:
                         self.status_label.setText("Loaded from cache")
+                    self._last_content_key = content_key
                     # Signal tree built
                     self.tree_built.emit()
                     return
@@ -855,41 +1065,64 @@ class XmlTreeWidget(QTreeWidget):
                 main_window = self.window()
                 if hasattr(main_window, 'status_bar'):
                     main_window.status_bar.addWidget(progress_dialog)
-                    QApplication.processEvents()
             if self.status_label:
                 self.status_label.setText("Parsing lazy tree in background...")
-                QApplication.processEvents()
+            # No processEvents() here: parsing runs on XmlParseWorker, so the
+            # progress bar and label paint as soon as we return to the event loop
             worker = XmlParseWorker(xml_content, service)
             worker.parsed.connect(lambda root: self._finish_lazy_load(root, xml_content, progress_dialog))
             worker.start()
             # Keep reference to worker to prevent garbage collection
             self._parse_worker = worker
+        elif use_fast_path and len(xml_content) > 1024 * 1024:
+            # Large file on the lxml fast path: build the XmlTreeNode structure (and
+            # its pickle cache) on a worker thread; only Qt item creation runs here
+            if self.status_label:
+                self.status_label.setText("Building tree in background...")
+            # Parented to the tree so superseded builds stay alive until run() returns
+            worker = XmlTreeBuildWorker(xml_content, service, file_path, self)
+            worker.built.connect(lambda root_node: self._finish_node_build(root_node, content_key, generation))
+            worker.finished.connect(worker.deleteLater)
+            worker.start()
         else:
-            # Normal processing for smaller files (or fast path for large files)
+            # Normal processing for smaller files
             root_node = service.build_xml_tree(xml_content, file_path=file_path)
-            
-            if root_node:
+            if root_node and file_path:
                 # Save to cache if file path is available
-                if file_path:
-                    service.save_tree_cache(file_path, root_node)
-
-                # Always use lazy population for better performance and consistency
-                self._add_tree_items_lazy_from_node(root_node)
-                
-                # Calculate max depth and create level buttons
-                max_depth = self._calculate_max_depth(root_node)
-                if max_depth > 0:
-                    self.create_level_buttons(max_depth)
-                
-                # Expand to selected depth instead of ExpandAll
-                self.expand_to_level(self.max_load_depth)
+                service.save_tree_cache(file_path, root_node)
+            self._apply_built_tree(root_node, content_key)
 
-                # Apply leaf hiding after population
-                self.apply_hide_leaves_filter()
-                # Re-enable updates after normal file processing
-                self.setUpdatesEnabled(True)
-                # Signal tree built
-                self.tree_built.emit()
+    def _finish_node_build(self, root_node, content_key, generation):
+        """Receive a tree built by XmlTreeBuildWorker, dropping results of superseded builds"""
+        if generation != self._build_generation:
+            return
+        self._apply_built_tree(root_node, content_key)
+
+    def _apply_built_tree(self, root_node, content_key):
+        """Create tree items for a freshly built XmlTreeNode structure"""
+        if root_node:
+            # Always use lazy population for better performance and consistency
+            self._add_tree_items_lazy_from_node(root_node)
+            
+            # Calculate max depth and create level buttons
+            max_depth = self._calculate_max_depth(root_node)
+            if max_depth > 0:
+                self.create_level_buttons(max_depth)
+            
+            # Expand to selected depth instead of ExpandAll
+            self.expand_to_level(self.max_load_depth)
+
+            # Apply leaf hiding after population
+            self.apply_hide_leaves_filter()
+            # Re-enable updates after normal file processing
+            self._restore_bulk_insert_features()
+            self.setUpdatesEnabled(True)
+            self._last_content_key = content_key
+            # Signal tree built
+            self.tree_built.emit()
+        else:
+            self._restore_bulk_insert_features()
+            self.setUpdatesEnabled(True)
 
     def _on_item_expanded(self, item):
         try:
@@ -971,15 +1204,15 @@ class XmlTreeWidget(QTreeWidget):
                 cnt = tag_counts.get(child.tag, 0) + 1
                 tag_counts[child.tag] = cnt
                 child_node = self._xml_service._element_to_shallow_node_with_lines(child, self._xml_lines, node.path, node.line_number, cnt, self._xml_line_index)
-                it = QTreeWidgetItem()
+                it = self._new_item()
                 it.setText(0, self.compute_display_name(child_node, child))
-                it.setText(1, self._truncate_value(child_node.value) if child_node.value else "")
+                it.setText(1, child_node.truncated_value())
                 it.xml_node = child_node
                 it.xml_element = child
                 it.lazy_loaded = False
                 parent_item.addChild(it)
                 if len(child):
-                    ph = QTreeWidgetItem()
+                    ph = self._new_item()
                     ph.setText(0, "...")
                     ph.is_placeholder = True
                     it.addChild(ph)
@@ -988,7 +1221,7 @@ class XmlTreeWidget(QTreeWidget):
                     QApplication.processEvents()
             # Add loader if more children remain
             if end < len(children):
-                loader = QTreeWidgetItem()
+                loader = self._new_item()
                 loader.setText(0, f"Load more... ({len(children) - end} remaining)")
                 loader.is_loader = True
                 loader.loader_offset = end
@@ -1001,16 +1234,16 @@ class XmlTreeWidget(QTreeWidget):
     
     def _add_tree_items_lazy_from_node(self, root_node):
         """Add top level item and setup lazy loading from existing XmlTreeNode structure"""
-        item = QTreeWidgetItem()
+        item = self._new_item()
         item.setText(0, self.compute_display_name(root_node))
-        item.setText(1, self._truncate_value(root_node.value) if root_node.value else "")
+        item.setText(1, root_node.truncated_value())
         item.xml_node = root_node
         item.lazy_loaded_from_node = False 
         
         self.addTopLevelItem(item)
         
         if root_node.children:
-            placeholder = QTreeWidgetItem()
+            placeholder = self._new_item()
             placeholder.setText(0, "...")
             placeholder.is_placeholder = True
             item.addChild(placeholder)
@@ -1025,22 +1258,22 @@ class XmlTreeWidget(QTreeWidget):
             
             for i in range(offset, end):
                 child_node = children_list[i]
-                child_item = QTreeWidgetItem()
+                child_item = self._new_item()
                 child_item.setText(0, self.compute_display_name(child_node))
-                child_item.setText(1, self._truncate_value(child_node.value) if child_node.value else "")
+                child_item.setText(1, child_node.truncated_value())
                 child_item.xml_node = child_node
                 child_item.lazy_loaded_from_node = False
                 
                 parent_item.addChild(child_item)
                 
                 if child_node.children:
-                    ph = QTreeWidgetItem()
+                    ph = self._new_item()
                     ph.setText(0, "...")
                     ph.is_placeholder = True
                     child_item.addChild(ph)
             
             if end < len(children_list):
-                loader = QTreeWidgetItem()
+                loader = self._new_item()
                 loader.setText(0, f"Load more... ({len(children_list) - end} remaining)")
                 loader.is_loader_node = True # Distinguish from other loader
                 loader.loader_offset = end
@@ -1051,10 +1284,19 @@ class XmlTreeWidget(QTreeWidget):
 
     def _calculate_max_depth(self, xml_node, current_depth=1):
         """Calculate maximum depth of XML tree"""
+        # Iterative walk: no per-node Python call frame and no recursion limit on deep documents
         max_depth = current_depth
-        for child in xml_node.children:
-            child_depth = self._calculate_max_depth(child, current_depth + 1)
-            max_depth = max(max_depth, child_depth)
+        stack = [(xml_node, current_depth)]
+        pop = stack.pop
+        push = stack.extend
+        while stack:
+            node, depth = pop()
+            if depth > max_depth:
+                max_depth = depth
+            children = node.children
+            if children:
+                child_depth = depth + 1
+                push([(child, child_depth) for child in children])
         return max_depth
     
     def _add_tree_items(self, parent_item, xml_node, parent_node=None):
@@ -1065,10 +1307,10 @@ class XmlTreeWidget(QTreeWidget):
         while stack:
             current_parent_item, current_xml_node, current_parent_node = stack.pop()
             
-            item = QTreeWidgetItem()
+            item = self._new_item()
             # Compute display name based on toggle
             item.setText(0, self.compute_display_name(current_xml_node))
-            item.setText(1, self._truncate_value(current_xml_node.value) if current_xml_node.value else "")
+            item.setText(1, current_xml_node.truncated_value())
             item.xml_node = current_xml_node
             item.parent_node = current_parent_node
             
@@ -1077,9 +1319,11 @@ class XmlTreeWidget(QTreeWidget):
             else:
                 current_parent_item.addChild(item)
             
-            # Add children to stack in reverse order for correct processing
-            for child in reversed(current_xml_node.children):
-                stack.append((item, child, current_xml_node))
+            # Push children in reverse order (so they pop in source order) with a
+            # single C-level extend instead of one append per child
+            children = current_xml_node.children
+            if children:
+                stack.extend([(item, child, current_xml_node) for child in children[::-1]])
     
     def _add_tree_items_large(self, parent_item, xml_node, parent_node=None, max_children=50):
         """Add tree items for large files with performance optimizations"""
@@ -1093,10 +1337,10 @@ class XmlTreeWidget(QTreeWidget):
         while stack and items_processed < max_items:
             current_parent_item, current_xml_node, current_parent_node, depth = stack.pop()
             
-            item = QTreeWidgetItem()
+            item = self._new_item()
             # Compute display name based on toggle
             item.setText(0, self.compute_display_name(current_xml_node))
-            item.setText(1, self._truncate_value(current_xml_node.value) if current_xml_node.value else "")
+            item.setText(1, current_xml_node.truncated_value())
             item.xml_node = current_xml_node
             item.parent_node = current_parent_node
             
@@ -1110,13 +1354,13 @@ class XmlTreeWidget(QTreeWidget):
             if depth < max_depth:
                 children_to_process = current_xml_node.children[:max_children]
                 
-                # Add children to stack in reverse order for correct processing
-                for child in reversed(children_to_process):
-                    stack.append((item, child, current_xml_node, depth + 1))
+                # Push children in reverse order (so they pop in source order) in one extend
+                child_depth = depth + 1
+                stack.extend([(item, child, current_xml_node, child_depth) for child in children_to_process[::-1]])
                 
                 # Add placeholder if there are more children
                 if len(current_xml_node.children) > max_children:
-                    placeholder = QTreeWidgetItem()
+                    placeholder = self._new_item()
                     placeholder.setText(0, f"... ({len(current_xml_node.children) - max_children} more items)")
                     placeholder.setForeground(0, QColor("gray"))
                     item.addChild(placeholder)
@@ -1128,50 +1372,62 @@ class XmlTreeWidget(QTreeWidget):
         
         # If we hit the max items limit, add a warning
         if items_processed >= max_items and stack:
-            warning_item = QTreeWidgetItem()
+            warning_item = self._new_item()
             warning_item.setText(0, f"Tree truncated at {max_items} items for performance")
             warning_item.setText(1, "Use editor to view full content")
             warning_item.setForeground(0, QColor("orange"))
             self.addTopLevelItem(warning_item)
     
+    def _on_find_next_key(self):
+        """F3: Find Next"""
+        self.window().find_next()
+
+    def _on_find_previous_key(self):
+        """Shift+F3: Find Previous"""
+        self.window().find_previous()
+
+    def _on_hide_key(self):
+        """Delete: hide current node recursively (visual filter only)"""
+        current = self.currentItem()
+        if current:
+            self.hide_item_recursively(current)
+            if self.status_label:
+                self.status_label.setText("Hidden selected node (recursive)")
+
+    def _on_delete_block_key(self):
+        """Ctrl+Delete: Delete XML Block (Model change)"""
+        current = self.currentItem()
+        if current:
+            self.delete_node_requested.emit(current.xml_node)
+
+    def _on_hide_block_key(self):
+        """Ctrl+/: Hide XML Block (Comment out - Model change)"""
+        current = self.currentItem()
+        if current:
+            self.hide_node_requested.emit(current.xml_node)
+
+    # Shortcut dispatch table: (key, modifiers as int) -> handler name.
+    # Built once at import so keyPressEvent is a single dict lookup per key event.
+    _SHORTCUTS = {
+        (Qt.Key.Key_F3.value, Qt.KeyboardModifier.NoModifier.value): '_on_find_next_key',
+        (Qt.Key.Key_F3.value, Qt.KeyboardModifier.ShiftModifier.value): '_on_find_previous_key',
+        (Qt.Key.Key_Delete.value, Qt.KeyboardModifier.NoModifier.value): '_on_hide_key',
+        (Qt.Key.Key_Delete.value, Qt.KeyboardModifier.ControlModifier.value): '_on_delete_block_key',
+        (Qt.Key.Key_Slash.value, Qt.KeyboardModifier.ControlModifier.value): '_on_hide_block_key',
+    }
+    # Keys that can start a shortcut; anything else (arrows, type-ahead search) skips the lookup
+    _SHORTCUT_KEYS = frozenset(key for key, _ in _SHORTCUTS)
+
     def keyPressEvent(self, event):
         """Handle key press events for tree view"""
-        # Check for F3 (Find Next)
-        if event.key() == Qt.Key.Key_F3 and event.modifiers() == Qt.KeyboardModifier.NoModifier:
-            self.window().find_next()
-            event.accept()
-            return
-        # Check for Shift+F3 (Find Previous)
-        if event.key() == Qt.Key.Key_F3 and event.modifiers() == Qt.KeyboardModifier.ShiftModifier:
-            self.window().find_previous()
-            event.accept()
-            return
-        # Delete: hide current node recursively (visual filter only)
-        if event.key() == Qt.Key.Key_Delete and event.modifiers() == Qt.KeyboardModifier.NoModifier:
-            current = self.currentItem()
-            if current:
-                self.hide_item_recursively(current)
-                if self.status_label:
-                    self.status_label.setText("Hidden selected node (recursive)")
-            event.accept()
-            return
+        key = event.key()
+        if key in self._SHORTCUT_KEYS:
+            handler = self._SHORTCUTS.get((key, event.modifiers().value))
+            if handler is not None:
+                getattr(self, handler)()
+                event.accept()
+                return
 
-        # Ctrl+Delete: Delete XML Block (Model change)
-        if event.key() == Qt.Key.Key_Delete and event.modifiers() == Qt.KeyboardModifier.ControlModifier:
-            current = self.currentItem()
-            if current:
-                 self.delete_node_requested.emit(current.xml_node)
-            event.accept()
-            return
-            
-        # Ctrl+/: Hide XML Block (Comment out - Model change)
-        if event.key() == Qt.Key.Key_Slash and event.modifiers() == Qt.KeyboardModifier.ControlModifier:
-            current = self.currentItem()
-            if current:
-                 self.hide_node_requested.emit(current.xml_node)
-            event.accept()
-            return
-        
         # Let parent handle other keys
         super().keyPressEvent(event)
 
@@ -1355,6 +1611,45 @@ class XmlParseWorker(QThread):
             self.parsed.emit(None)
 
 
+class XmlTreeBuildWorker(QThread):
+    """Worker thread building the XmlTreeNode structure (no Qt objects) for large files"""
+    built = pyqtSignal(object)
+
+    def __init__(self, xml_content, service, file_path=None, parent=None):
+        super().__init__(parent)
+        self.xml_content = xml_content
+        self.service = service
+        self.file_path = file_path
+
+    def run(self):
+        try:
+            root_node = self.service.build_xml_tree(self.xml_content, file_path=self.file_path)
+            if root_node and self.file_path:
+                # Pickling a large tree is slow too, so do it here rather than on the GUI thread
+                self.service.save_tree_cache(self.file_path, root_node)
+            self.built.emit(root_node)
+        except Exception as e:
+            print(f"Worker tree build error: {e}")
+            self.built.emit(None)
+
+
+class PathLineIndexWorker(QThread):
+    """Worker thread building the path→line index for large files"""
+    built = pyqtSignal(object)
+
+    def __init__(self, xml_content, service, parent=None):
+        super().__init__(parent)
+        self.xml_content = xml_content
+        self.service = service
+
+    def run(self):
+        try:
+            self.built.emit(self.service.build_path_line_index(self.xml_content))
+        except Exception as e:
+            print(f"Worker path index error: {e}")
+            self.built.emit(None)
+
+
 class AutoCloseWorker(QThread):
     """Worker thread for auto-closing tags"""
     finished = pyqtSignal(str, bool)
@@ -1387,6 +1682,63 @@ class ProgressPopup(QWidget):
         self.setAttribute(Qt.WidgetAttribute.WA_ShowWithoutActivating)
 
 
+class BookmarkMap(dict):
+    """Line -> label bookmarks that also keep their line numbers sorted for bisect navigation"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.lines = sorted(self.keys())
+
+    def __setitem__(self, line, label):
+        if line not in self:
+            bisect.insort(self.lines, line)
+        super().__setitem__(line, label)
+
+    def __delitem__(self, line):
+        super().__delitem__(line)
+        del self.lines[bisect.bisect_left(self.lines, line)]
+
+    def pop(self, line, *default):
+        if line in self:
+            del self.lines[bisect.bisect_left(self.lines, line)]
+        return super().pop(line, *default)
+
+    def popitem(self):
+        line, label = super().popitem()
+        del self.lines[bisect.bisect_left(self.lines, line)]
+        return line, label
+
+    def clear(self):
+        super().clear()
+        self.lines.clear()
+
+    def update(self, *args, **kwargs):
+        for line, label in dict(*args, **kwargs).items():
+            self[line] = label
+
+    def setdefault(self, line, label=None):
+        if line not in self:
+            self[line] = label
+        return self[line]
+
+    def __ior__(self, other):
+        self.update(other)
+        return self
+
+    def copy(self):
+        return BookmarkMap(self)
+
+    def next_after(self, line: int) -> int:
+        """First bookmark after line, wrapping to the first one"""
+        i = bisect.bisect_right(self.lines, line)
+        return self.lines[i % len(self.lines)]
+
+    def previous_before(self, line: int) -> int:
+        """Last bookmark before line, wrapping to the last one"""
+        i = bisect.bisect_left(self.lines, line)
+        return self.lines[i - 1]
+
+
 class XmlEditorWidget(QsciScintilla):
     """Custom text editor for XML with QScintilla"""
     content_changed = pyqtSignal()
@@ -1394,6 +1746,8 @@ class XmlEditorWidget(QsciScintilla):
     fragment_editor_requested = pyqtSignal()
     definition_lookup_requested = pyqtSignal(str)
     modification_changed = pyqtSignal(bool)
+    # Editor debug traces; MainWindow keeps this in step with its debug_mode flag
+    debug_output = False
     
     class LineNumberWidgetAdapter:
         def __init__(self, editor):
@@ -1422,6 +1776,65 @@ class XmlEditorWidget(QsciScintilla):
         def setGeometry(self, *args):
             pass
 
+    # Source of content versions; shared by all editors so a (version, ...) key
+    # never matches content of a different editor
+    _CONTENT_VERSIONS = itertools.count(1)
+
+    # Indicator number used for the tree-selection block highlight
+    BLOCK_INDICATOR = 10
+
+    # Theme for new editors: read from settings once, then kept current by MainWindow's theme switch
+    dark_theme_default = None
+
+    # Modifier combinations as plain ints so the key handler compares ints
+    # instead of OR-ing enum flags on every event
+    _CTRL = Qt.KeyboardModifier.ControlModifier.value
+    _CTRL_SHIFT = (Qt.KeyboardModifier.ControlModifier | Qt.KeyboardModifier.ShiftModifier).value
+
+    # Ctrl shortcuts handled by the editor itself:
+    # (key, modifiers) -> (call on main window?, method name, argument)
+    _KEY_TABLE = {
+        (Qt.Key.Key_Up.value, _CTRL_SHIFT): (False, '_move_selected_lines', -1),
+        (Qt.Key.Key_Down.value, _CTRL_SHIFT): (False, '_move_selected_lines', 1),
+    }
+    # Ctrl+1..9 jumps to a numbered bookmark, Ctrl+Shift+1..9 sets one
+    for _digit, _key in enumerate((Qt.Key.Key_1, Qt.Key.Key_2, Qt.Key.Key_3, Qt.Key.Key_4, Qt.Key.Key_5,
+                                   Qt.Key.Key_6, Qt.Key.Key_7, Qt.Key.Key_8, Qt.Key.Key_9), start=1):
+        _KEY_TABLE[(_key.value, _CTRL)] = (True, 'goto_numbered_bookmark', _digit)
+        _KEY_TABLE[(_key.value, _CTRL_SHIFT)] = (True, 'set_numbered_bookmark', _digit)
+    del _digit, _key
+
+    # Last-resort fallback for Ctrl+Shift+digit when neither the Qt key nor the native
+    # key code identifies the digit: shifted symbols of the US layout
+    _SHIFTED_SYMBOL_DIGITS = {
+        Qt.Key.Key_Exclam.value: 1, Qt.Key.Key_At.value: 2, Qt.Key.Key_NumberSign.value: 3,
+        Qt.Key.Key_Dollar.value: 4, Qt.Key.Key_Percent.value: 5, Qt.Key.Key_AsciiCircum.value: 6,
+        Qt.Key.Key_Ampersand.value: 7, Qt.Key.Key_Asterisk.value: 8, Qt.Key.Key_ParenLeft.value: 9,
+    }
+
+    @classmethod
+    def _shifted_digit(cls, event):
+        """Digit for a Ctrl+Shift key event whose Qt key is the layout's shifted symbol"""
+        # Windows virtual-key codes for the digit row are '1'..'9' regardless of
+        # keyboard layout and Shift state
+        native = event.nativeVirtualKey()
+        if 0x31 <= native <= 0x39:
+            return native - 0x30
+        return cls._SHIFTED_SYMBOL_DIGITS.get(event.key())
+
+    def _bump_content_version(self):
+        self.content_version = next(self._CONTENT_VERSIONS)
+
+    def _on_scintilla_modified(self, position, modification_type, *args):
+        if modification_type & (QsciScintilla.SC_MOD_INSERTTEXT | QsciScintilla.SC_MOD_DELETETEXT):
+            line = self.SendScintilla(QsciScintilla.SCI_LINEFROMPOSITION, position) + 1
+            if self.first_modified_line is None or line < self.first_modified_line:
+                self.first_modified_line = line
+
+    def take_first_modified_line(self):
+        """Return the earliest edited line since the previous call (None if unedited) and reset it"""
+        line, self.first_modified_line = self.first_modified_line, None
+        return line
 
     def __init__(self):
         super().__init__()
@@ -1443,16 +1856,10 @@ class XmlEditorWidget(QsciScintilla):
             font_family = settings.value("editor_font_family", "Consolas")
             font_size = int(settings.value("editor_font_size", 11))
             
-            # Robust boolean reading for theme
-            val = settings.value("flags/dark_theme")
-            if val is None:
-                self.is_dark_theme = True # Default to Dark matching MainWindow
-            elif isinstance(val, bool):
-                self.is_dark_theme = val
-            elif isinstance(val, str):
-                self.is_dark_theme = val.lower() in ("1", "true", "yes", "on")
-            else:
-                self.is_dark_theme = bool(val)
+            # Robust boolean reading for theme; default to Dark matching MainWindow
+            if XmlEditorWidget.dark_theme_default is None:
+                XmlEditorWidget.dark_theme_default = _settings_bool(settings.value("flags/dark_theme"), True)
+            self.is_dark_theme = XmlEditorWidget.dark_theme_default
         except Exception:
             self.is_dark_theme = True
             
@@ -1476,16 +1883,22 @@ class XmlEditorWidget(QsciScintilla):
         self.enable_occurrence_highlighting = True
         
         # Bookmarks & File info
-        self.bookmarks = {}
+        self.bookmarks = BookmarkMap()
         self.numbered_bookmarks = {}
         self.file_path = None
         self.zip_source = None
         self._folded_ranges = []
+        # Changes on every text edit; used to key caches derived from the content
+        self.content_version = next(self._CONTENT_VERSIONS)
+        # Earliest (1-based) line touched by an edit since take_first_modified_line()
+        self.first_modified_line = None
 
         # Line Number Adapter
         self.line_number_widget = self.LineNumberWidgetAdapter(self)
         
         # Signals
+        self.textChanged.connect(self._bump_content_version)
+        self.SCN_MODIFIED.connect(self._on_scintilla_modified)
         self.textChanged.connect(self.content_changed)
         self.modificationChanged.connect(self.modification_changed.emit)
         self.cursorPositionChanged.connect(self._on_cursor_changed)
@@ -1505,6 +1918,9 @@ class XmlEditorWidget(QsciScintilla):
 
         # Occurrence highlighting
         self._occurrence_indicators = []
+
+        # Context menu, built on first right-click
+        self._context_menu = None
         
         # Visibility options
         self.visibility_options = {
@@ -1520,42 +1936,74 @@ class XmlEditorWidget(QsciScintilla):
         # This fixes the issue where Scintilla starts with light theme despite dark mode
         QTimer.singleShot(0, self.update_colors)
 
+    def keyPressEvent(self, event):
+        """Dispatch editor-level shortcuts, pass everything else to QScintilla"""
+        mods = event.modifiers().value
+        # Plain typing never carries Ctrl: hand it straight to QScintilla
+        if not mods & self._CTRL:
+            super().keyPressEvent(event)
+            return
+
+        entry = self._KEY_TABLE.get((event.key(), mods))
+        if entry is None and mods == self._CTRL_SHIFT:
+            digit = self._shifted_digit(event)
+            if digit is not None:
+                entry = (True, 'set_numbered_bookmark', digit)
+
+        if entry is not None:
+            on_window, method_name, arg = entry
+            handler = getattr(self.window() if on_window else self, method_name, None)
+            if handler is not None:
+                # One guard around the dispatched call rather than one per shortcut
+                try:
+                    handler(arg)
+                except Exception as e:
+                    print(f"Shortcut error: {e}")
+                event.accept()
+                return
+        super().keyPressEvent(event)
+
+    def _debug_print(self, message, *args):
+        """Print an editor debug trace when debug_output is enabled (see MainWindow._debug_print)"""
+        if self.debug_output:
+            print(message % args if args else message)
+
     def mousePressEvent(self, event):
-        print(f"DEBUG: mousePressEvent called. Button={event.button()}, Modifiers={event.modifiers()}")
-        if event.button() == Qt.MouseButton.LeftButton and (event.modifiers() & Qt.KeyboardModifier.ControlModifier):
+        self._debug_print("DEBUG: mousePressEvent called. Button=%s, Modifiers=%s", event.button(), event.modifiers())
+        if event.button() == Qt.MouseButton.LeftButton and event.modifiers().value & self._CTRL:
             # Handle Ctrl+Click for definition lookup
             pos = event.pos()
             # Convert visual position to scintilla position
             scint_pos = self.SendScintilla(QsciScintilla.SCI_POSITIONFROMPOINT, pos.x(), pos.y())
-            print(f"DEBUG: mousePressEvent pos={pos}, scint_pos={scint_pos}")
+            self._debug_print("DEBUG: mousePressEvent pos=%s, scint_pos=%s", pos, scint_pos)
             
             if scint_pos != -1:
                 line, index = self.lineIndexFromPosition(scint_pos)
                 # Get line text
                 text = self.text(line)
-                print(f"DEBUG: line={line}, index={index}, len(text)={len(text)}")
-                print(f"DEBUG: line text='{text}'")
+                self._debug_print("DEBUG: line=%s, index=%s, len(text)=%s", line, index, len(text))
+                self._debug_print("DEBUG: line text='%s'", text)
                 
                 # QScintilla might return byte index. If so, we need to adjust.
                 # Heuristic: if index > len(text) and text has unicode, it's likely byte index.
                 if index >= len(text) and len(text.encode('utf-8')) >= index:
-                     print("DEBUG: index seems to be byte offset, attempting adjustment")
+                     self._debug_print("DEBUG: index seems to be byte offset, attempting adjustment")
                      try:
                          byte_text = text.encode('utf-8')
                          # Truncate to byte index
                          sub_bytes = byte_text[:index]
                          # Decode to find char length
                          char_index = len(sub_bytes.decode('utf-8'))
-                         print(f"DEBUG: adjusted index from {index} to {char_index}")
+                         self._debug_print("DEBUG: adjusted index from %s to %s", index, char_index)
                          index = char_index
                      except Exception as e:
-                         print(f"DEBUG: index adjustment failed: {e}")
+                         self._debug_print("DEBUG: index adjustment failed: %s", e)
 
                 if index < len(text):
                     # Check if inside quotes
                     self._check_definition_lookup(text, index)
                 else:
-                    print(f"DEBUG: index {index} out of bounds for text length {len(text)}")
+                    self._debug_print("DEBUG: index %s out of bounds for text length %s", index, len(text))
         
         super().mousePressEvent(event)
 
@@ -1573,7 +2021,7 @@ class XmlEditorWidget(QsciScintilla):
                     start_quote = i
                     break
             
-            print(f"DEBUG: start_quote={start_quote}")
+            self._debug_print("DEBUG: start_quote=%s", start_quote)
             if start_quote == -1:
                 return
 
@@ -1584,20 +2032,20 @@ class XmlEditorWidget(QsciScintilla):
                     end_quote = i
                     break
             
-            print(f"DEBUG: end_quote={end_quote}")
+            self._debug_print("DEBUG: end_quote=%s", end_quote)
             if end_quote == -1:
                 return
             
             # Ensure we are inside the quotes (not on them)
             if start_quote < index < end_quote:
                 content = text[start_quote+1 : end_quote]
-                print(f"DEBUG: found content inside quotes: '{content}'")
+                self._debug_print("DEBUG: found content inside quotes: '%s'", content)
                 # Check pattern
                 if content.startswith("Запросы.") or content.startswith("Алгоритмы."):
-                    print(f"DEBUG: emitting definition_lookup_requested for '{content}'")
+                    self._debug_print("DEBUG: emitting definition_lookup_requested for '%s'", content)
                     self.definition_lookup_requested.emit(content)
                 else:
-                    print(f"DEBUG: content does not start with expected prefix")
+                    self._debug_print("DEBUG: content does not start with expected prefix")
 
         except Exception as e:
             print(f"Definition lookup check error: {e}")
@@ -1643,6 +2091,97 @@ class XmlEditorWidget(QsciScintilla):
         """Get currently selected text."""
         return self.selectedText()
 
+    def _get_selection_line_range(self):
+        """Return (first_line, last_line, has_selection) covered by the selection or cursor"""
+        # Raw positions and line lookups: no byte-to-character index conversion as in getSelection()
+        start = self.SendScintilla(QsciScintilla.SCI_GETSELECTIONSTART)
+        end = self.SendScintilla(QsciScintilla.SCI_GETSELECTIONEND)
+        line_from = self.SendScintilla(QsciScintilla.SCI_LINEFROMPOSITION, start)
+        if start == end:
+            return line_from, line_from, False
+        line_to = self.SendScintilla(QsciScintilla.SCI_LINEFROMPOSITION, end)
+        # A selection ending at the start of a line does not include that line
+        if line_to > line_from and self.SendScintilla(QsciScintilla.SCI_POSITIONFROMLINE, line_to) == end:
+            line_to -= 1
+        return line_from, line_to, True
+
+    def _move_selected_lines(self, direction: int):
+        """Move the selected lines (or the current line) one line up or down.
+
+        Scintilla moves the affected lines in place as a single undo step, so
+        the rest of the document, its styling and the markers are untouched.
+        """
+        first, last, has_selection = self._get_selection_line_range()
+        _, index = self.getCursorPosition()
+        if direction < 0:
+            if first == 0:
+                return
+            self.SendScintilla(QsciScintilla.SCI_MOVESELECTEDLINESUP)
+        else:
+            if last >= self.lines() - 1:
+                return
+            self.SendScintilla(QsciScintilla.SCI_MOVESELECTEDLINESDOWN)
+        if not has_selection:
+            # Scintilla selects the moved line; keep a plain caret instead
+            self.setCursorPosition(first + direction, index)
+
+    def _toggle_line_comments(self, prefix: str = "//"):
+        """Toggle a line-comment prefix on the selected lines (or the current line).
+
+        Only the affected lines are read and edited; the whole toggle is one undo step.
+        """
+        first, last, has_selection = self._get_selection_line_range()
+        prefix_utf8 = prefix.encode('utf-8')
+        prefix_bytes = len(prefix_utf8)
+
+        # Read each line once: (line, indent, content after the indent)
+        lines = []
+        for line in range(first, last + 1):
+            text = self.text(line)
+            stripped = text.lstrip()
+            lines.append((line, len(text) - len(stripped), stripped))
+
+        contents = [entry for entry in lines if entry[2]]
+        uncomment = bool(contents) and all(stripped.startswith(prefix) for _, _, stripped in contents)
+
+        self.beginUndoAction()
+        try:
+            # Indentation is ASCII whitespace, so its length is also its byte offset
+            for line, indent, stripped in lines:
+                line_start = self.SendScintilla(QsciScintilla.SCI_POSITIONFROMLINE, line)
+                if uncomment:
+                    if stripped.startswith(prefix):
+                        self.SendScintilla(QsciScintilla.SCI_DELETERANGE, line_start + indent, prefix_bytes)
+                elif stripped:
+                    self.SendScintilla(QsciScintilla.SCI_INSERTTEXT, line_start + indent, prefix_utf8)
+                elif not has_selection:
+                    # A lone empty line still gets commented
+                    self.SendScintilla(QsciScintilla.SCI_INSERTTEXT, line_start, prefix_utf8)
+        finally:
+            self.endUndoAction()
+
+        if has_selection:
+            # Keep the toggled lines selected so the shortcut can be repeated
+            self.SendScintilla(QsciScintilla.SCI_SETSEL,
+                               self.SendScintilla(QsciScintilla.SCI_POSITIONFROMLINE, first),
+                               self.SendScintilla(QsciScintilla.SCI_GETLINEENDPOSITION, last))
+
+    def _delete_selected_lines(self):
+        """Delete the selected lines (or the current line) as a single range removal"""
+        first, last, _ = self._get_selection_line_range()
+        if last + 1 < self.lines():
+            start = self.SendScintilla(QsciScintilla.SCI_POSITIONFROMLINE, first)
+            end = self.SendScintilla(QsciScintilla.SCI_POSITIONFROMLINE, last + 1)
+        else:
+            # Last line has no trailing newline: take the preceding one instead
+            end = self.length()
+            if first > 0:
+                start = self.SendScintilla(QsciScintilla.SCI_GETLINEENDPOSITION, first - 1)
+            else:
+                start = 0
+        if end > start:
+            self.SendScintilla(QsciScintilla.SCI_DELETERANGE, start, end - start)
+
     def set_line_numbers_visible(self, visible: bool):
         if visible:
             self.line_number_widget.show()
@@ -1682,6 +2221,60 @@ class XmlEditorWidget(QsciScintilla):
     def set_content(self, content: str):
         self.setText(content)
 
+    @staticmethod
+    def _common_prefix_length(a: str, b: str, limit: int) -> int:
+        """Length of the common prefix of a and b, capped at limit"""
+        # Compare in large chunks first (C-level equality), then narrow down in the first differing chunk
+        chunk = 65536
+        pos = 0
+        while pos < limit:
+            end = min(pos + chunk, limit)
+            if a[pos:end] != b[pos:end]:
+                while a[pos] == b[pos]:
+                    pos += 1
+                return pos
+            pos = end
+        return limit
+
+    @staticmethod
+    def _common_suffix_length(a: str, b: str, limit: int) -> int:
+        """Length of the common suffix of a and b, capped at limit"""
+        # Same chunked comparison as _common_prefix_length, walking back from the ends
+        chunk = 65536
+        len_a = len(a)
+        len_b = len(b)
+        count = 0
+        while count < limit:
+            end = min(count + chunk, limit)
+            if a[len_a - end:len_a - count] != b[len_b - end:len_b - count]:
+                while a[len_a - count - 1] == b[len_b - count - 1]:
+                    count += 1
+                return count
+            count = end
+        return limit
+
+    def replace_document_text(self, text: str):
+        """Replace the document contents in place, touching only the span that differs.
+
+        Unlike setText() this is a single undoable edit that keeps the undo
+        history, and markers, folds and styling outside the changed span stay put.
+        Use it for edits of the open document; use set_content() for loading.
+        """
+        old = self.text()
+        if old == text:
+            return
+        limit = min(len(old), len(text))
+        prefix = self._common_prefix_length(old, text, limit)
+        # Common suffix, capped so it cannot overlap the prefix
+        suffix = self._common_suffix_length(old, text, limit - prefix)
+
+        # Scintilla positions are UTF-8 byte offsets
+        start = len(old[:prefix].encode('utf-8'))
+        end = self.length() - len(old[len(old) - suffix:].encode('utf-8')) if suffix else self.length()
+        replacement = text[prefix:len(text) - suffix].encode('utf-8')
+        self.SendScintilla(QsciScintilla.SCI_SETTARGETRANGE, start, end)
+        self.SendScintilla(QsciScintilla.SCI_REPLACETARGET, len(replacement), replacement)
+
 
     def highlight_line(self, line_number: int):
         if line_number <= 0:
@@ -1702,16 +2295,22 @@ class XmlEditorWidget(QsciScintilla):
 
     def set_dark_theme(self, dark_theme=True):
         """Apply dark or light theme colors to the lexer."""
+        # update_colors() restyles the whole document; skip it when nothing changes
+        if self.is_dark_theme == dark_theme:
+            return
         self.is_dark_theme = dark_theme
         self.update_colors()
 
     def set_visibility_options(self, hide_symbols=False, hide_tags=False, hide_values=False):
         """Set visibility options for syntax highlighting."""
-        self.visibility_options = {
+        options = {
             'hide_symbols': hide_symbols,
             'hide_tags': hide_tags,
             'hide_values': hide_values
         }
+        if options == self.visibility_options:
+            return
+        self.visibility_options = options
         self.update_colors()
 
     def update_colors(self):
@@ -1813,7 +2412,7 @@ class XmlEditorWidget(QsciScintilla):
         
         # Get selected text
         text = self.selectedText()
-        print(f"DEBUG: highlight_all_occurrences selected text: '{text}'")
+        self._debug_print("DEBUG: highlight_all_occurrences selected text: '%s'", text)
         if not text:
             return
             
@@ -1833,7 +2432,8 @@ class XmlEditorWidget(QsciScintilla):
                     break
                 
                 # fillIndicatorRange uses character offsets in QsciScintilla
-                print(f"DEBUG: Filling indicator at line {line_idx}, start {idx}, len {len(text)}")
+                if self.debug_output:
+                    print(f"DEBUG: Filling indicator at line {line_idx}, start {idx}, len {len(text)}")
                 self.fillIndicatorRange(line_idx, idx, line_idx, idx + len(text), 8)
                 
                 start_idx = idx + len(text)
@@ -1843,6 +2443,28 @@ class XmlEditorWidget(QsciScintilla):
         self.indicatorDefine(QsciScintilla.IndicatorStyle.StraightBoxIndicator, 8)
         self.setIndicatorForegroundColor(QColor("purple"), 8)
         self.setIndicatorDrawUnder(True, 8) # Draw under text
+        # Orange box around the element selected in the tree
+        self.indicatorDefine(QsciScintilla.IndicatorStyle.StraightBoxIndicator, self.BLOCK_INDICATOR)
+        # QScintilla takes the fill and outline alpha from the colors
+        self.setIndicatorForegroundColor(QColor(255, 140, 0, 60), self.BLOCK_INDICATOR)
+        self.setIndicatorOutlineColor(QColor(255, 140, 0, 255), self.BLOCK_INDICATOR)
+        self.setIndicatorDrawUnder(True, self.BLOCK_INDICATOR)
+        self._block_highlight_range = None  # (first_line, last_line) currently filled
+
+    def set_block_highlight(self, first_line: int, last_line: int):
+        """Box lines first_line..last_line (0-based), replacing the previous block"""
+        self.clear_block_highlight()
+        self.fillIndicatorRange(first_line, 0, last_line, self.lineLength(last_line), self.BLOCK_INDICATOR)
+        self._block_highlight_range = (first_line, last_line)
+
+    def clear_block_highlight(self):
+        """Remove the block highlight; no-op when none is shown"""
+        if self._block_highlight_range is None:
+            return
+        first_line, last_line = self._block_highlight_range
+        self._block_highlight_range = None
+        last_line = min(last_line, self.lines() - 1)
+        self.clearIndicatorRange(first_line, 0, last_line, self.lineLength(last_line), self.BLOCK_INDICATOR)
 
 
     def _is_fold_line(self, line):
@@ -1914,6 +2536,13 @@ class XmlEditorWidget(QsciScintilla):
             print(f"Error in fold_to_level: {e}")
 
     def contextMenuEvent(self, event):
+        # Build the menu on first use and reuse it for every later right-click
+        if self._context_menu is None:
+            self._context_menu = self._build_context_menu()
+        self._context_menu.exec(event.globalPos())
+
+    def _build_context_menu(self):
+        """Create the editor context menu; main window actions are bound at build time"""
         menu = QMenu(self)
         menu.addAction("Undo", QKeySequence("Ctrl+Z"), self.undo)
         menu.addAction("Redo", QKeySequence("Ctrl+Y"), self.redo)
@@ -1931,6 +2560,10 @@ class XmlEditorWidget(QsciScintilla):
             toggle_comment_action.setShortcut("Ctrl+/")
             toggle_comment_action.triggered.connect(main_window.toggle_comment)
             
+        delete_lines_action = menu.addAction("Delete Line(s)")
+        delete_lines_action.setShortcut("Ctrl+L")
+        delete_lines_action.triggered.connect(self._delete_selected_lines)
+
         if hasattr(main_window, 'remove_empty_lines'):
             remove_empty_lines_action = menu.addAction("Remove Empty Lines")
             remove_empty_lines_action.triggered.connect(main_window.remove_empty_lines)
@@ -1940,7 +2573,7 @@ class XmlEditorWidget(QsciScintilla):
         fragment_action.setShortcut("F8")
         fragment_action.triggered.connect(self.fragment_editor_requested.emit)
         
-        menu.exec(event.globalPos())
+        return menu
 
     def resizeEvent(self, event):
         super().resizeEvent(event)
@@ -1964,6 +2597,69 @@ class XmlEditorWidget(QsciScintilla):
         pass
 
 
+class BookmarkDelegate(QStyledItemDelegate):
+    """Paints a bookmark row as line number, text and a clear (X) button.
+
+    Replaces a per-row QWidget with labels and a button: the row is a plain
+    QListWidgetItem (line number in UserRole, text in DisplayRole) and clicks
+    on the X area are routed through editorEvent.
+    """
+    NUMBER_WIDTH = 44
+    BUTTON_SIZE = 20
+    MARGIN = 6
+
+    def _button_rect(self, rect):
+        size = self.BUTTON_SIZE
+        return QRect(rect.right() - self.MARGIN - size + 1, rect.center().y() - size // 2 + 1, size, size)
+
+    def paint(self, painter, option, index):
+        opt = QStyleOptionViewItem(option)
+        self.initStyleOption(opt, index)
+        widget = opt.widget
+        style = widget.style() if widget else QApplication.style()
+
+        # Row background/selection without the default text
+        text = opt.text
+        opt.text = ""
+        style.drawControl(QStyle.ControlElement.CE_ItemViewItem, opt, painter, widget)
+
+        rect = option.rect
+        button_rect = self._button_rect(rect)
+        number_rect = QRect(rect.left() + self.MARGIN, rect.top(), self.NUMBER_WIDTH, rect.height())
+        text_rect = QRect(number_rect.right() + 8, rect.top(),
+                          button_rect.left() - number_rect.right() - 16, rect.height())
+
+        painter.save()
+        selected = bool(opt.state & QStyle.StateFlag.State_Selected)
+        painter.setPen(opt.palette.color(QPalette.ColorRole.HighlightedText if selected else QPalette.ColorRole.Text))
+        align = Qt.AlignmentFlag.AlignLeft | Qt.AlignmentFlag.AlignVCenter
+        painter.drawText(number_rect, align, str(index.data(Qt.ItemDataRole.UserRole)))
+        painter.drawText(text_rect, align, opt.fontMetrics.elidedText(text, Qt.TextElideMode.ElideRight, text_rect.width()))
+        painter.restore()
+
+        button = QStyleOptionButton()
+        button.rect = button_rect
+        button.text = "X"
+        button.state = QStyle.StateFlag.State_Enabled | QStyle.StateFlag.State_Raised
+        style.drawControl(QStyle.ControlElement.CE_PushButton, button, painter, widget)
+
+    def sizeHint(self, option, index):
+        hint = super().sizeHint(option, index)
+        return QSize(hint.width(), max(hint.height(), self.BUTTON_SIZE + 4))
+
+    def editorEvent(self, event, model, option, index):
+        if (event.type() == QEvent.Type.MouseButtonRelease
+                and event.button() == Qt.MouseButton.LeftButton
+                and self._button_rect(option.rect).contains(event.position().toPoint())):
+            line_number = index.data(Qt.ItemDataRole.UserRole)
+            try:
+                self.parent().window().remove_bookmark(line_number)
+            except Exception:
+                pass
+            return True
+        return super().editorEvent(event, model, option, index)
+
+
 class BottomPanel(QTabWidget):
     """Bottom panel with tabs for different panels"""
     def __init__(self):
@@ -2065,6 +2761,7 @@ class BottomPanel(QTabWidget):
         self.bookmark_list = QListWidget()
         self.bookmark_list.setMaximumHeight(250)
         self.bookmark_list.setStyleSheet("font-size: 9px;")  # Make list more compact
+        self.bookmark_list.setItemDelegate(BookmarkDelegate(self.bookmark_list))
         layout.addWidget(self.bookmark_list)
         self.bookmarks_tab.setLayout(layout)
 
@@ -2094,73 +2791,48 @@ class BottomPanel(QTabWidget):
         
         self.links_tab.setLayout(layout)
 
+    # File types the panel opens when dropped
+    _SUPPORTED_EXTENSIONS = (".xml", ".xsd", ".xsl", ".xslt")
+
+    @classmethod
+    def _first_supported_path(cls, md):
+        """First existing supported file among dropped local URLs, else a pasted text path"""
+        candidates = []
+        if md.hasUrls():
+            candidates = [url.toLocalFile() for url in md.urls() if url.isLocalFile()]
+        if not candidates and md.hasText():
+            text = md.text().strip()
+            if text:
+                candidates = [text]
+        for path in candidates:
+            # Lower-case only when the exact-case check misses
+            if (path.endswith(cls._SUPPORTED_EXTENSIONS) or path.lower().endswith(cls._SUPPORTED_EXTENSIONS)) \
+                    and os.path.exists(path):
+                return path
+        return None
+
     def dragEnterEvent(self, event):
         """Accept drags that look like supported local files."""
-        try:
-            md = event.mimeData()
-            # File URLs
-            if md.hasUrls():
-                for url in md.urls():
-                    try:
-                        if url.isLocalFile():
-                            p = url.toLocalFile()
-                            if isinstance(p, str) and p.lower().endswith((".xml", ".xsd", ".xsl", ".xslt")):
-                                event.acceptProposedAction()
-                                return
-                    except Exception:
-                        continue
-            # Plain text path
-            if md.hasText():
-                try:
-                    t = md.text().strip()
-                    if t and os.path.exists(t) and t.lower().endswith((".xml", ".xsd", ".xsl", ".xslt")):
-                        event.acceptProposedAction()
-                        return
-                except Exception:
-                    pass
-        except Exception:
-            pass
-        event.ignore()
+        if self._first_supported_path(event.mimeData()):
+            event.acceptProposedAction()
+        else:
+            event.ignore()
 
     def dropEvent(self, event):
         """Open the dropped file if supported."""
+        path = self._first_supported_path(event.mimeData())
+        if not path:
+            event.ignore()
+            return
+        main_window = self.window()
         try:
-            md = event.mimeData()
-            paths = []
-            if md.hasUrls():
-                for url in md.urls():
-                    try:
-                        if url.isLocalFile():
-                            p = url.toLocalFile()
-                            if isinstance(p, str):
-                                paths.append(p)
-                    except Exception:
-                        continue
-            elif md.hasText():
-                try:
-                    t = md.text().strip()
-                    if t:
-                        paths.append(t)
-                except Exception:
-                    pass
-            # Open first supported file
-            for p in paths:
-                try:
-                    if os.path.exists(p) and p.lower().endswith((".xml", ".xsd", ".xsl", ".xslt")):
-                        try:
-                            self.window().open_file(p)
-                        except Exception:
-                            try:
-                                self.window()._load_file_from_path(p)
-                            except Exception:
-                                pass
-                        event.acceptProposedAction()
-                        return
-                except Exception:
-                    continue
+            main_window.open_file(path)
         except Exception:
-            pass
-        event.ignore()
+            try:
+                main_window._load_file_from_path(path)
+            except Exception:
+                pass
+        event.acceptProposedAction()
     
     def append_output(self, text: str):
         """Append text to output"""
@@ -2190,48 +2862,24 @@ class BottomPanel(QTabWidget):
             pass
 
     def add_bookmark_item(self, line_number: int, display_text: str):
-        """Add a bookmark item with text and a clear (X) button"""
-        try:
-            item = QListWidgetItem()
-            # Store line number in item for navigation
-            item.setData(Qt.ItemDataRole.UserRole, line_number)
-            # Avoid painting default item text to prevent duplicate rendering with the widget
-            item.setText("")
-            # Create widget with label and X button
-            container = QWidget()
-            h = QHBoxLayout(container)
-            h.setContentsMargins(6, 2, 6, 2)
-            h.setSpacing(8)
-            # Left number label with padding to prevent overlap
-            num_label = QLabel(str(line_number))
-            num_label.setMinimumWidth(44)  # leave more indent so text does not overlap
-            num_label.setAlignment(Qt.AlignmentFlag.AlignLeft | Qt.AlignmentFlag.AlignVCenter)
-            # Text label for bookmark content
-            text_label = QLabel(display_text)
-            text_label.setToolTip("Double-click to jump to this bookmark")
-            btn = QPushButton("X")
-            btn.setFixedSize(20, 20)
-            btn.setToolTip("Clear this bookmark")
-            def _on_clear():
-                try:
-                    self.window().remove_bookmark(line_number)
-                except Exception:
-                    pass
-            btn.clicked.connect(_on_clear)
-            h.addWidget(num_label)
-            h.addWidget(text_label, 1)
-            h.addStretch()
-            h.addWidget(btn)
-            container.setLayout(h)
-            self.bookmark_list.addItem(item)
-            # Provide a reasonable size hint so the list row height matches the widget
-            try:
-                item.setSizeHint(container.sizeHint())
-            except Exception:
-                pass
-            self.bookmark_list.setItemWidget(item, container)
-        except Exception:
-            pass
+        """Add a bookmark item with text and a clear (X) button (painted by BookmarkDelegate)"""
+        item = QListWidgetItem(display_text)
+        # Store line number in item for navigation
+        item.setData(Qt.ItemDataRole.UserRole, line_number)
+        item.setToolTip("Double-click to jump to this bookmark")
+        self.bookmark_list.addItem(item)
+
+
+@functools.lru_cache(maxsize=16)
+def _compile_search_pattern(text, case_sensitive=False, whole_word=False, use_regex=False, multiline=False):
+    """Compile (and cache) the pattern for a find/replace query; raises re.error for bad regexes"""
+    flags = 0 if case_sensitive else re.IGNORECASE
+    if multiline:
+        flags |= re.MULTILINE
+    pattern_text = text if use_regex else re.escape(text)
+    if whole_word:
+        pattern_text = fr"\b{pattern_text}\b"
+    return re.compile(pattern_text, flags)
 
 
 class FindDialog(QDialog):
@@ -2469,6 +3117,59 @@ class GoToLineDialog(QDialog):
         return self.line_spinbox.value()
 
 
+class TreeItemsModel(QAbstractTableModel):
+    """Read-only table model backed directly by a list of row tuples.
+
+    With a row_source iterator the rows are pulled in batches as the view
+    scrolls (canFetchMore/fetchMore) instead of all up front.
+    """
+    FETCH_BATCH = 1000
+
+    def __init__(self, rows, headers, parent=None, row_source=None):
+        super().__init__(parent)
+        self._rows = rows
+        self._headers = headers
+        self._row_source = row_source
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self._rows)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self._headers)
+
+    def canFetchMore(self, parent=QModelIndex()):
+        return not parent.isValid() and self._row_source is not None
+
+    def fetchMore(self, parent=QModelIndex(), limit=FETCH_BATCH):
+        if not self.canFetchMore(parent):
+            return
+        batch = list(itertools.islice(self._row_source, limit)) if limit else list(self._row_source)
+        if not limit or len(batch) < limit:
+            self._row_source = None
+        if batch:
+            first = len(self._rows)
+            self.beginInsertRows(QModelIndex(), first, first + len(batch) - 1)
+            self._rows.extend(batch)
+            self.endInsertRows()
+
+    def fetch_all(self):
+        """Pull every remaining row from the row source"""
+        self.fetchMore(limit=None)
+
+    def cell_text(self, row, column):
+        return str(self._rows[row][column])
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if role == Qt.ItemDataRole.DisplayRole and index.isValid():
+            return self.cell_text(index.row(), index.column())
+        return None
+
+    def headerData(self, section, orientation, role=Qt.ItemDataRole.DisplayRole):
+        if role == Qt.ItemDataRole.DisplayRole and orientation == Qt.Orientation.Horizontal:
+            return self._headers[section]
+        return super().headerData(section, orientation, role)
+
+
 class TreeExportDialog(QDialog):
     """Dialog for exporting tree content to table format"""
     def __init__(self, tree_widget, parent=None):
@@ -2484,11 +3185,11 @@ class TreeExportDialog(QDialog):
         info_label.setWordWrap(True)
         layout.addWidget(info_label)
         
-        # Table widget
-        self.table_widget = QTableWidget()
-        self.table_widget.setSelectionBehavior(QTableWidget.SelectionBehavior.SelectItems)
-        self.table_widget.setSelectionMode(QTableWidget.SelectionMode.ExtendedSelection)
-        layout.addWidget(self.table_widget)
+        # Table view; rows live in a TreeItemsModel instead of one QTableWidgetItem per cell
+        self.table_view = QTableView()
+        self.table_view.setSelectionBehavior(QTableView.SelectionBehavior.SelectItems)
+        self.table_view.setSelectionMode(QTableView.SelectionMode.ExtendedSelection)
+        layout.addWidget(self.table_view)
         
         # Buttons
         button_layout = QHBoxLayout()
@@ -2515,77 +3216,76 @@ class TreeExportDialog(QDialog):
         self.populate_table(tree_widget)
     
     def populate_table(self, tree_widget):
-        """Populate table with tree content"""
-        # Get all items from tree
-        all_items = []
-        self.get_all_tree_items(tree_widget.invisibleRootItem(), all_items, 0)
-        
-        if not all_items:
-            self.table_widget.setRowCount(1)
-            self.table_widget.setColumnCount(1)
-            self.table_widget.setItem(0, 0, QTableWidgetItem("No tree content available"))
+        """Populate table with tree content; rows are read from the tree as the view scrolls"""
+        # Level, Name, Value, Attributes
+        model = TreeItemsModel([], ["Level", "Name", "Value", "Attributes"], self,
+                               row_source=self.iter_tree_items(tree_widget))
+        model.fetchMore()
+        
+        if not model.rowCount():
+            self.table_view.setModel(TreeItemsModel([("No tree content available",)], [""], self))
             return
         
-        # Set up table
-        self.table_widget.setRowCount(len(all_items))
-        self.table_widget.setColumnCount(4)  # Level, Name, Value, Attributes
-        self.table_widget.setHorizontalHeaderLabels(["Level", "Name", "Value", "Attributes"])
-        
-        # Populate table
-        for row, (level, name, value, attributes) in enumerate(all_items):
-            self.table_widget.setItem(row, 0, QTableWidgetItem(str(level)))
-            self.table_widget.setItem(row, 1, QTableWidgetItem(name))
-            self.table_widget.setItem(row, 2, QTableWidgetItem(value if value else ""))
-            self.table_widget.setItem(row, 3, QTableWidgetItem(attributes if attributes else ""))
+        self.table_view.setModel(model)
         
-        # Resize columns to content
-        self.table_widget.resizeColumnsToContents()
+        # Only the first batch is loaded, so sizing columns to it stays cheap
+        self.table_view.resizeColumnsToContents()
     
-    def get_all_tree_items(self, parent_item, items_list, level):
-        """Recursively get all tree items"""
-        for i in range(parent_item.childCount()):
-            child = parent_item.child(i)
-            
-            # Get item data
-            name = child.text(0) if child.text(0) else ""
-            value = child.text(1) if child.text(1) else ""
-            attributes = child.text(2) if child.text(2) else ""
-            
-            items_list.append((level, name, value, attributes))
-            
-            # Recursively process children
-            self.get_all_tree_items(child, items_list, level + 1)
+    @staticmethod
+    def iter_tree_items(tree_widget):
+        """Yield (level, name, value, attributes) for all tree items in pre-order (iterative).
+
+        Stops early if the tree is rebuilt or cleared meanwhile, since its items
+        are then recycled or deleted.
+        """
+        generation = getattr(tree_widget, '_build_generation', None)
+        root = tree_widget.invisibleRootItem()
+        stack = [(root.child(i), 0) for i in range(root.childCount() - 1, -1, -1)]
+        try:
+            while stack:
+                if getattr(tree_widget, '_build_generation', None) != generation:
+                    return
+                child, child_level = stack.pop()
+                
+                # text() already returns "" for unset columns: read each column once
+                yield (child_level, child.text(0), child.text(1), child.text(2))
+                
+                # Push children reversed so they pop in document order
+                stack.extend([(child.child(i), child_level + 1) for i in range(child.childCount() - 1, -1, -1)])
+        except RuntimeError:
+            # Underlying items were deleted (tree cleared)
+            return
     
     def select_all_cells(self):
         """Select all cells in the table"""
-        self.table_widget.selectAll()
+        model = self.table_view.model()
+        if isinstance(model, TreeItemsModel):
+            model.fetch_all()
+        self.table_view.selectAll()
     
     def copy_to_clipboard(self):
         """Copy selected cells to clipboard"""
-        selection = self.table_widget.selectedRanges()
-        if not selection:
-            QMessageBox.information(self, "Info", "No cells selected. Please select cells first.")
-            return
-        
-        # Get all selected cells
-        selected_items = self.table_widget.selectedItems()
-        if not selected_items:
+        selection = self.table_view.selectionModel().selection()
+        if selection.isEmpty():
             QMessageBox.information(self, "Info", "No cells selected. Please select cells first.")
             return
         
-        # Create text representation
-        text_data = []
-        for item in selected_items:
-            row = item.row()
-            col = item.column()
-            text = item.text()
-            text_data.append(f"Row {row}, Col {col}: {text}")
+        # Emit each selected rectangle as tab-separated rows (pasteable into spreadsheets)
+        model = self.table_view.model()
+        cell_text = model.cell_text
+        lines = []
+        cell_count = 0
+        for sel_range in selection:
+            columns = range(sel_range.left(), sel_range.right() + 1)
+            for row in range(sel_range.top(), sel_range.bottom() + 1):
+                lines.append("\t".join([cell_text(row, col) for col in columns]))
+            cell_count += sel_range.width() * sel_range.height()
         
         # Copy to clipboard
         clipboard = QApplication.clipboard()
-        clipboard.setText("\n".join(text_data))
+        clipboard.setText("\n".join(lines))
         
-        QMessageBox.information(self, "Success", f"Copied {len(selected_items)} cells to clipboard!")
+        QMessageBox.information(self, "Success", f"Copied {cell_count} cells to clipboard!")
 
 
 class MainWindow(QMainWindow):
@@ -2595,12 +3295,39 @@ class MainWindow(QMainWindow):
         self.current_file = None
         self.current_zip_source = None  # { 'zip_path': str, 'arc_name': str, 'temp_dir': str }
         self.xml_service = XmlService()
+        self._settings_cached = None  # created on first use by _get_settings
+        self._current_language_name = 'XML'  # last applied language combo selection
+
+        # Persisted flags are written in batches (see _save_flag / _flush_flags)
+        self._pending_flags = {}
+        self._flag_flush_timer = QTimer(self)
+        self._flag_flush_timer.setSingleShot(True)
+        self._flag_flush_timer.setInterval(250)
+        self._flag_flush_timer.timeout.connect(self._flush_flags)
+        app = QApplication.instance()
+        if app is not None:
+            app.aboutToQuit.connect(self._flush_flags)
+        # Visibility toggles restyle the whole document; coalesce bursts into one update
+        self._visibility_timer = QTimer(self)
+        self._visibility_timer.setSingleShot(True)
+        self._visibility_timer.setInterval(30)
+        self._visibility_timer.timeout.connect(self._apply_highlighter_settings)
+        # Flag indicator text is rebuilt once per burst of toggles, from the final state
+        self._flags_indicator_timer = QTimer(self)
+        self._flags_indicator_timer.setSingleShot(True)
+        self._flags_indicator_timer.setInterval(0)
+        self._flags_indicator_timer.timeout.connect(self._refresh_flags_indicator)
+
+        # Set up timer for auto-save; it only runs while the current editor has unsaved changes
+        self.auto_save_timer = QTimer()
+        self.auto_save_timer.setInterval(300000)  # 5 minutes
+        self.auto_save_timer.timeout.connect(self._auto_save)
         
         # Debug logging flag (set to True to enable treedebug.txt logging)
         self.tree_debug_enabled = False
         
         # Bookmarks functionality
-        self._temp_bookmarks = {}  # Temporary storage until editor is active
+        self._temp_bookmarks = BookmarkMap()  # Temporary storage until editor is active
         self._temp_numbered_bookmarks = {} # Temporary storage until editor is active
         self.current_bookmark_index = -1
         
@@ -2613,7 +3340,8 @@ class MainWindow(QMainWindow):
         self.current_search_index = -1
         
         # Recent files functionality
-        self.recent_files = []
+        # Recent files as an LRU: most recently opened path is last
+        self.recent_files = OrderedDict()
         self.max_recent_files = 5  # Show 5 recent files in menu
         self.recent_files_menu = None  # Will be set in _create_menu_bar
 
@@ -2623,6 +3351,9 @@ class MainWindow(QMainWindow):
         
         # Highlight feature flag (orange border on tree node selection)
         self.highlight_enabled = True  # Enabled by default
+
+        # Connection handles for the active editor's signals, keyed by name
+        self._editor_conns = {}
         
         self.setWindowTitle("Lotus Xml Editor - Python Version")
         self.setGeometry(100, 100, 1200, 800)
@@ -2642,25 +3373,26 @@ class MainWindow(QMainWindow):
         self._setup_auto_hide()
         self._connect_signals()
 
-        # Load persisted toggle flags (after UI and actions are created)
-        try:
-            self._load_persisted_flags()
-        except Exception as e:
-            print(f"Error loading persisted flags: {e}")
-
         # Path→line indexing and cache configuration
         self.path_line_index = {}
         self.path_line_cache = {}
+        # First line whose index/cache entries may be stale (None = index is current)
+        self._index_dirty_line = None
+        # Larger documents are not indexed (setting "index/size_limit_mb")
+        self._index_size_limit = 20 * 1024 * 1024
+        # Incremented per index build; results of older background builds are dropped
+        self._index_generation = 0
         self.sync_index_enabled = False
         self.sync_cache_enabled = False
         self._sync_index_available = False  # lxml availability flag
         # Loading guard to suppress content-changed side effects during programmatic loads
         self._loading_file = False
-        
-        # Set up timer for auto-save
-        self.auto_save_timer = QTimer()
-        self.auto_save_timer.timeout.connect(self._auto_save)
-        self.auto_save_timer.start(300000)  # 5 minutes
+        # Line -> element path, keyed by (editor content version, line)
+        self._line_to_path_cache = functools.lru_cache(maxsize=4096)(self._path_for_line)
+        # ((id(editor), content version), ranges) of the last _compute_enclosing_xml_ranges scan
+        self._ranges_cache = (None, [])
+        # (editor content version, [(start_line, end_line), ...]) for tree item folding
+        self._range_lines_cache = (None, [])
         
         # Set up debounce timer for tree updates
         self.tree_update_debounce_interval = 5000  # Default 5 seconds, configurable in settings
@@ -2677,8 +3409,14 @@ class MainWindow(QMainWindow):
         # Debug mode flag
         self.debug_mode = False
         
+        # Load persisted toggle flags (after UI, actions and the defaults above
+        # exist, so restored values are not overwritten by those defaults)
+        try:
+            self._load_persisted_flags()
+        except Exception as e:
+            print(f"Error loading persisted flags: {e}")
         # Theme is applied via persisted settings in _load_persisted_flags
-        
+
         # FTP Manager
         self.ftp_manager = FtpManager()
         self.ftp_downloads = {} # local_path -> ftp_info
@@ -2758,8 +3496,8 @@ class MainWindow(QMainWindow):
         base_title = f"Lotus Xml Editor - {ver_str}"
         
         # Update FavoritesWidget file path
-        if hasattr(self, 'bottom_panel') and hasattr(self.bottom_panel, 'favorites_widget'):
-            self.bottom_panel.favorites_widget.current_file_path = self.current_file
+        if getattr(self, '_bottom_panel', None) is not None:
+            self._bottom_panel.favorites_widget.current_file_path = self.current_file
         
         if self.current_file:
             filename = os.path.basename(self.current_file)
@@ -2772,47 +3510,61 @@ class MainWindow(QMainWindow):
             self.setWindowTitle(base_title)
 
     def _build_path_line_index(self, content: str):
-        """Build path→line index using lxml.etree.sourceline if available."""
+        """Build the path→line index (XmlService.build_path_line_index) for content.
+
+        Documents over 1 MB are indexed on a PathLineIndexWorker thread.
+        """
         self.path_line_index = {}
+        self._index_dirty_line = None
+        self.xml_editor.take_first_modified_line()
+        self._sync_index_available = False
+        # Results of builds still running on a worker are dropped
+        self._index_generation += 1
+        generation = self._index_generation
+        # Only pay for the index when sync lookups can use it
+        if not (self.sync_index_enabled or self.sync_cache_enabled) or len(content) > self._index_size_limit:
+            return
+        if len(content) > 1024 * 1024:
+            # Large document: lookups use the text search fallback until the index arrives
+            worker = PathLineIndexWorker(content, self.xml_service, self)
+            worker.built.connect(lambda index: self._finish_path_line_index(index, generation))
+            worker.finished.connect(worker.deleteLater)
+            worker.start()
+            return
         try:
-            from lxml import etree
-            import io
-            f = io.BytesIO(content.encode('utf-8'))
-            tag_counters_stack = []  # sibling counters per level (depth-indexed)
-            path_stack = []  # active path stack of (tag_name, index)
-            # Use both start and end events to maintain accurate ancestry
-            for event, elem in etree.iterparse(f, events=("start", "end")):
-                if event == "start":
-                    tag = elem.tag
-                    # Strip namespace if present
-                    if isinstance(tag, str) and tag.startswith("{"):
-                        tag = tag.split('}', 1)[1]
-                    depth = len(path_stack)
-                    # Ensure counters exist for this depth
-                    if len(tag_counters_stack) <= depth:
-                        tag_counters_stack.append({})
-                    level_counters = tag_counters_stack[depth]
-                    level_counters[tag] = level_counters.get(tag, 0) + 1
-                    idx = level_counters[tag]
-                    # Push to path stack
-                    path_stack.append((tag, idx))
-                    # Record full path for this start element
-                    path = ''.join([f"/{t}[{i}]" for (t, i) in path_stack])
-                    line = getattr(elem, 'sourceline', None) or 0
-                    if line:
-                        self.path_line_index[path] = line
-                else:  # end event
-                    # Pop the last element from the path stack
-                    if path_stack:
-                        path_stack.pop()
-                    # Trim counters stack to current depth
-                    if len(tag_counters_stack) > len(path_stack) + 1:
-                        tag_counters_stack = tag_counters_stack[:len(path_stack) + 1]
-            self._sync_index_available = True
+            index = self.xml_service.build_path_line_index(content)
         except Exception as e:
-            self._debug_print(f"DEBUG: lxml indexing not available or failed: {e}")
-            self.path_line_index = {}
-            self._sync_index_available = False
+            self._debug_print(f"DEBUG: path/line indexing failed: {e}")
+            index = None
+        self._finish_path_line_index(index, generation)
+
+    def _finish_path_line_index(self, index, generation):
+        """Install a built path→line index, dropping results of superseded builds"""
+        if generation != self._index_generation:
+            return
+        self.path_line_index = index or {}
+        self._sync_index_available = index is not None
+
+    def _path_line_index_watermark(self):
+        """First line from which index/cache entries may be stale, or None.
+
+        Edits never move elements that start before the first edited line, so
+        entries below the watermark stay valid until the next rebuild.
+        """
+        line = self.xml_editor.take_first_modified_line()
+        if line is not None and (self._index_dirty_line is None or line < self._index_dirty_line):
+            self._index_dirty_line = line
+        return self._index_dirty_line
+
+    def _lookup_path_line_index(self, content: str, element_path: str) -> int:
+        """Index line for element_path; rebuilds the index only if the entry may be stale"""
+        dirty = self._path_line_index_watermark()
+        line = self.path_line_index.get(element_path, 0)
+        if dirty is not None and (not line or line >= dirty):
+            self.path_line_cache = {p: l for p, l in self.path_line_cache.items() if l < dirty}
+            self._build_path_line_index(content)
+            line = self.path_line_index.get(element_path, 0)
+        return line
     
     @property
     def numbered_bookmarks(self):
@@ -2839,6 +3591,7 @@ class MainWindow(QMainWindow):
     @bookmarks.setter
     def bookmarks(self, value):
         """Set bookmarks for the current editor"""
+        value = BookmarkMap(value)
         if hasattr(self, 'xml_editor') and self.xml_editor:
             self.xml_editor.bookmarks = value
         else:
@@ -2871,8 +3624,21 @@ class MainWindow(QMainWindow):
         open_ftp_action.triggered.connect(self.open_from_ftp)
         file_menu.addAction(open_ftp_action)
         
-        # Recent Files submenu
+        # Recent Files submenu: fixed set of actions, updated in place
         self.recent_files_menu = file_menu.addMenu("Recent Files")
+        self._recent_actions = []
+        for _ in range(self.max_recent_files):
+            action = QAction(self)
+            action.triggered.connect(lambda checked, action=action: self._open_recent_file(action.data()))
+            self.recent_files_menu.addAction(action)
+            self._recent_actions.append(action)
+        self._recent_separator = self.recent_files_menu.addSeparator()
+        self._clear_recent_action = QAction("Clear Recent Files", self)
+        self._clear_recent_action.triggered.connect(self._clear_recent_files)
+        self.recent_files_menu.addAction(self._clear_recent_action)
+        self._no_recent_action = QAction("No recent files", self)
+        self._no_recent_action.setEnabled(False)
+        self.recent_files_menu.addAction(self._no_recent_action)
         self._update_recent_files_menu()
         
         file_menu.addSeparator()
@@ -3147,43 +3913,9 @@ class MainWindow(QMainWindow):
         unescape_entities_action.triggered.connect(self.unescape_selection_entities)
         commands_menu.addAction(unescape_entities_action)
 
-        # Help menu (Обмен с 1С)
+        # Help menu (Обмен с 1С): no shortcuts, so its actions are created on first open
         exchange_menu = menubar.addMenu("Обмен с 1С")
-
-        # Mode toggle: Semi-automatic (checked) vs Manual (unchecked)
-        self.exchange_mode_action = QAction("Полуавтоматический режим", self)
-        self.exchange_mode_action.setCheckable(True)
-        self.exchange_mode_action.setChecked(True)
-        self.exchange_mode_action.setToolTip(
-            "Переключение режима: Полуавтоматический (по умолчанию) или ручной"
-        )
-        def _toggle_exchange_mode(checked: bool):
-            self.exchange_mode = "semi" if checked else "manual"
-            try:
-                # Persist as flag
-                self._save_flag('exchange_semi_mode', checked)
-            except Exception:
-                pass
-        self.exchange_mode_action.toggled.connect(_toggle_exchange_mode)
-        exchange_menu.addAction(self.exchange_mode_action)
-
-        exchange_menu.addSeparator()
-
-        # Import from 1C: choose two XML files (unzipped) and open edited one
-        exchange_import_action = QAction("Импорт из 1С (2 XML)", self)
-        exchange_import_action.setToolTip(
-            "Выбрать два XML из 1С и открыть редактируемый файл"
-        )
-        exchange_import_action.triggered.connect(self.exchange_import)
-        exchange_menu.addAction(exchange_import_action)
-
-        # Export to 1C: package two XML into one ZIP
-        exchange_export_zip_action = QAction("Экспорт в 1С (ZIP из 2 XML)", self)
-        exchange_export_zip_action.setToolTip(
-            "Упаковать редактируемый и парный XML в один ZIP"
-        )
-        exchange_export_zip_action.triggered.connect(self.exchange_export_zip)
-        exchange_menu.addAction(exchange_export_zip_action)
+        self._populate_menu_on_first_show(exchange_menu, self._populate_exchange_menu)
 
         # View menu
         view_menu = menubar.addMenu("View")
@@ -3336,132 +4068,31 @@ class MainWindow(QMainWindow):
         self.toggle_update_tree_view_action.setChecked(False)  # Default: off
         #self.toggle_update_tree_view_action.setShortcut("F11")  # Hotkey: F9
 
-        def _on_update_tree_view_toggled(checked: bool):
-            # Set the underlying flag
-            self.update_tree_on_tab_switch = checked
-            
-            # Disconnect or reconnect content_changed signal based on toggle state
-            try:
-                if checked:
-                    # Reconnect signal to enable live tree updates
-                    self.xml_editor.content_changed.connect(self.on_content_changed)
-                else:
-                    # Disconnect signal to prevent tree updates on every keystroke
-                    self.xml_editor.content_changed.disconnect(self.on_content_changed)
-            except Exception as e:
-                # Signal might already be connected/disconnected, ignore
-                pass
-            
-            # Sync toolbar toggle if present
-            if hasattr(self, 'update_tree_toggle'):
-                try:
-                    self.update_tree_toggle.blockSignals(True)
-                    self.update_tree_toggle.setChecked(checked)
-                    self.update_tree_toggle.blockSignals(False)
-                except Exception:
-                    pass
-            # Status and flags indicator
-            if hasattr(self, 'status_label') and self.status_label:
-                self.status_label.setText(f"Tree update {'enabled' if checked else 'disabled'}")
-            try:
-                self._update_flags_indicator()
-            except Exception:
-                pass
-            # Persist
-            try:
-                self._save_flag('update_tree_on_tab_switch', checked)
-            except Exception:
-                pass
-
-        self.toggle_update_tree_view_action.toggled.connect(_on_update_tree_view_toggled)
+        self.toggle_update_tree_view_action.toggled.connect(
+            functools.partial(self._on_update_tree_toggled, 'update_tree_toggle'))
         view_menu.addAction(self.toggle_update_tree_view_action)
         
         view_menu.addSeparator()
         
-        # Auto-hide toggles
-        self.toggle_toolbar_autohide_action = QAction("Auto-hide Toolbar", self)
-        self.toggle_toolbar_autohide_action.setCheckable(True)
-        self.toggle_toolbar_autohide_action.setChecked(True)  # Enabled by default
-        self.toggle_toolbar_autohide_action.setShortcut("Ctrl+Shift+T")
-        
-        def _on_toolbar_autohide_toggled(checked: bool):
-            try:
-                if hasattr(self, 'toolbar_auto_hide'):
-                    self.toolbar_auto_hide.set_auto_hide_enabled(checked)
-                if hasattr(self, 'status_label') and self.status_label:
-                    self.status_label.setText(f"Toolbar auto-hide {'enabled' if checked else 'disabled'}")
-                try:
-                    self._save_flag('toolbar_autohide', checked)
-                except Exception:
-                    pass
-            except Exception as e:
-                print(f"Toolbar auto-hide toggle error: {e}")
-        
-        self.toggle_toolbar_autohide_action.toggled.connect(_on_toolbar_autohide_toggled)
-        view_menu.addAction(self.toggle_toolbar_autohide_action)
-        
-        self.toggle_tree_header_autohide_action = QAction("Auto-hide Tree Header", self)
-        self.toggle_tree_header_autohide_action.setCheckable(True)
-        self.toggle_tree_header_autohide_action.setChecked(True)  # Enabled by default
-        self.toggle_tree_header_autohide_action.setShortcut("Ctrl+Shift+H")
-        
-        def _on_tree_header_autohide_toggled(checked: bool):
-            try:
-                if hasattr(self, 'tree_header_auto_hide'):
-                    self.tree_header_auto_hide.set_auto_hide_enabled(checked)
-                if hasattr(self, 'status_label') and self.status_label:
-                    self.status_label.setText(f"Tree header auto-hide {'enabled' if checked else 'disabled'}")
-                try:
-                    self._save_flag('tree_header_autohide', checked)
-                except Exception:
-                    pass
-            except Exception as e:
-                print(f"Tree header auto-hide toggle error: {e}")
-        
-        self.toggle_tree_header_autohide_action.toggled.connect(_on_tree_header_autohide_toggled)
-        view_menu.addAction(self.toggle_tree_header_autohide_action)
-        
-        self.toggle_tree_column_header_autohide_action = QAction("Auto-hide Tree Column Header", self)
-        self.toggle_tree_column_header_autohide_action.setCheckable(True)
-        self.toggle_tree_column_header_autohide_action.setChecked(True)  # Enabled by default
-        self.toggle_tree_column_header_autohide_action.setShortcut("Ctrl+Shift+E")
-        
-        def _on_tree_column_header_autohide_toggled(checked: bool):
-            try:
-                if hasattr(self, 'tree_column_header_auto_hide'):
-                    self.tree_column_header_auto_hide.set_auto_hide_enabled(checked)
-                if hasattr(self, 'status_label') and self.status_label:
-                    self.status_label.setText(f"Tree column header auto-hide {'enabled' if checked else 'disabled'}")
-                try:
-                    self._save_flag('tree_column_header_autohide', checked)
-                except Exception:
-                    pass
-            except Exception as e:
-                print(f"Tree column header auto-hide toggle error: {e}")
-        
-        self.toggle_tree_column_header_autohide_action.toggled.connect(_on_tree_column_header_autohide_toggled)
-        view_menu.addAction(self.toggle_tree_column_header_autohide_action)
-        
-        self.toggle_tab_bar_autohide_action = QAction("Auto-hide Tab Bar", self)
-        self.toggle_tab_bar_autohide_action.setCheckable(True)
-        self.toggle_tab_bar_autohide_action.setChecked(True)  # Enabled by default
-        self.toggle_tab_bar_autohide_action.setShortcut("Ctrl+Shift+B")
-        
-        def _on_tab_bar_autohide_toggled(checked: bool):
-            try:
-                if hasattr(self, 'tab_bar_auto_hide'):
-                    self.tab_bar_auto_hide.set_auto_hide_enabled(checked)
-                if hasattr(self, 'status_label') and self.status_label:
-                    self.status_label.setText(f"Tab bar auto-hide {'enabled' if checked else 'disabled'}")
-                try:
-                    self._save_flag('tab_bar_autohide', checked)
-                except Exception:
-                    pass
-            except Exception as e:
-                print(f"Tab bar auto-hide toggle error: {e}")
-        
-        self.toggle_tab_bar_autohide_action.toggled.connect(_on_tab_bar_autohide_toggled)
-        view_menu.addAction(self.toggle_tab_bar_autohide_action)
+        # Auto-hide toggles (all enabled by default):
+        # (action attribute, text, shortcut, auto-hide manager attribute, flag key, status label)
+        for action_attr, text, shortcut, manager_attr, flag_key, label in (
+            ('toggle_toolbar_autohide_action', "Auto-hide Toolbar", "Ctrl+Shift+T",
+             'toolbar_auto_hide', 'toolbar_autohide', "Toolbar"),
+            ('toggle_tree_header_autohide_action', "Auto-hide Tree Header", "Ctrl+Shift+H",
+             'tree_header_auto_hide', 'tree_header_autohide', "Tree header"),
+            ('toggle_tree_column_header_autohide_action', "Auto-hide Tree Column Header", "Ctrl+Shift+E",
+             'tree_column_header_auto_hide', 'tree_column_header_autohide', "Tree column header"),
+            ('toggle_tab_bar_autohide_action', "Auto-hide Tab Bar", "Ctrl+Shift+B",
+             'tab_bar_auto_hide', 'tab_bar_autohide', "Tab bar"),
+        ):
+            action = QAction(text, self)
+            action.setCheckable(True)
+            action.setChecked(True)
+            action.setShortcut(shortcut)
+            action.toggled.connect(functools.partial(self._on_auto_hide_toggled, manager_attr, flag_key, label))
+            setattr(self, action_attr, action)
+            view_menu.addAction(action)
         
         view_menu.addSeparator()
         
@@ -3485,19 +4116,7 @@ class MainWindow(QMainWindow):
         self.toggle_line_numbers_action.setChecked(False)  # Default: off
         self.toggle_line_numbers_action.setShortcut("Ctrl+L")
         
-        def _on_line_numbers_toggled(checked: bool):
-            try:
-                self.apply_line_numbers_to_all_editors(checked)
-                if hasattr(self, 'status_label') and self.status_label:
-                    self.status_label.setText(f"Line numbers {'shown' if checked else 'hidden'}")
-                try:
-                    self._save_flag('show_line_numbers', checked)
-                except Exception:
-                    pass
-            except Exception as e:
-                print(f"Line numbers toggle error: {e}")
-        
-        self.toggle_line_numbers_action.toggled.connect(_on_line_numbers_toggled)
+        self.toggle_line_numbers_action.toggled.connect(self._on_line_numbers_toggled)
         view_menu.addAction(self.toggle_line_numbers_action)
         
         # Toggle Code Folding
@@ -3505,25 +4124,7 @@ class MainWindow(QMainWindow):
         self.toggle_code_folding_action.setCheckable(True)
         self.toggle_code_folding_action.setChecked(True)  # Default: on
         
-        def _on_code_folding_toggled(checked: bool):
-            try:
-                # Apply to current editor
-                if hasattr(self, 'xml_editor') and self.xml_editor:
-                    self.xml_editor.set_code_folding_enabled(checked)
-                
-                # Update status
-                if hasattr(self, 'status_label') and self.status_label:
-                    self.status_label.setText(f"Code folding {'enabled' if checked else 'disabled'}")
-                
-                # Persist flag
-                try:
-                    self._save_flag('code_folding', checked)
-                except Exception:
-                    pass
-            except Exception as e:
-                print(f"Code folding toggle error: {e}")
-        
-        self.toggle_code_folding_action.toggled.connect(_on_code_folding_toggled)
+        self.toggle_code_folding_action.toggled.connect(self._on_code_folding_toggled)
         view_menu.addAction(self.toggle_code_folding_action)
         
         view_menu.addSeparator()
@@ -3574,6 +4175,50 @@ class MainWindow(QMainWindow):
         about_action.triggered.connect(self.show_about_dialog)
         help_menu.addAction(about_action)
     
+    def _populate_menu_on_first_show(self, menu, populate):
+        """Defer creating a menu's actions until it is first opened"""
+        def _on_about_to_show():
+            menu.aboutToShow.disconnect(_on_about_to_show)
+            populate(menu)
+        menu.aboutToShow.connect(_on_about_to_show)
+
+    def _populate_exchange_menu(self, exchange_menu):
+        """Create the 1C exchange menu actions"""
+        # Mode toggle: Semi-automatic (checked) vs Manual (unchecked)
+        self.exchange_mode_action = QAction("Полуавтоматический режим", self)
+        self.exchange_mode_action.setCheckable(True)
+        self.exchange_mode_action.setChecked(getattr(self, 'exchange_mode', 'semi') == 'semi')
+        self.exchange_mode_action.setToolTip(
+            "Переключение режима: Полуавтоматический (по умолчанию) или ручной"
+        )
+        def _toggle_exchange_mode(checked: bool):
+            self.exchange_mode = "semi" if checked else "manual"
+            try:
+                # Persist as flag
+                self._save_flag('exchange_semi_mode', checked)
+            except Exception:
+                pass
+        self.exchange_mode_action.toggled.connect(_toggle_exchange_mode)
+        exchange_menu.addAction(self.exchange_mode_action)
+
+        exchange_menu.addSeparator()
+
+        # Import from 1C: choose two XML files (unzipped) and open edited one
+        exchange_import_action = QAction("Импорт из 1С (2 XML)", self)
+        exchange_import_action.setToolTip(
+            "Выбрать два XML из 1С и открыть редактируемый файл"
+        )
+        exchange_import_action.triggered.connect(self.exchange_import)
+        exchange_menu.addAction(exchange_import_action)
+
+        # Export to 1C: package two XML into one ZIP
+        exchange_export_zip_action = QAction("Экспорт в 1С (ZIP из 2 XML)", self)
+        exchange_export_zip_action.setToolTip(
+            "Упаковать редактируемый и парный XML в один ZIP"
+        )
+        exchange_export_zip_action.triggered.connect(self.exchange_export_zip)
+        exchange_menu.addAction(exchange_export_zip_action)
+
     def _create_tool_bar(self):
         """Create tool bar"""
         # Create floating toolbar (parented to self but not added to layout)
@@ -3651,285 +4296,39 @@ class MainWindow(QMainWindow):
         
         # Sync toggle in command bar to optionally enable text-to-tree sync
         toolbar.addSeparator()
-        self.toggle_sync_action = QAction("Enable Sync", self)
-        self.toggle_sync_action.setCheckable(True)
-        self.toggle_sync_action.setChecked(False)
-        
-        def _on_sync_toggled(checked: bool):
-            """Handle sync toggled from command bar: set flag, update status, and update tree selection immediately when enabled"""
-            # Update button state
-            self._update_button_state('sync', checked)
-            
-            self.sync_enabled = checked
-            if hasattr(self, 'status_label') and self.status_label:
-                self.status_label.setText(f"Sync {'enabled' if checked else 'disabled'}")
-            # Refresh compact flags indicator
-            try:
-                self._update_flags_indicator()
-            except Exception:
-                pass
-            # Persist
-            try:
-                self._save_flag('sync_enabled', checked)
-            except Exception:
-                pass
-            if checked:
-                try:
-                    current_line = 0
-                    line, _ = self.xml_editor.getCursorPosition()
-                    current_line = line + 1
-
-                    # Update main tree
-                    self._sync_tree_to_cursor(current_line)
-                    # Compute path for multicolumn windows and propagate
-                    content = self.xml_editor.get_content()
-                    path = self._get_element_path_at_line(content, current_line)
-                    if path:
-                        for win in getattr(self, 'multicolumn_windows', []):
-                            try:
-                                win.set_sync_enabled(True)
-                                win.select_node_by_path(path)
-                            except Exception as e:
-                                print(f"Error syncing multicolumn window: {e}")
-                except Exception as e:
-                    print(f"Error syncing on enable: {e}")
-        
-        self.toggle_sync_action.toggled.connect(_on_sync_toggled)
-        
-        # Visibility toggles for syntax categories (moved to status bar)
-        
-        # 1) Hide angle bracket symbols '<' and '>'
-        self.toggle_symbols_action = QAction("Hide <> Symbols", self)
-        self.toggle_symbols_action.setCheckable(True)
-        self.toggle_symbols_action.setChecked(False)
-        self.toggle_symbols_action.setToolTip("Toggle visibility of angle bracket symbols by coloring them with the editor background")
-        
-        def _on_symbols_toggled(checked: bool):
-            """When toggled, set XmlHighlighter to hide/show angle bracket symbols by using background color"""
-            # Update button state
-            self._update_button_state('symbols', checked)
-            
-            if hasattr(self, 'xml_editor'):
-                if hasattr(self.xml_editor, 'set_visibility_options'):
-                    # Update visibility via QScintilla method
-                    # We need to get current states of other flags
-                    hide_tgs = self._read_flag('hide_tags', False)
-                    hide_vals = self._read_flag('hide_values', False)
-                    self.xml_editor.set_visibility_options(
-                        hide_symbols=checked,
-                        hide_tags=hide_tgs,
-                        hide_values=hide_vals
-                    )
-                elif hasattr(self.xml_editor, 'highlighter') and self.xml_editor.highlighter:
-                    # Legacy update highlighter visibility option for symbols
-                    self.xml_editor.highlighter.set_visibility_options(hide_symbols=checked)
-                
-                # Reflect state in status bar for clarity
-                if hasattr(self, 'status_label') and self.status_label:
-                    self.status_label.setText(f"<> symbols {'hidden' if checked else 'visible'}")
-                # Refresh compact flags indicator
-                try:
-                    self._update_flags_indicator()
-                except Exception:
-                    pass
-                # Persist
-                try:
-                    self._save_flag('hide_symbols', checked)
-                except Exception:
-                    pass
-        
-        self.toggle_symbols_action.toggled.connect(_on_symbols_toggled)
-        
-        # 2) Hide element tag names
-        self.toggle_tags_action = QAction("Hide Tags", self)
-        self.toggle_tags_action.setCheckable(True)
-        self.toggle_tags_action.setChecked(False)
-        self.toggle_tags_action.setToolTip("Toggle visibility of element tag names by coloring them with the editor background")
-        
-        def _on_tags_toggled(checked: bool):
-            """When toggled, set XmlHighlighter to hide/show element tag names by using background color"""
-            # Update button state
-            self._update_button_state('tags', checked)
-            
-            if hasattr(self, 'xml_editor'):
-                if hasattr(self.xml_editor, 'set_visibility_options'):
-                    # Update visibility via QScintilla method
-                    hide_syms = self._read_flag('hide_symbols', False)
-                    hide_vals = self._read_flag('hide_values', False)
-                    self.xml_editor.set_visibility_options(
-                        hide_symbols=hide_syms,
-                        hide_tags=checked,
-                        hide_values=hide_vals
-                    )
-                elif hasattr(self.xml_editor, 'highlighter') and self.xml_editor.highlighter:
-                    # Legacy update highlighter visibility option for tags
-                    self.xml_editor.highlighter.set_visibility_options(hide_tags=checked)
-
-                # Reflect state in status bar for clarity
-                if hasattr(self, 'status_label') and self.status_label:
-                    self.status_label.setText(f"Tags {'hidden' if checked else 'visible'}")
-                # Refresh compact flags indicator
-                try:
-                    self._update_flags_indicator()
-                except Exception:
-                    pass
-                # Persist
-                try:
-                    self._save_flag('hide_tags', checked)
-                except Exception:
-                    pass
-        
-        self.toggle_tags_action.toggled.connect(_on_tags_toggled)
-        
-        # 3) Hide attribute values (quoted values, numbers, booleans)
-        self.toggle_values_action = QAction("Hide Values", self)
-        self.toggle_values_action.setCheckable(True)
-        self.toggle_values_action.setChecked(False)
-        self.toggle_values_action.setToolTip("Toggle visibility of attribute values by coloring them with the editor background")
-        
-        def _on_values_toggled(checked: bool):
-            """When toggled, set XmlHighlighter to hide/show attribute values, numbers, and booleans by using background color"""
-            # Update button state
-            self._update_button_state('values', checked)
-            
-            if hasattr(self, 'xml_editor'):
-                if hasattr(self.xml_editor, 'set_visibility_options'):
-                    # Update visibility via QScintilla method
-                    hide_syms = self._read_flag('hide_symbols', False)
-                    hide_tgs = self._read_flag('hide_tags', False)
-                    self.xml_editor.set_visibility_options(
-                        hide_symbols=hide_syms,
-                        hide_tags=hide_tgs,
-                        hide_values=checked
-                    )
-                elif hasattr(self.xml_editor, 'highlighter') and self.xml_editor.highlighter:
-                    # Legacy update highlighter visibility option for values
-                    self.xml_editor.highlighter.set_visibility_options(hide_values=checked)
 
-                # Reflect state in status bar for clarity
-                if hasattr(self, 'status_label') and self.status_label:
-                    self.status_label.setText(f"Values {'hidden' if checked else 'visible'}")
-                # Refresh compact flags indicator
-                try:
-                    self._update_flags_indicator()
-                except Exception:
-                    pass
-                # Persist
-                try:
-                    self._save_flag('hide_values', checked)
-                except Exception:
-                    pass
-        
-        self.toggle_values_action.toggled.connect(_on_values_toggled)
-
-        # 4) Highlight selected element with orange border
-        self.toggle_highlight_action = QAction("Highlight Selection", self)
-        self.toggle_highlight_action.setCheckable(True)
-        self.toggle_highlight_action.setChecked(True)  # Enabled by default
-        self.toggle_highlight_action.setToolTip("Toggle orange border highlighting when clicking tree nodes")
-        
-        def _on_highlight_toggled(checked: bool):
-            """When toggled, enable/disable orange border highlighting for selected elements"""
-            # Update button state
-            self._update_button_state('highlight', checked)
-            
-            self.highlight_enabled = checked
-            
-            # Clear existing highlights if disabled
-            if not checked and hasattr(self, 'xml_editor'):
-                self.xml_editor.setExtraSelections([])
-            
-            # Reflect state in status bar for clarity
-            if hasattr(self, 'status_label') and self.status_label:
-                self.status_label.setText(f"Highlight {'enabled' if checked else 'disabled'}")
-            
-            # Refresh compact flags indicator
-            try:
-                self._update_flags_indicator()
-            except Exception:
-                pass
-            
-            # Persist
-            try:
-                self._save_flag('highlight_enabled', checked)
-            except Exception:
-                pass
-        
-        self.toggle_highlight_action.toggled.connect(_on_highlight_toggled)
-
-        # Tree update on tab switch toggle (moved to status bar)
-        self.update_tree_toggle = QAction("Update Tree on Tab Switch", self)
-        self.update_tree_toggle.setCheckable(True)
-        self.update_tree_toggle.setChecked(False)  # Default: off
-        self.update_tree_toggle.setShortcut("Shift+F11")  # Hotkey: Shift+F11
-
-        def _on_update_tree_toggled(checked: bool):
-            # Update button state
-            self._update_button_state('updtree', checked)
-            
-            self.update_tree_on_tab_switch = checked
-            
-            # Disconnect or reconnect content_changed signal based on toggle state
-            try:
-                if checked:
-                    # Reconnect signal to enable live tree updates
-                    self.xml_editor.content_changed.connect(self.on_content_changed)
-                else:
-                    # Disconnect signal to prevent tree updates on every keystroke
-                    self.xml_editor.content_changed.disconnect(self.on_content_changed)
-            except Exception as e:
-                # Signal might already be connected/disconnected, ignore
-                pass
-            
-            if hasattr(self, 'status_label') and self.status_label:
-                self.status_label.setText(f"Tree update {'enabled' if checked else 'disabled'}")
-            # Keep View menu toggle in sync
-            if hasattr(self, 'toggle_update_tree_view_action'):
-                try:
-                    self.toggle_update_tree_view_action.blockSignals(True)
-                    self.toggle_update_tree_view_action.setChecked(checked)
-                    self.toggle_update_tree_view_action.blockSignals(False)
-                except Exception:
-                    pass
-            # Refresh compact flags indicator
-            try:
-                self._update_flags_indicator()
-            except Exception:
-                pass
-            # Persist
-            try:
-                self._save_flag('update_tree_on_tab_switch', checked)
-            except Exception:
-                pass
-        
-        self.update_tree_toggle.toggled.connect(_on_update_tree_toggled)
-
-        # Hide Leaves toggle for XML tree
-        # toolbar.addSeparator()
-        self.toggle_hide_leaves_action = QAction("Hide Leaves", self)
-        self.toggle_hide_leaves_action.setCheckable(True)
-        self.toggle_hide_leaves_action.setChecked(True)
-
-        def _on_hide_leaves_toggled(checked: bool):
-            try:
-                if hasattr(self, 'xml_tree') and self.xml_tree:
-                    self.xml_tree.set_hide_leaves(checked)
-                if hasattr(self, 'status_label') and self.status_label:
-                    self.status_label.setText(f"Leaf nodes {'hidden' if checked else 'visible'}")
-                # Refresh compact flags indicator
-                try:
-                    self._update_flags_indicator()
-                except Exception:
-                    pass
-                # Persist
-                try:
-                    self._save_flag('hide_leaves', checked)
-                except Exception:
-                    pass
-            except Exception as e:
-                print(f"Hide leaves toggle error: {e}")
-
-        self.toggle_hide_leaves_action.toggled.connect(_on_hide_leaves_toggled)
+        # Status bar toggles, built from one table:
+        # (attribute, text, default checked, tooltip, shortcut, slot)
+        for attr, text, checked, tooltip, shortcut, slot in (
+            ('toggle_sync_action', "Enable Sync", False, None, None, self._on_sync_toggled),
+            # Visibility toggles for syntax categories: each hides its
+            # category by coloring it with the editor background
+            ('toggle_symbols_action', "Hide <> Symbols", False,
+             "Toggle visibility of angle bracket symbols by coloring them with the editor background", None,
+             functools.partial(self._on_visibility_toggled, 'symbols', 'hide_symbols', "<> symbols")),
+            ('toggle_tags_action', "Hide Tags", False,
+             "Toggle visibility of element tag names by coloring them with the editor background", None,
+             functools.partial(self._on_visibility_toggled, 'tags', 'hide_tags', "Tags")),
+            ('toggle_values_action', "Hide Values", False,
+             "Toggle visibility of attribute values by coloring them with the editor background", None,
+             functools.partial(self._on_visibility_toggled, 'values', 'hide_values', "Values")),
+            # Highlight selected element with orange border (enabled by default)
+            ('toggle_highlight_action', "Highlight Selection", True,
+             "Toggle orange border highlighting when clicking tree nodes", None, self._on_highlight_toggled),
+            ('update_tree_toggle', "Update Tree on Tab Switch", False, None, "Shift+F11",
+             functools.partial(self._on_update_tree_toggled, 'toggle_update_tree_view_action')),
+            # Hide Leaves toggle for XML tree
+            ('toggle_hide_leaves_action', "Hide Leaves", True, None, None, self._on_hide_leaves_toggled),
+        ):
+            action = QAction(text, self)
+            action.setCheckable(True)
+            action.setChecked(checked)
+            if tooltip:
+                action.setToolTip(tooltip)
+            if shortcut:
+                action.setShortcut(shortcut)
+            action.toggled.connect(slot)
+            setattr(self, attr, action)
         # Moved to status bar
         # toolbar.addAction(self.toggle_hide_leaves_action)
     
@@ -3939,6 +4338,9 @@ class MainWindow(QMainWindow):
             if not hasattr(self, 'language_combo'):
                 return
             name = self.language_combo.itemText(index) if index >= 0 else 'XML'
+            if name == self._current_language_name:
+                return
+            self._current_language_name = name
             # Persist selection
             try:
                 s = self._get_settings()
@@ -4116,7 +4518,7 @@ class MainWindow(QMainWindow):
                 
                 # Apply changes
                 line, index = self.xml_editor.getCursorPosition()
-                self.xml_editor.set_content(new_full_content)
+                self.xml_editor.replace_document_text(new_full_content)
                 self.xml_editor.setCursorPosition(line, index)
                 
                 self.status_bar.showMessage(f"Updated definition for {content}", 3000)
@@ -4271,6 +4673,21 @@ class MainWindow(QMainWindow):
         except Exception as e:
             print(f"Error applying highlighter settings: {e}")
     
+    def _dark_theme_value(self) -> bool:
+        """Persisted theme, read once and then tracked by set_dark_theme/set_light_theme"""
+        if XmlEditorWidget.dark_theme_default is None:
+            XmlEditorWidget.dark_theme_default = self._read_flag('dark_theme', True)
+        return XmlEditorWidget.dark_theme_default
+
+    def _apply_breadcrumb_style(self, dark: bool):
+        """Style the breadcrumb for the theme; skipped when it already has that style"""
+        label = getattr(self, 'breadcrumb_label', None)
+        if label is None:
+            return
+        style = _BREADCRUMB_STYLE_DARK if dark else _BREADCRUMB_STYLE_LIGHT
+        if label.styleSheet() != style:
+            label.setStyleSheet(style)
+
     def _create_central_widget(self):
         """Create central widget with splitter layout and tabbed MDI"""
         central_widget = QWidget()
@@ -4286,15 +4703,8 @@ class MainWindow(QMainWindow):
         
         # Breadcrumb widget (hidden by default)
         self.breadcrumb_label = QLabel("/")
-        self.breadcrumb_label.setStyleSheet("""
-            QLabel {
-                background-color: #f0f0f0;
-                padding: 2px;
-                border: 1px solid #ccc;
-                font-family: monospace;
-                font-size: 10px;
-            }
-        """)
+        # Style for the persisted theme, so applying that theme at startup is a no-op here
+        self._apply_breadcrumb_style(self._dark_theme_value())
         self.breadcrumb_label.setMaximumHeight(20)  # Reduced from 25 to 20
         self.breadcrumb_label.setVisible(False)  # Hidden by default
         main_layout.addWidget(self.breadcrumb_label)
@@ -4466,19 +4876,40 @@ class MainWindow(QMainWindow):
         main_layout.addWidget(main_splitter)
         central_widget.setLayout(main_layout)
 
-        # Dockable bottom panel (hidden by default)
-        self.bottom_panel = BottomPanel()
-        
-        # Connect Favorites navigation signal
-        if hasattr(self.bottom_panel, 'favorites_widget'):
-            self.bottom_panel.favorites_widget.navigate_requested.connect(self.goto_line)
-            
-        self.bottom_dock = QDockWidget("", self)  # Empty title to save vertical space
-        self.bottom_dock.setObjectName("BottomPanelDock")
-        self.bottom_dock.setWidget(self.bottom_panel)
-        self.bottom_dock.setAllowedAreas(Qt.DockWidgetArea.BottomDockWidgetArea)
-        self.addDockWidget(Qt.DockWidgetArea.BottomDockWidgetArea, self.bottom_dock)
-        self.bottom_dock.setVisible(False)
+        # Dockable bottom panel (hidden by default); built on first use
+        self._bottom_panel = None
+        self._bottom_dock = None
+
+    def _ensure_bottom_panel(self):
+        """Create the bottom panel and its dock the first time either is needed"""
+        if self._bottom_dock is not None:
+            return
+        self._bottom_panel = BottomPanel()
+        self._bottom_panel.favorites_widget.navigate_requested.connect(self.goto_line)
+        self._bottom_panel.favorites_widget.current_file_path = self.current_file
+        # Find results double-click → navigate to match
+        self._bottom_panel.find_results.itemDoubleClicked.connect(self._on_find_result_double_clicked)
+        # Bookmarks list double-click → navigate to line
+        self._bottom_panel.bookmark_list.itemDoubleClicked.connect(self._on_bookmark_item_double_clicked)
+
+        self._bottom_dock = QDockWidget("", self)  # Empty title to save vertical space
+        self._bottom_dock.setObjectName("BottomPanelDock")
+        self._bottom_dock.setWidget(self._bottom_panel)
+        self._bottom_dock.setAllowedAreas(Qt.DockWidgetArea.BottomDockWidgetArea)
+        self.addDockWidget(Qt.DockWidgetArea.BottomDockWidgetArea, self._bottom_dock)
+        self._bottom_dock.setVisible(False)
+
+    @property
+    def bottom_panel(self):
+        """Bottom panel tabs, created on first access"""
+        self._ensure_bottom_panel()
+        return self._bottom_panel
+
+    @property
+    def bottom_dock(self):
+        """Dock hosting the bottom panel, created on first access"""
+        self._ensure_bottom_panel()
+        return self._bottom_dock
     
     def _create_status_bar(self):
         """Create status bar"""
@@ -4490,7 +4921,9 @@ class MainWindow(QMainWindow):
         bg_color = random.choice(colors)
         
         # Set background for less contrast and reduce height by 1/3
-        self.status_bar.setStyleSheet(f"QStatusBar {{ background-color: {bg_color}; color: #CCCCCC; max-height: 24px; padding: 0px; margin: 0px; }}")
+        self.status_bar.setStyleSheet(
+            f"QStatusBar {{ background-color: {bg_color}; color: #CCCCCC; max-height: 24px; padding: 0px; margin: 0px; }}"
+            + _STATUS_BAR_CHILD_STYLE)
         self.status_bar.setMaximumHeight(24)
         self.status_bar.setContentsMargins(0, 0, 0, 0)
         
@@ -4501,7 +4934,8 @@ class MainWindow(QMainWindow):
         def _add_flag_button(layout, action, text=None, button_key=None):
             btn = QToolButton()
             btn.setAutoRaise(True)
-            btn.setStyleSheet("font-size: 9px; max-height: 22px; padding: 1px 3px; margin: 0px;")
+            # Styled by _STATUS_BAR_CHILD_STYLE through the "active" property
+            btn.setProperty("active", action.isChecked())
             btn.setMaximumHeight(22)
             btn.setContentsMargins(0, 0, 0, 0)
             if text:
@@ -4519,7 +4953,6 @@ class MainWindow(QMainWindow):
         
         # Add status widgets with reduced font size (1/3 smaller)
         self.status_label = QLabel("Ready")
-        self.status_label.setStyleSheet("font-size: 9px; padding: 0px; margin: 0px;")
         self.status_label.setContentsMargins(0, 0, 0, 0)
         self.status_bar.addWidget(self.status_label)
         
@@ -4546,37 +4979,30 @@ class MainWindow(QMainWindow):
             print(f"Left flags bar init error: {e}")
 
         sep1 = QLabel("|")
-        sep1.setStyleSheet("font-size: 9px; padding: 0px; margin: 0px;")
         sep1.setContentsMargins(0, 0, 0, 0)
         self.status_bar.addPermanentWidget(sep1)
         
         self.line_label = QLabel("Ln: 1, Col: 1")
-        self.line_label.setStyleSheet("font-size: 9px; padding: 0px; margin: 0px;")
         self.line_label.setContentsMargins(0, 0, 0, 0)
         self.status_bar.addPermanentWidget(self.line_label)
         
         sep2 = QLabel("|")
-        sep2.setStyleSheet("font-size: 9px; padding: 0px; margin: 0px;")
         sep2.setContentsMargins(0, 0, 0, 0)
         self.status_bar.addPermanentWidget(sep2)
         
         self.encoding_label = QLabel("UTF-8")
-        self.encoding_label.setStyleSheet("font-size: 9px; padding: 0px; margin: 0px;")
         self.encoding_label.setContentsMargins(0, 0, 0, 0)
         self.status_bar.addPermanentWidget(self.encoding_label)
 
         # Language selector (moved from toolbar)
         try:
             sep3 = QLabel("|")
-            sep3.setStyleSheet("font-size: 9px; padding: 0px; margin: 0px;")
             sep3.setContentsMargins(0, 0, 0, 0)
             self.status_bar.addPermanentWidget(sep3)
             lang_label = QLabel("Lang:")
-            lang_label.setStyleSheet("font-size: 9px; padding: 0px; margin: 0px;")
             lang_label.setContentsMargins(0, 0, 0, 0)
             self.status_bar.addPermanentWidget(lang_label)
             self.language_combo = QComboBox()
-            self.language_combo.setStyleSheet("font-size: 9px; max-height: 22px; padding: 0px; margin: 0px;")
             self.language_combo.setMaximumHeight(22)
             self.language_combo.setContentsMargins(0, 0, 0, 0)
             self.language_combo.setToolTip("Select syntax language for editor")
@@ -4597,7 +5023,6 @@ class MainWindow(QMainWindow):
         # Compact interactive flag bar (moved from toolbar)
         try:
             sep4 = QLabel("|")
-            sep4.setStyleSheet("font-size: 9px; padding: 0px; margin: 0px;")
             sep4.setContentsMargins(0, 0, 0, 0)
             self.status_bar.addPermanentWidget(sep4)
             flags_bar = QWidget()
@@ -4629,8 +5054,15 @@ class MainWindow(QMainWindow):
         # Removed duplicate rightmost text indicator to avoid redundancy
 
     def _update_flags_indicator(self):
+        """Schedule a refresh of the compact flags string in the status bar"""
+        self._flags_indicator_timer.start()
+
+    def _refresh_flags_indicator(self):
+        """Update compact flags string in status bar"""
+        flags_label = getattr(self, 'flags_label', None)
+        if not flags_label:
+            return
         try:
-            #"""Update compact flags string in status bar"""
             parts = []
             # Spartan Mode
             if hasattr(self, 'spartan_mode_action') and self.spartan_mode_action.isChecked():
@@ -4658,8 +5090,7 @@ class MainWindow(QMainWindow):
             if hasattr(self, 'toggle_hide_leaves_action'):
                 parts.append(f"Leaves:{'hide' if self.toggle_hide_leaves_action.isChecked() else 'show'}")
             # Set compact string
-            if hasattr(self, 'flags_label') and self.flags_label:
-                self.flags_label.setText(" ".join(parts))
+            flags_label.setText(" ".join(parts))
         except Exception as e:
             print(f"Flags indicator update error: {e}")
 
@@ -4669,20 +5100,30 @@ class MainWindow(QMainWindow):
             return
         
         btn = self.status_buttons[button_key]
-        if is_active:
-            # Active state: eye-safe teal/cyan background instead of bright green
-            btn.setStyleSheet("QToolButton { background-color: #5B9AA0; color: white; border: 1px solid #4A8A90; font-size: 9px; max-height: 22px; padding: 1px 3px; margin: 0px; }")
-        else:
-            # Inactive state: default appearance with proper sizing
-            btn.setStyleSheet("font-size: 9px; max-height: 22px; padding: 1px 3px; margin: 0px;")
+        is_active = bool(is_active)
+        if btn.property("active") == is_active:
+            return
+        # Flip the property the bar's stylesheet selects on and re-polish just this button
+        btn.setProperty("active", is_active)
+        style = btn.style()
+        style.unpolish(btn)
+        style.polish(btn)
+        btn.update()
 
     def _get_settings(self) -> QSettings:
-        return QSettings("visxml.net", "LotusXmlEditor")
+        """Shared settings object; QSettings instances in one process see each other's writes"""
+        if self._settings_cached is None:
+            self._settings_cached = QSettings("visxml.net", "LotusXmlEditor")
+        return self._settings_cached
+
+    def _debug_print(self, message: str, *args):
+        """Print debug message if debug mode is enabled.
 
-    def _debug_print(self, message: str):
-        """Print debug message if debug mode is enabled"""
+        Extra args are %-formatted into message only when the message is
+        actually printed, so disabled calls skip the formatting work.
+        """
         if getattr(self, 'debug_mode', False):
-            print(message)
+            print(message % args if args else message)
     
     def apply_line_numbers_to_all_editors(self, visible: bool):
         """Apply line number visibility to all editor tabs"""
@@ -4712,139 +5153,200 @@ class MainWindow(QMainWindow):
                             editor.lexer().setDefaultFont(font)
                             editor.lexer().setFont(font)
             
-            # Apply to output tab
-            if hasattr(self, 'bottom_panel') and hasattr(self.bottom_panel, 'output_text'):
-                self.bottom_panel.output_text.setFont(font)
-                self.bottom_panel.output_text.setMarginsFont(font)
+            # Apply to output tab (only if the bottom panel has been built)
+            if getattr(self, '_bottom_panel', None) is not None:
+                self._bottom_panel.output_text.setFont(font)
+                self._bottom_panel.output_text.setMarginsFont(font)
         except Exception as e:
             print(f"Error applying font settings: {e}")
     
-    def _save_flag(self, key: str, value: bool):
-        try:
-            s = self._get_settings()
-            s.setValue(f"flags/{key}", value)
+    def _on_sync_toggled(self, checked: bool):
+        """Handle sync toggled from command bar: set flag, update status, and update tree selection immediately when enabled"""
+        self._update_button_state('sync', checked)
+        self.sync_enabled = checked
+        self._finalize_toggle('sync_enabled', checked, f"Sync {'enabled' if checked else 'disabled'}")
+        if checked:
+            try:
+                line, _ = self.xml_editor.getCursorPosition()
+                current_line = line + 1
+
+                # Update main tree
+                self._sync_tree_to_cursor(current_line)
+                # Compute path for multicolumn windows and propagate
+                path = self._cached_path_for_line(current_line)
+                if path:
+                    for win in getattr(self, 'multicolumn_windows', []):
+                        try:
+                            win.set_sync_enabled(True)
+                            win.select_node_by_path(path)
+                        except Exception as e:
+                            self._debug_print("Error syncing multicolumn window: %s", e)
+            except Exception as e:
+                self._debug_print("Error syncing on enable: %s", e)
+
+    def _on_highlight_toggled(self, checked: bool):
+        """When toggled, enable/disable orange border highlighting for selected elements"""
+        self._update_button_state('highlight', checked)
+        self.highlight_enabled = checked
+        # Clear existing highlights if disabled
+        if not checked and hasattr(self, 'xml_editor'):
+            self.xml_editor.clear_block_highlight()
+        self._finalize_toggle('highlight_enabled', checked,
+                              f"Highlight {'enabled' if checked else 'disabled'}")
+
+    def _on_update_tree_toggled(self, mirror_attr: str, checked: bool):
+        """Enable/disable live tree updates from the status bar or View menu toggle.
+
+        mirror_attr names the other action for the same flag, which is kept
+        in sync without re-emitting.
+        """
+        self._update_button_state('updtree', checked)
+        self.update_tree_on_tab_switch = checked
+
+        # Connect or drop content_changed so keystrokes only feed the tree when enabled
+        self._set_live_tree_updates(checked)
+
+        # Keep the paired toggle in sync
+        mirror = getattr(self, mirror_attr, None)
+        if mirror is not None:
+            self._set_checked_silently(mirror, checked)
+        self._finalize_toggle('update_tree_on_tab_switch', checked,
+                              f"Tree update {'enabled' if checked else 'disabled'}")
+
+    def _on_line_numbers_toggled(self, checked: bool):
+        """Show or hide line numbers in all editors"""
+        self.apply_line_numbers_to_all_editors(checked)
+        if getattr(self, 'status_label', None):
+            self.status_label.setText(f"Line numbers {'shown' if checked else 'hidden'}")
+        self._save_flag('show_line_numbers', checked)
+
+    def _on_code_folding_toggled(self, checked: bool):
+        """Enable or disable code folding in the current editor"""
+        if hasattr(self, 'xml_editor') and self.xml_editor:
+            self.xml_editor.set_code_folding_enabled(checked)
+        if getattr(self, 'status_label', None):
+            self.status_label.setText(f"Code folding {'enabled' if checked else 'disabled'}")
+        self._save_flag('code_folding', checked)
+
+    def _on_hide_leaves_toggled(self, checked: bool):
+        """Show or hide leaf nodes in the XML tree"""
+        if hasattr(self, 'xml_tree') and self.xml_tree:
+            self.xml_tree.set_hide_leaves(checked)
+        self._finalize_toggle('hide_leaves', checked, f"Leaf nodes {'hidden' if checked else 'visible'}")
+
+    def _on_visibility_toggled(self, button_key: str, flag_key: str, label: str, checked: bool):
+        """Apply a hide symbols/tags/values toggle and persist it"""
+        self._update_button_state(button_key, checked)
+        # Persist first: the debounced restyle reads all three flags back
+        self._finalize_toggle(flag_key, checked, f"{label} {'hidden' if checked else 'visible'}")
+        self._visibility_timer.start()
+
+    def _finalize_toggle(self, flag_key: str, checked: bool, status_text: str):
+        """Shared tail of the toggle handlers: status text, flags indicator and persistence"""
+        if getattr(self, 'status_label', None):
+            self.status_label.setText(status_text)
+        self._update_flags_indicator()
+        self._save_flag(flag_key, checked)
+
+    def _on_auto_hide_toggled(self, manager_attr: str, flag_key: str, label: str, checked: bool):
+        """Apply an auto-hide toggle from the View menu and persist it"""
+        try:
+            manager = getattr(self, manager_attr, None)
+            if manager is not None:
+                manager.set_auto_hide_enabled(checked)
+            if hasattr(self, 'status_label') and self.status_label:
+                self.status_label.setText(f"{label} auto-hide {'enabled' if checked else 'disabled'}")
+            self._save_flag(flag_key, checked)
         except Exception as e:
-            print(f"Error saving flag '{key}': {e}")
+            self._debug_print("%s auto-hide toggle error: %s", label, e)
 
-    def _read_flag(self, name: str, default: bool) -> bool:
-        """Helper to read boolean flag from settings"""
+    def _save_flag(self, key: str, value: bool):
+        """Queue a flag for the next settings flush; rapid toggles coalesce into one write"""
+        self._pending_flags[key] = value
+        self._flag_flush_timer.start()
+
+    def _flush_flags(self):
+        """Write all queued flags to settings at once"""
+        self._flag_flush_timer.stop()
+        if not self._pending_flags:
+            return
+        pending, self._pending_flags = self._pending_flags, {}
         try:
             s = self._get_settings()
-            v = s.value(f"flags/{name}")
-            if v is None:
-                return default
-            # QSettings may store as string "true"/"false" or QVariant
-            if isinstance(v, bool):
-                return v
-            if isinstance(v, str):
-                return v.lower() in ("1", "true", "yes", "on")
-            return bool(v)
-        except Exception:
-            return default
-
-    def _load_persisted_flags(self):
-        """Load persisted flags and apply them to actions and UI state."""
-        # Apply to actions without emitting toggled signals
-        # Spartan Mode
-        if hasattr(self, 'spartan_mode_action'):
-            val = self._read_flag('spartan_mode', False)
-            try:
-                self.spartan_mode_action.blockSignals(True)
-                self.spartan_mode_action.setChecked(val)
-                self.spartan_mode_action.blockSignals(False)
-            except Exception:
-                pass
-            self.spartan_mode = val
-            # If enabled, enforce disabled states on other flags
-            if val:
-                # We need to ensure these are OFF regardless of what was just loaded
-                # However, _load_persisted_flags logic is sequential.
-                # If we load spartan mode late, we can override previous loaded values.
-                # Or we can just rely on the toggle handler if we trigger it, but we blocked signals.
-                # So we must manually apply effects here.
-                if hasattr(self, 'toggle_sync_action'):
-                    self.toggle_sync_action.setChecked(False)
-                if hasattr(self, 'toggle_update_tree_view_action'):
-                    self.toggle_update_tree_view_action.setChecked(False)
-                if hasattr(self, 'toggle_highlight_action'):
-                    self.toggle_highlight_action.setChecked(False)
-
-        # Sync
-        if hasattr(self, 'toggle_sync_action'):
-            val = self._read_flag('sync_enabled', False)
-            if getattr(self, 'spartan_mode', False):
-                val = False
-            try:
-                self.toggle_sync_action.blockSignals(True)
-                self.toggle_sync_action.setChecked(val)
-                self.toggle_sync_action.blockSignals(False)
-            except Exception:
-                pass
-            self.sync_enabled = val
-            # Update button state
-            self._update_button_state('sync', val)
-        # Symbols
-        if hasattr(self, 'toggle_symbols_action'):
-            val = self._read_flag('hide_symbols', False)
-            try:
-                self.toggle_symbols_action.blockSignals(True)
-                self.toggle_symbols_action.setChecked(val)
-                self.toggle_symbols_action.blockSignals(False)
-            except Exception:
-                pass
-            if hasattr(self, 'xml_editor') and hasattr(self.xml_editor, 'highlighter') and self.xml_editor.highlighter:
-                self.xml_editor.highlighter.set_visibility_options(hide_symbols=val)
-            # Update button state
-            self._update_button_state('symbols', val)
-        # Tags
-        if hasattr(self, 'toggle_tags_action'):
-            val = self._read_flag('hide_tags', False)
-            try:
-                self.toggle_tags_action.blockSignals(True)
-                self.toggle_tags_action.setChecked(val)
-                self.toggle_tags_action.blockSignals(False)
-            except Exception:
-                pass
-            if hasattr(self, 'xml_editor') and hasattr(self.xml_editor, 'highlighter') and self.xml_editor.highlighter:
-                self.xml_editor.highlighter.set_visibility_options(hide_tags=val)
-            # Update button state
-            self._update_button_state('tags', val)
-        # Values
-        if hasattr(self, 'toggle_values_action'):
-            val = self._read_flag('hide_values', False)
-            try:
-                self.toggle_values_action.blockSignals(True)
-                self.toggle_values_action.setChecked(val)
-                self.toggle_values_action.blockSignals(False)
-            except Exception:
-                pass
-            if hasattr(self, 'xml_editor') and hasattr(self.xml_editor, 'highlighter') and self.xml_editor.highlighter:
-                self.xml_editor.highlighter.set_visibility_options(hide_values=val)
-            # Update button state
-            self._update_button_state('values', val)
-        # Highlight (Node Hilit)
-        if hasattr(self, 'toggle_highlight_action'):
-            val = self._read_flag('highlight_enabled', True)
-            if getattr(self, 'spartan_mode', False):
-                val = False
-            try:
-                self.toggle_highlight_action.blockSignals(True)
-                self.toggle_highlight_action.setChecked(val)
-                self.toggle_highlight_action.blockSignals(False)
-            except Exception:
-                pass
-            self.highlight_enabled = val
-            # Update button state
-            self._update_button_state('highlight', val)
+            for key, value in pending.items():
+                s.setValue(f"flags/{key}", value)
+            s.sync()
+        except Exception as e:
+            self._debug_print("Error saving flags %s: %s", ', '.join(pending), e)
+
+    def _read_flag(self, name: str, default: bool) -> bool:
+        """Helper to read boolean flag from settings"""
+        if name in self._pending_flags:
+            return self._pending_flags[name]
+        try:
+            return _settings_bool(self._get_settings().value(f"flags/{name}"), default)
+        except Exception:
+            return default
+
+    @staticmethod
+    def _set_checked_silently(action, checked: bool):
+        """Set an action's checked state without emitting toggled"""
+        with QSignalBlocker(action):
+            action.setChecked(checked)
+
+    def _load_persisted_flags(self):
+        """Load persisted flags and apply them to actions and UI state."""
+        # Read the whole flags group once; the lookups below are dict hits
+        s = self._get_settings()
+        s.beginGroup("flags")
+        flags = {key: s.value(key) for key in s.childKeys()}
+        s.endGroup()
+        flags.update(self._pending_flags)
+
+        def read_flag(name: str, default: bool) -> bool:
+            return _settings_bool(flags.get(name), default)
+
+        # Apply to actions without emitting toggled signals
+        # Spartan Mode
+        action = getattr(self, 'spartan_mode_action', None)
+        if action is not None:
+            val = read_flag('spartan_mode', False)
+            self._set_checked_silently(action, val)
+            self.spartan_mode = val
+            # If enabled, enforce disabled states on other flags
+            if val:
+                # We need to ensure these are OFF regardless of what was just loaded
+                # However, _load_persisted_flags logic is sequential.
+                # If we load spartan mode late, we can override previous loaded values.
+                # Or we can just rely on the toggle handler if we trigger it, but we blocked signals.
+                # So we must manually apply effects here.
+                for attr in ('toggle_sync_action', 'toggle_update_tree_view_action', 'toggle_highlight_action'):
+                    forced = getattr(self, attr, None)
+                    if forced is not None:
+                        forced.setChecked(False)
+
+        # Status bar toggles: (action, flag, default, button, attribute mirroring it, forced off in spartan mode)
+        spartan = getattr(self, 'spartan_mode', False)
+        for action_attr, flag_key, default, button_key, state_attr, spartan_off in (
+            ('toggle_sync_action', 'sync_enabled', False, 'sync', 'sync_enabled', True),
+            ('toggle_symbols_action', 'hide_symbols', False, 'symbols', None, False),
+            ('toggle_tags_action', 'hide_tags', False, 'tags', None, False),
+            ('toggle_values_action', 'hide_values', False, 'values', None, False),
+            ('toggle_highlight_action', 'highlight_enabled', True, 'highlight', 'highlight_enabled', True),
+        ):
+            action = getattr(self, action_attr, None)
+            if action is None:
+                continue
+            val = False if spartan and spartan_off else read_flag(flag_key, default)
+            self._set_checked_silently(action, val)
+            if state_attr:
+                setattr(self, state_attr, val)
+            self._update_button_state(button_key, val)
         # Friendly labels
-        if hasattr(self, 'toggle_friendly_labels_action'):
-            val = self._read_flag('friendly_labels', True)
-            try:
-                self.toggle_friendly_labels_action.blockSignals(True)
-                self.toggle_friendly_labels_action.setChecked(val)
-                self.toggle_friendly_labels_action.blockSignals(False)
-            except Exception:
-                pass
+        action = getattr(self, 'toggle_friendly_labels_action', None)
+        if action is not None:
+            val = read_flag('friendly_labels', True)
+            self._set_checked_silently(action, val)
             if hasattr(self, 'xml_tree') and self.xml_tree:
                 self.xml_tree.use_friendly_labels = val
                 self.xml_tree.refresh_labels()
@@ -4852,18 +5354,14 @@ class MainWindow(QMainWindow):
             self._update_button_state('friendly', val)
             
         # Code Folding
-        if hasattr(self, 'toggle_code_folding_action'):
-            val = self._read_flag('code_folding', True)
-            try:
-                self.toggle_code_folding_action.blockSignals(True)
-                self.toggle_code_folding_action.setChecked(val)
-                self.toggle_code_folding_action.blockSignals(False)
-            except Exception:
-                pass
+        action = getattr(self, 'toggle_code_folding_action', None)
+        if action is not None:
+            val = read_flag('code_folding', True)
+            self._set_checked_silently(action, val)
             if hasattr(self, 'xml_editor') and self.xml_editor:
                 self.xml_editor.set_code_folding_enabled(val)
         # Show tree header preference
-        show_tree_header = self._read_flag('show_tree_header', True)  # Default: show
+        show_tree_header = read_flag('show_tree_header', True)  # Default: show
         if not show_tree_header:
             # Hide unified tree container if it exists
             if hasattr(self, 'tree_container') and self.tree_container:
@@ -4873,131 +5371,76 @@ class MainWindow(QMainWindow):
                 self.left_panel.hide()
         
         # Update tree on tab switch (both actions reflect)
-        val_upd = self._read_flag('update_tree_on_tab_switch', False)  # Default: off
+        val_upd = read_flag('update_tree_on_tab_switch', False)  # Default: off
         
         # Line numbers
-        show_line_numbers = self._read_flag('show_line_numbers', False)  # Default: off
+        show_line_numbers = read_flag('show_line_numbers', False)  # Default: off
         self.apply_line_numbers_to_all_editors(show_line_numbers)
         # Sync toggle action state
-        if hasattr(self, 'toggle_line_numbers_action'):
-            try:
-                self.toggle_line_numbers_action.blockSignals(True)
-                self.toggle_line_numbers_action.setChecked(show_line_numbers)
-                self.toggle_line_numbers_action.blockSignals(False)
-            except Exception:
-                pass
+        action = getattr(self, 'toggle_line_numbers_action', None)
+        if action is not None:
+            self._set_checked_silently(action, show_line_numbers)
         
         # Auto rebuild tree
-        self.auto_rebuild_tree = self._read_flag('auto_rebuild_tree', True)  # Default: on
+        self.auto_rebuild_tree = read_flag('auto_rebuild_tree', True)  # Default: on
         
         if getattr(self, 'spartan_mode', False):
             val_upd = False
-        if hasattr(self, 'update_tree_toggle'):
-            try:
-                self.update_tree_toggle.blockSignals(True)
-                self.update_tree_toggle.setChecked(val_upd)
-                self.update_tree_toggle.blockSignals(False)
-            except Exception:
-                pass
+        action = getattr(self, 'update_tree_toggle', None)
+        if action is not None:
+            self._set_checked_silently(action, val_upd)
             # Update button state
             self._update_button_state('updtree', val_upd)
-        if hasattr(self, 'toggle_update_tree_view_action'):
-            try:
-                self.toggle_update_tree_view_action.blockSignals(True)
-                self.toggle_update_tree_view_action.setChecked(val_upd)
-                self.toggle_update_tree_view_action.blockSignals(False)
-            except Exception:
-                pass
+        action = getattr(self, 'toggle_update_tree_view_action', None)
+        if action is not None:
+            self._set_checked_silently(action, val_upd)
         self.update_tree_on_tab_switch = val_upd
         # Apply the signal connection state based on loaded setting
-        try:
-            if val_upd:
-                # Ensure signal is connected
-                try:
-                    self.xml_editor.content_changed.connect(self.on_content_changed)
-                except Exception:
-                    pass  # Already connected
-            else:
-                # Ensure signal is disconnected
-                try:
-                    self.xml_editor.content_changed.disconnect(self.on_content_changed)
-                except Exception:
-                    pass  # Already disconnected
-        except Exception:
-            pass
+        self._set_live_tree_updates(val_upd)
         # Hide leaves
         if hasattr(self, 'auto_hide_enabled'):
-            self.auto_hide_enabled = self._read_flag('auto_hide', True)
-        if hasattr(self, 'toggle_hide_leaves_action'):
-            val = self._read_flag('hide_leaves', True)
-            try:
-                self.toggle_hide_leaves_action.blockSignals(True)
-                self.toggle_hide_leaves_action.setChecked(val)
-                self.toggle_hide_leaves_action.blockSignals(False)
-            except Exception:
-                pass
+            self.auto_hide_enabled = read_flag('auto_hide', True)
+        action = getattr(self, 'toggle_hide_leaves_action', None)
+        if action is not None:
+            val = read_flag('hide_leaves', True)
+            self._set_checked_silently(action, val)
             if hasattr(self, 'xml_tree') and self.xml_tree:
                 self.xml_tree.set_hide_leaves(val)
             # Update button state
             self._update_button_state('leaves', val)
         # Breadcrumbs
-        if hasattr(self, 'toggle_breadcrumb_action'):
-            val = self._read_flag('show_breadcrumbs', False)
-            try:
-                self.toggle_breadcrumb_action.blockSignals(True)
-                self.toggle_breadcrumb_action.setChecked(val)
-                self.toggle_breadcrumb_action.blockSignals(False)
-            except Exception:
-                pass
-            try:
+        action = getattr(self, 'toggle_breadcrumb_action', None)
+        if action is not None:
+            val = read_flag('show_breadcrumbs', False)
+            self._set_checked_silently(action, val)
+            if getattr(self, 'breadcrumb_label', None) is not None:
                 self.breadcrumb_label.setVisible(val)
-            except Exception:
-                pass
         # Bottom panel
-        if hasattr(self, 'toggle_bottom_panel_action'):
-            val = self._read_flag('show_bottom_panel', False)
-            try:
-                self.toggle_bottom_panel_action.blockSignals(True)
-                self.toggle_bottom_panel_action.setChecked(val)
-                self.toggle_bottom_panel_action.blockSignals(False)
-            except Exception:
-                pass
-            try:
-                self.bottom_dock.setVisible(val)
-            except Exception:
-                pass
+        action = getattr(self, 'toggle_bottom_panel_action', None)
+        if action is not None:
+            val = read_flag('show_bottom_panel', False)
+            self._set_checked_silently(action, val)
+            if val:
+                self.bottom_dock.setVisible(True)
+            elif self._bottom_dock is not None:
+                self._bottom_dock.setVisible(False)
         # File navigator
-        if hasattr(self, 'toggle_file_navigator_action'):
-            val = self._read_flag('show_file_navigator', True)
-            try:
-                self.toggle_file_navigator_action.blockSignals(True)
-                self.toggle_file_navigator_action.setChecked(val)
-                self.toggle_file_navigator_action.blockSignals(False)
-            except Exception:
-                pass
-            try:
-                self.file_navigator.setVisible(val)
-            except Exception:
-                pass
+        action = getattr(self, 'toggle_file_navigator_action', None)
+        if action is not None:
+            val = read_flag('show_file_navigator', True)
+            self._set_checked_silently(action, val)
+            self.file_navigator.setVisible(val)
             # Sync toolbar toggle if present
-            try:
-                if hasattr(self, 'toggle_file_tree_toolbar_action'):
-                    self.toggle_file_tree_toolbar_action.blockSignals(True)
-                    self.toggle_file_tree_toolbar_action.setChecked(val)
-                    self.toggle_file_tree_toolbar_action.blockSignals(False)
-            except Exception:
-                pass
+            action = getattr(self, 'toggle_file_tree_toolbar_action', None)
+            if action is not None:
+                self._set_checked_silently(action, val)
 
-        # Exchange mode (semi-auto toggle)
-        if hasattr(self, 'exchange_mode_action'):
-            val = self._read_flag('exchange_semi_mode', True)
-            try:
-                self.exchange_mode_action.blockSignals(True)
-                self.exchange_mode_action.setChecked(val)
-                self.exchange_mode_action.blockSignals(False)
-            except Exception:
-                pass
-            self.exchange_mode = 'semi' if val else 'manual'
+        # Exchange mode (semi-auto toggle); the menu action may not exist until first shown
+        val = read_flag('exchange_semi_mode', True)
+        action = getattr(self, 'exchange_mode_action', None)
+        if action is not None:
+            self._set_checked_silently(action, val)
+        self.exchange_mode = 'semi' if val else 'manual'
 
         # Load debounce interval from settings
         try:
@@ -5007,130 +5450,101 @@ class MainWindow(QMainWindow):
             self.tree_update_debounce_interval = 5000
         
         # Load debug mode from settings
-        debug_mode_val = self._read_flag('debug_mode', False)
+        debug_mode_val = read_flag('debug_mode', False)
         self.debug_mode = debug_mode_val
+        XmlEditorWidget.debug_output = debug_mode_val
         
         # Auto-hide preferences
-        toolbar_autohide_val = self._read_flag('toolbar_autohide', True)
-        tree_header_autohide_val = self._read_flag('tree_header_autohide', True)
-        tree_column_header_autohide_val = self._read_flag('tree_column_header_autohide', True)
-        tab_bar_autohide_val = self._read_flag('tab_bar_autohide', True)
-        
-        if hasattr(self, 'toggle_toolbar_autohide_action'):
-            try:
-                self.toggle_toolbar_autohide_action.blockSignals(True)
-                self.toggle_toolbar_autohide_action.setChecked(toolbar_autohide_val)
-                self.toggle_toolbar_autohide_action.blockSignals(False)
-            except Exception:
-                pass
-        
-        if hasattr(self, 'toggle_tree_header_autohide_action'):
-            try:
-                self.toggle_tree_header_autohide_action.blockSignals(True)
-                self.toggle_tree_header_autohide_action.setChecked(tree_header_autohide_val)
-                self.toggle_tree_header_autohide_action.blockSignals(False)
-            except Exception:
-                pass
+        toolbar_autohide_val = read_flag('toolbar_autohide', True)
+        tree_header_autohide_val = read_flag('tree_header_autohide', True)
+        tree_column_header_autohide_val = read_flag('tree_column_header_autohide', True)
+        tab_bar_autohide_val = read_flag('tab_bar_autohide', True)
         
-        if hasattr(self, 'toggle_tree_column_header_autohide_action'):
-            try:
-                self.toggle_tree_column_header_autohide_action.blockSignals(True)
-                self.toggle_tree_column_header_autohide_action.setChecked(tree_column_header_autohide_val)
-                self.toggle_tree_column_header_autohide_action.blockSignals(False)
-            except Exception:
-                pass
+        action = getattr(self, 'toggle_toolbar_autohide_action', None)
+        if action is not None:
+            self._set_checked_silently(action, toolbar_autohide_val)
         
-        if hasattr(self, 'toggle_tab_bar_autohide_action'):
-            try:
-                self.toggle_tab_bar_autohide_action.blockSignals(True)
-                self.toggle_tab_bar_autohide_action.setChecked(tab_bar_autohide_val)
-                self.toggle_tab_bar_autohide_action.blockSignals(False)
-            except Exception:
-                pass
+        action = getattr(self, 'toggle_tree_header_autohide_action', None)
+        if action is not None:
+            self._set_checked_silently(action, tree_header_autohide_val)
         
-        # Apply auto-hide after UI is fully rendered (use QTimer to delay)
-        def apply_autohide():
-            try:
-                self._debug_print(f"DEBUG: Applying auto-hide - toolbar:{toolbar_autohide_val}, tree_header:{tree_header_autohide_val}, tree_column:{tree_column_header_autohide_val}, tab_bar:{tab_bar_autohide_val}")
-                if hasattr(self, 'toolbar_auto_hide'):
-                    self.toolbar_auto_hide.set_auto_hide_enabled(toolbar_autohide_val)
-                    self._debug_print(f"DEBUG: Toolbar auto-hide applied, enabled={self.toolbar_auto_hide.auto_hide_enabled}")
-                if hasattr(self, 'tree_header_auto_hide'):
-                    self.tree_header_auto_hide.set_auto_hide_enabled(tree_header_autohide_val)
-                    self._debug_print(f"DEBUG: Tree header auto-hide applied, enabled={self.tree_header_auto_hide.auto_hide_enabled}")
-                if hasattr(self, 'tree_column_header_auto_hide'):
-                    self.tree_column_header_auto_hide.set_auto_hide_enabled(tree_column_header_autohide_val)
-                    self._debug_print(f"DEBUG: Tree column header auto-hide applied, enabled={self.tree_column_header_auto_hide.auto_hide_enabled}")
-                if hasattr(self, 'tab_bar_auto_hide'):
-                    self.tab_bar_auto_hide.set_auto_hide_enabled(tab_bar_autohide_val)
-                    self._debug_print(f"DEBUG: Tab bar auto-hide applied, enabled={self.tab_bar_auto_hide.auto_hide_enabled}")
-            except Exception as e:
-                self._debug_print(f"DEBUG: Error applying auto-hide: {e}")
-                import traceback
-                traceback.print_exc()
+        action = getattr(self, 'toggle_tree_column_header_autohide_action', None)
+        if action is not None:
+            self._set_checked_silently(action, tree_column_header_autohide_val)
         
-        # Delay application to ensure UI is rendered
-        QTimer.singleShot(100, apply_autohide)
+        action = getattr(self, 'toggle_tab_bar_autohide_action', None)
+        if action is not None:
+            self._set_checked_silently(action, tab_bar_autohide_val)
         
         # Finally, refresh flags indicator
-        try:
-            self._update_flags_indicator()
-        except Exception:
-            pass
+        self._update_flags_indicator()
         
         # Set status_label reference on xml_tree after it's created
         if hasattr(self, 'xml_tree'):
             self.xml_tree.status_label = self.status_label
 
-        # Apply persisted theme AFTER visibility options so they are preserved
+        # Path/line index size limit
         try:
-            is_dark = self._read_flag('dark_theme', True)
-            if is_dark:
-                # Use QTimer to ensure UI is ready before applying theme
-                QTimer.singleShot(0, self.set_dark_theme)
-            else:
-                QTimer.singleShot(0, self.set_light_theme)
+            limit_mb = int(s.value("index/size_limit_mb", 20))
+            if limit_mb > 0:
+                self._index_size_limit = limit_mb * 1024 * 1024
         except Exception:
             pass
 
-        # Reapply visibility options after theme to ensure they take effect
+        # Editor styling, language and auto-hide are not needed for the first
+        # paint; apply them together once the event loop is running
+        QTimer.singleShot(0, functools.partial(self._apply_persisted_deferred, {
+            'toolbar_auto_hide': toolbar_autohide_val,
+            'tree_header_auto_hide': tree_header_autohide_val,
+            'tree_column_header_auto_hide': tree_column_header_autohide_val,
+            'tab_bar_auto_hide': tab_bar_autohide_val,
+        }))
+
+    def _apply_persisted_deferred(self, autohide: dict):
+        """Second half of _load_persisted_flags, run from the event loop.
+
+        autohide maps auto-hide manager attribute names to their restored
+        enabled state.
+        """
+        # Apply the three restored visibility flags in one merged update
+        self._visibility_timer.stop()
+        self._apply_highlighter_settings()
+
+        # Apply persisted theme AFTER visibility options so they are preserved
         try:
-            if hasattr(self, 'xml_editor') and hasattr(self.xml_editor, 'highlighter') and self.xml_editor.highlighter:
-                hide_syms = self._read_flag('hide_symbols', False)
-                hide_tgs = self._read_flag('hide_tags', False)
-                hide_vals = self._read_flag('hide_values', False)
-                self._debug_print(f"DEBUG: Reapplying visibility - symbols:{hide_syms}, tags:{hide_tgs}, values:{hide_vals}")
-                self.xml_editor.highlighter.set_visibility_options(
-                    hide_symbols=hide_syms,
-                    hide_tags=hide_tgs,
-                    hide_values=hide_vals
-                )
-                self._debug_print(f"DEBUG: Highlighter state after reapply - symbols:{self.xml_editor.highlighter.hide_symbols}, tags:{self.xml_editor.highlighter.hide_tags}, values:{self.xml_editor.highlighter.hide_values}")
+            if self._dark_theme_value():
+                self.set_dark_theme()
+            else:
+                self.set_light_theme()
         except Exception as e:
-            print(f"Error reapplying visibility options: {e}")
+            print(f"Error applying persisted theme: {e}")
 
         # Apply persisted language selection and update current editor
         try:
-            s = self._get_settings()
-            name = s.value("language/name")
+            name = self._get_settings().value("language/name")
             if isinstance(name, str) and name:
                 if hasattr(self, 'language_combo') and self.language_combo:
-                    try:
-                        self.language_combo.blockSignals(True)
-                        for i in range(self.language_combo.count()):
-                            if self.language_combo.itemText(i) == name:
-                                self.language_combo.setCurrentIndex(i)
-                                break
-                        self.language_combo.blockSignals(False)
-                    except Exception:
-                        pass
+                    index = self.language_combo.findText(name)
+                    if index >= 0:
+                        with QSignalBlocker(self.language_combo):
+                            self.language_combo.setCurrentIndex(index)
+                        self._current_language_name = name
             if hasattr(self, 'xml_editor') and isinstance(self.xml_editor, XmlEditorWidget):
-                try:
-                    self._apply_selected_language_to_editor(self.xml_editor)
-                except Exception:
-                    pass
+                self._apply_selected_language_to_editor(self.xml_editor)
         except Exception:
             pass
+
+        # Auto-hide managers, now that the UI has been laid out
+        try:
+            for manager_attr, enabled in autohide.items():
+                manager = getattr(self, manager_attr, None)
+                if manager is not None:
+                    manager.set_auto_hide_enabled(enabled)
+                    self._debug_print("DEBUG: %s applied, enabled=%s", manager_attr, manager.auto_hide_enabled)
+        except Exception as e:
+            self._debug_print("DEBUG: Error applying auto-hide: %s", e)
+            import traceback
+            traceback.print_exc()
     
     def _create_file_navigator(self):
         """Create dockable file navigator widget"""
@@ -5176,129 +5590,120 @@ class MainWindow(QMainWindow):
                     self.toolbar_hover_zone.hide()  # Hidden initially
             """
             
-            # Find the tree label and level header container
-            tree_label = None
+            # The header restructure, managers and hover zones are created once;
+            # a repeated call leaves the existing ones in place
+            if getattr(self, 'tab_bar_auto_hide', None) is not None:
+                return
+            
+            # The tree panel has no "XML Structure" title label any more (see
+            # _create_central_widget), so only the level header is moved
             left_panel = self.xml_tree.parent()
+            left_layout = left_panel.layout() if left_panel else None
             
             if left_panel:
-                for child in left_panel.findChildren(QLabel):
-                    if child.text() == "XML Structure":
-                        tree_label = child
-                        break
-                
-                # Create container for tree header elements (label + level buttons)
-                self.tree_header_widget = QWidget()
-                tree_header_layout = QVBoxLayout()
-                tree_header_layout.setContentsMargins(0, 0, 0, 0)
-                tree_header_layout.setSpacing(0)
-                self.tree_header_widget.setLayout(tree_header_layout)
-                
-                # Move tree label into the tree header widget
-                if tree_label:
-                    parent_layout = tree_label.parent().layout()
-                    if parent_layout:
-                        parent_layout.removeWidget(tree_label)
-                        tree_header_layout.addWidget(tree_label)
-                
-                # Move level header container into the tree header widget
-                if hasattr(self, 'level_header_container'):
-                    parent_layout = self.level_header_container.parent().layout()
-                    if parent_layout:
-                        parent_layout.removeWidget(self.level_header_container)
-                        tree_header_layout.addWidget(self.level_header_container)
-                
-                # Insert tree header widget back into the left panel at the top
-                left_layout = left_panel.layout()
-                if left_layout:
-                    left_layout.insertWidget(0, self.tree_header_widget)
-                
-                # Force layout update to get proper size
-                self.tree_header_widget.updateGeometry()
-                QApplication.processEvents()
-                
-                # Create auto-hide manager for tree header
-                self.tree_header_auto_hide = AutoHideManager(
-                    self.tree_header_widget,
+                # Batch the reparenting below into a single repaint of the panel
+                left_panel.setUpdatesEnabled(False)
+                try:
+                    # Create container for tree header elements (label + level buttons)
+                    self.tree_header_widget = QWidget()
+                    tree_header_layout = QVBoxLayout()
+                    tree_header_layout.setContentsMargins(0, 0, 0, 0)
+                    tree_header_layout.setSpacing(0)
+                    self.tree_header_widget.setLayout(tree_header_layout)
+                    
+                    # Move level header container into the tree header widget
+                    if hasattr(self, 'level_header_container'):
+                        parent_layout = self.level_header_container.parent().layout()
+                        if parent_layout:
+                            parent_layout.removeWidget(self.level_header_container)
+                            tree_header_layout.addWidget(self.level_header_container)
+                    
+                    # Insert tree header widget back into the left panel at the top
+                    if left_layout:
+                        left_layout.insertWidget(0, self.tree_header_widget)
+                finally:
+                    left_panel.setUpdatesEnabled(True)
+            
+            # Tab bar hover zone goes right above the tab widget
+            right_panel = self.tab_widget.parent()
+            right_layout = right_panel.layout() if right_panel else None
+            tab_widget_index = max(right_layout.indexOf(self.tab_widget), 0) if right_layout else 0
+            
+            # (attribute prefix, managed widget, hover zone parent, its layout, insert index)
+            auto_hide_spec = []
+            if left_panel:
+                auto_hide_spec.append(('tree_header', self.tree_header_widget, left_panel, left_layout, 0))
+            auto_hide_spec += [
+                # Tree column header ("Element", "Value"), after the tree header zone and widget
+                ('tree_column_header', self.xml_tree.header(), left_panel, left_layout, 2 if left_panel else 0),
+                # Tab bar (Document 1, etc.)
+                ('tab_bar', self.tab_widget.tabBar(), right_panel, right_layout, tab_widget_index),
+            ]
+            for name, target, host, layout, index in auto_hide_spec:
+                manager = AutoHideManager(
+                    target,
                     hover_zone_height=3,
                     animation_duration=200,
                     hide_delay=500
                 )
-                
+                setattr(self, f'{name}_auto_hide', manager)
+                if host and layout:
+                    hover_zone = manager.create_hover_zone(host)
+                    layout.insertWidget(index, hover_zone)
+                    hover_zone.hide()  # Hidden initially
+                    setattr(self, f'{name}_hover_zone', hover_zone)
+            
+            if left_panel:
                 # Set a reasonable max height for tree header (label + level buttons)
                 # This prevents it from capturing the entire panel height
                 self.tree_header_auto_hide.original_height = 50  # Reasonable height for header elements
-                
-                # Create tree header hover zone at top of tree panel
-                self.tree_header_hover_zone = self.tree_header_auto_hide.create_hover_zone(left_panel)
-                left_layout.insertWidget(0, self.tree_header_hover_zone)
-                self.tree_header_hover_zone.hide()  # Hidden initially
-            
-            # Setup auto-hide for tree column header ("Element", "Value")
-            if hasattr(self, 'xml_tree') and self.xml_tree:
-                tree_column_header = self.xml_tree.header()
-                if tree_column_header:
-                    self.tree_column_header_auto_hide = AutoHideManager(
-                        tree_column_header,
-                        hover_zone_height=3,
-                        animation_duration=200,
-                        hide_delay=500
-                    )
-                    
-                    # Create hover zone for tree column header
-                    if left_panel and left_layout:
-                        self.tree_column_header_hover_zone = self.tree_column_header_auto_hide.create_hover_zone(left_panel)
-                        # Insert after tree header hover zone and tree header widget
-                        insert_index = 2 if hasattr(self, 'tree_header_widget') else 0
-                        left_layout.insertWidget(insert_index, self.tree_column_header_hover_zone)
-                        self.tree_column_header_hover_zone.hide()
-            
-            # Setup auto-hide for tab bar (Document 1, etc.)
-            if hasattr(self, 'tab_widget') and self.tab_widget:
-                tab_bar = self.tab_widget.tabBar()
-                if tab_bar:
-                    self.tab_bar_auto_hide = AutoHideManager(
-                        tab_bar,
-                        hover_zone_height=3,
-                        animation_duration=200,
-                        hide_delay=500
-                    )
-                    
-                    # Create hover zone for tab bar
-                    right_panel = self.tab_widget.parent()
-                    if right_panel:
-                        right_layout = right_panel.layout()
-                        if right_layout:
-                            self.tab_bar_hover_zone = self.tab_bar_auto_hide.create_hover_zone(right_panel)
-                            # Insert before tab widget
-                            tab_widget_index = right_layout.indexOf(self.tab_widget)
-                            if tab_widget_index >= 0:
-                                right_layout.insertWidget(tab_widget_index, self.tab_bar_hover_zone)
-                            else:
-                                right_layout.insertWidget(0, self.tab_bar_hover_zone)
-                            self.tab_bar_hover_zone.hide()
+                # Refine it from the laid-out size once the event loop has run
+                QTimer.singleShot(0, self._finish_tree_header_autohide)
         
         except Exception as e:
             print(f"Auto-hide setup error: {e}")
             import traceback
             traceback.print_exc()
     
+    def _finish_tree_header_autohide(self):
+        """Size the tree header auto-hide from its layout once it has settled"""
+        manager = getattr(self, 'tree_header_auto_hide', None)
+        if manager is None:
+            return
+        height = self.tree_header_widget.sizeHint().height()
+        if height > 0:
+            manager.original_height = height
+
     def _connect_signals(self):
         """Connect signals"""
+        self._bind_editor_signals(self.xml_editor)
+        self.xml_tree.node_selected.connect(self.on_tree_node_selected)
+
+    def _bind_editor_signals(self, editor):
+        """Route editor's content/cursor signals to this window.
+
+        Any editor bound before is released by its stored connection handles,
+        so swapping editors never goes through a failing disconnect().
+        """
+        self._release_editor_signals()
+        self._editor_conns['cursor'] = editor.cursor_position_changed.connect(self.on_cursor_changed)
         # Only connect content_changed if update_tree_on_tab_switch is enabled
         if getattr(self, 'update_tree_on_tab_switch', False):
-            self.xml_editor.content_changed.connect(self.on_content_changed)
-        self.xml_editor.cursor_position_changed.connect(self.on_cursor_changed)
-        self.xml_tree.node_selected.connect(self.on_tree_node_selected)
-        # Find results double-click → navigate to match
-        try:
-            self.bottom_panel.find_results.itemDoubleClicked.connect(self._on_find_result_double_clicked)
-        except Exception:
-            pass
-        # Bookmarks list double-click → navigate to line
-        try:
-            self.bottom_panel.bookmark_list.itemDoubleClicked.connect(self._on_bookmark_item_double_clicked)
-        except Exception:
-            pass
+            self._editor_conns['content'] = editor.content_changed.connect(self.on_content_changed)
+
+    def _release_editor_signals(self, *keys):
+        """Disconnect the tracked editor connections named by keys (all if none given)"""
+        for key in keys or list(self._editor_conns):
+            handle = self._editor_conns.pop(key, None)
+            if handle is not None:
+                QObject.disconnect(handle)
+
+    def _set_live_tree_updates(self, enabled: bool):
+        """Connect or disconnect the current editor's content_changed → on_content_changed"""
+        if not enabled:
+            self._release_editor_signals('content')
+        elif 'content' not in self._editor_conns:
+            self._editor_conns['content'] = self.xml_editor.content_changed.connect(self.on_content_changed)
 
 
 
@@ -5346,6 +5751,8 @@ class MainWindow(QMainWindow):
             editor = self.sender()
             if not isinstance(editor, XmlEditorWidget):
                 return
+            if editor is self.xml_editor:
+                self._update_auto_save_timer()
             
             index = self.tab_widget.indexOf(editor)
             if index == -1:
@@ -5364,28 +5771,27 @@ class MainWindow(QMainWindow):
         except Exception as e:
             print(f"Error updating tab title: {e}")
 
+    def _update_auto_save_timer(self):
+        """Run the auto-save timer only while the current editor is modified"""
+        if self.xml_editor.isModified():
+            if not self.auto_save_timer.isActive():
+                self.auto_save_timer.start()
+        else:
+            self.auto_save_timer.stop()
+
     def _on_tab_changed(self, index: int):
         """Handle tab change: swap current editor reference and optionally update tree"""
         try:
             new_widget = self.tab_widget.widget(index)
             if not isinstance(new_widget, XmlEditorWidget):
                 return
-            # Disconnect old editor signals
-            try:
-                self.xml_editor.content_changed.disconnect(self.on_content_changed)
-            except Exception:
-                pass
-            try:
-                self.xml_editor.cursor_position_changed.disconnect(self.on_cursor_changed)
-            except Exception:
-                pass
-            # Update reference and connect signals
+            # Update reference and move signal connections to the new editor
             self.xml_editor = new_widget
             self.current_file = getattr(self.xml_editor, 'file_path', None)
             self._update_window_title()
+            self._update_auto_save_timer()
             
-            self.xml_editor.content_changed.connect(self.on_content_changed)
-            self.xml_editor.cursor_position_changed.connect(self.on_cursor_changed)
+            self._bind_editor_signals(self.xml_editor)
             # Apply selected language to the new active editor
             try:
                 self._apply_selected_language_to_editor(self.xml_editor)
@@ -5459,7 +5865,7 @@ class MainWindow(QMainWindow):
             
             self.tab_widget.addTab(new_editor, "Document")
             self.xml_editor = new_editor
-            self._connect_signals()
+            self._bind_editor_signals(new_editor)
 
     def _create_editor_tab(self, title: str, content: str):
         """Create a new editor tab with given title and content, return editor and index"""
@@ -5498,7 +5904,7 @@ class MainWindow(QMainWindow):
             text = editor.text()
             pos = editor.get_cursor_char_position()
 
-            ranges = self._compute_enclosing_xml_ranges(text)
+            ranges = self._compute_enclosing_xml_ranges(text, editor)
             if not ranges:
                 return None
             containing = [r for r in ranges if r[1] <= pos <= r[2]]
@@ -5558,7 +5964,7 @@ class MainWindow(QMainWindow):
             pos = editor.get_cursor_char_position()
             
             # Get all enclosing ranges
-            ranges = self._compute_enclosing_xml_ranges(text)
+            ranges = self._compute_enclosing_xml_ranges(text, editor)
             
             # Filter for ranges containing the cursor
             containing = [r for r in ranges if r[1] <= pos <= r[2]]
@@ -5603,54 +6009,32 @@ class MainWindow(QMainWindow):
             if not content:
                 return
 
-            # Regex patterns (same as _compute_enclosing_xml_ranges)
-            comment_pattern = re.compile(r"<!--.*?-->", re.DOTALL)
-            cdata_pattern = re.compile(r"<!\[CDATA\[.*?\]\]>", re.DOTALL)
-            pi_pattern = re.compile(r"<\?.*?\?>", re.DOTALL)
-            doctype_pattern = re.compile(r"<!DOCTYPE.*?>", re.DOTALL)
-            
-            special_spans = []
-            for pat in (comment_pattern, cdata_pattern, pi_pattern, doctype_pattern):
-                for m in pat.finditer(content):
-                    special_spans.append((m.start(), m.end()))
-            
-            tag_pattern = re.compile(r"<(/?)([^\s>/]+)([^>]*)>", re.UNICODE)
-            
-            stack = []  # (tag, start_index, depth)
+            # Unclosed elements per tag name, innermost last: (start_index, depth)
+            open_by_tag = defaultdict(list)
+            open_count = 0
             ranges_to_fold = []
             
-            # Helper to check if pos is in special span
-            def is_special(pos):
-                for s, e in special_spans:
-                    if s <= pos < e:
-                        return True
-                return False
-
-            for m in tag_pattern.finditer(content):
-                if is_special(m.start()):
+            for m in _XML_SCAN_RE.finditer(content):
+                if m.lastgroup:  # comment/CDATA/PI/DOCTYPE span, not a tag
                     continue
                     
-                is_close = m.group(1) == '/'
-                tag = m.group(2)
-                rest = m.group(3) or ''
+                slash, tag, rest = m.group(2, 3, 4)
+                is_close = slash == '/'
                 self_closing = rest.rstrip().endswith('/')
                 
                 if not is_close and not self_closing:
                     # Open tag
-                    depth = len(stack) + 1
-                    stack.append((tag, m.start(), depth))
+                    open_count += 1
+                    open_by_tag[tag].append((m.start(), open_count))
                 elif is_close:
-                    # Close tag
-                    # Try to match with stack
-                    for si in range(len(stack) - 1, -1, -1):
-                        if stack[si][0] == tag:
-                            # Found match
-                            opentag, start_idx, depth = stack.pop(si)
-                            # If this element is at the target level, mark for folding
-                            if depth == level:
-                                end_idx = m.end()
-                                ranges_to_fold.append((start_idx, end_idx))
-                            break
+                    # Close tag: matches the innermost unclosed element of that name
+                    opened = open_by_tag.get(tag)
+                    if opened:
+                        start_idx, depth = opened.pop()
+                        open_count -= 1
+                        # If this element is at the target level, mark for folding
+                        if depth == level:
+                            ranges_to_fold.append((start_idx, m.end()))
             
             if not ranges_to_fold:
                 self.status_label.setText(f"No elements found at level {level}")
@@ -5659,10 +6043,10 @@ class MainWindow(QMainWindow):
             lines_ranges = []
             count = 0
             
-            content = self.xml_editor.text()
+            line_at = _line_number_lookup(content)
             for start_idx, end_idx in ranges_to_fold:
-                start_line = content.count('\n', 0, start_idx) + 1
-                end_line = content.count('\n', 0, end_idx) + 1
+                start_line = line_at(start_idx)
+                end_line = line_at(end_idx)
                 
                 if start_line < end_line:
                     lines_ranges.append((start_line, end_line))
@@ -5681,32 +6065,29 @@ class MainWindow(QMainWindow):
             if not item or not hasattr(item, 'xml_node') or not item.xml_node:
                 return None
             node = item.xml_node
-            content = self.xml_editor.get_content()
-            if not content:
-                return None
             target_line = getattr(node, 'line_number', 0)
             if target_line <= 0:
                 return None
-            # Convert line to an approximate position
-            lines = content.split('\n')
-            if target_line > len(lines):
+            editor = self.xml_editor
+            if target_line > editor.lines():
                 return None
-            start_pos_guess = sum(len(l) + 1 for l in lines[: max(0, target_line - 1)])
-            ranges = self._compute_enclosing_xml_ranges(content)
+            # Line spans only change with the text, so collapsing/expanding more
+            # items of an unchanged document skips reading and rescanning it
+            version, spans = self._range_lines_cache
+            if version != editor.content_version:
+                content = editor.get_content()
+                if not content:
+                    return None
+                line_at = _line_number_lookup(content)
+                spans = [(line_at(r[1]), line_at(r[2]))
+                         for r in self._compute_enclosing_xml_ranges(content, editor)]
+                self._range_lines_cache = (editor.content_version, spans)
             # Find smallest range that contains the line
-            def _pos_to_line(p):
-                return content[:p].count('\n') + 1
-            candidates = []
-            for r in ranges:
-                s_line = _pos_to_line(r[1])
-                e_line = _pos_to_line(r[2])
-                if s_line <= target_line <= e_line:
-                    candidates.append((s_line, e_line))
+            candidates = [sp for sp in spans if sp[0] <= target_line <= sp[1]]
             if not candidates:
                 return None
             # Pick smallest span
-            candidates.sort(key=lambda x: (x[1] - x[0]))
-            return candidates[0]
+            return min(candidates, key=lambda x: (x[1] - x[0]))
         except Exception as e:
             print(f"Tree item range error: {e}")
             return None
@@ -5762,14 +6143,17 @@ class MainWindow(QMainWindow):
                 return
 
             content = editor.get_content()
-            ranges = self._compute_enclosing_xml_ranges(content)
+            ranges = self._compute_enclosing_xml_ranges(content, editor)
             
             ranges_to_fold = []
+            line_at = None
             for tag, start, end in ranges:
                 if tag.startswith("ПослеЗагрузки") or tag.startswith("АлгоритмПослеЗагрузки"):
                     # Convert to lines
-                    start_line = content[:start].count('\n') + 1
-                    end_line = content[:end].count('\n') + 1
+                    if line_at is None:
+                        line_at = _line_number_lookup(content)
+                    start_line = line_at(start)
+                    end_line = line_at(end)
                     # Only fold if it spans multiple lines
                     if start_line < end_line:
                         ranges_to_fold.append((start_line, end_line))
@@ -5781,61 +6165,57 @@ class MainWindow(QMainWindow):
         except Exception as e:
             print(f"Auto-fold error: {e}")
 
-    def _compute_enclosing_xml_ranges(self, text: str):
-        """Compute element ranges using a simple stack-based parser. Returns list of (tag, start, end)."""
+    def _compute_enclosing_xml_ranges(self, text: str, editor):
+        """Compute element ranges using a simple stack-based parser. Returns list of (tag, start, end).
+
+        text must be editor's current content. The result is cached per editor
+        content version and shared between callers, who must not modify it;
+        fold/navigation commands on an unchanged document reuse it instead of rescanning.
+        """
+        cache_key = (id(editor), editor.content_version)
+        cached_key, cached_ranges = self._ranges_cache
+        if cache_key == cached_key:
+            return cached_ranges
         ranges = []
-        stack = []  # list of (tag, start_index)
-        # Handle comments and CDATA and PIs by temporarily removing them to avoid mis-parsing
-        # Record their spans as atomic ranges too
-        comment_pattern = re.compile(r"<!--.*?-->", re.DOTALL)
-        # Regex for C++ style line comments (//) - match contiguous blocks
-        # Match start of line, optional whitespace, //, rest of line, and the newline
-        line_comment_pattern = re.compile(r"(?:^\s*//.*(?:\r?\n|$))+", re.MULTILINE)
-        cdata_pattern = re.compile(r"<!\[CDATA\[.*?\]\]>", re.DOTALL)
-        pi_pattern = re.compile(r"<\?.*?\?>", re.DOTALL)
-        doctype_pattern = re.compile(r"<!DOCTYPE.*?>", re.DOTALL)
+        # Start offsets of unclosed elements per tag name, innermost last
+        open_by_tag = defaultdict(list)
+        # Comments, CDATA, PIs and DOCTYPE come out of the same scan as the tags,
+        # so tags inside them are never seen. Record their spans as atomic ranges too
+        # (tagged "comment" so they might be styled or treated as comments).
         special_spans = []
-        for pat in (comment_pattern, line_comment_pattern, cdata_pattern, pi_pattern, doctype_pattern):
-            for m in pat.finditer(text):
-                # For line comments, we only want to fold if it's more than one line or manually requested
-                # But for now, let's treat any block as a range.
-                # Use "comment" tag so it might be styled or treated as comment
+        # Blocks of // line comments are found separately; tags inside them are skipped.
+        # For now any such block is treated as a range too.
+        line_comment_spans = ([("comment", m.start(), m.end()) for m in _LINE_COMMENT_BLOCK_RE.finditer(text)]
+                              if '//' in text else [])
+        in_line_comment = (_span_containment_test([(s, e) for _, s, e in line_comment_spans])
+                           if line_comment_spans else None)
+        for m in _XML_SCAN_RE.finditer(text):
+            if m.lastgroup:  # "special" is the only named group
                 special_spans.append(("comment", m.start(), m.end()))
-        # Support Unicode tag names (including Cyrillic), namespaces, and punctuation
-        # Tag name: one or more non-space, non-'>' and non'/' characters
-        tag_pattern = re.compile(r"<(/?)([^\s>/]+)([^>]*)>", re.UNICODE)
-        i = 0
-        for m in tag_pattern.finditer(text):
-            # Skip special spans region
-            skip = False
-            for _, s, e in special_spans:
-                if m.start() >= s and m.start() < e:
-                    skip = True
-                    break
-            if skip:
                 continue
-            is_close = m.group(1) == '/'
-            tag = m.group(2)
-            rest = m.group(3) or ''
+            if in_line_comment is not None and in_line_comment(m.start()):
+                continue
+            slash, tag, rest = m.group(2, 3, 4)
+            is_close = slash == '/'
             full_end = m.end()
             # Detect self-closing tags like <tag .../>
             self_closing = rest.rstrip().endswith('/')
             if not is_close and not self_closing:
-                stack.append((tag, m.start()))
+                open_by_tag[tag].append(m.start())
             elif is_close:
-                # pop matching tag
-                for si in range(len(stack) - 1, -1, -1):
-                    if stack[si][0] == tag:
-                        open_tag, start_idx = stack.pop(si)
-                        ranges.append((tag, start_idx, full_end))
-                        break
+                # Close the innermost unclosed element of that name
+                opened = open_by_tag.get(tag)
+                if opened:
+                    ranges.append((tag, opened.pop(), full_end))
             else:
                 # self-closing element
                 ranges.append((tag, m.start(), full_end))
         # Add special spans as ranges
         ranges.extend(special_spans)
+        ranges.extend(line_comment_spans)
         # Sort by span size (smallest first) for deepest-first selection
         ranges.sort(key=lambda r: (r[2] - r[1]))
+        self._ranges_cache = (cache_key, ranges)
         return ranges
 
     def _get_node_range(self, node):
@@ -5846,21 +6226,15 @@ class MainWindow(QMainWindow):
         editor = self.xml_editor
         text = editor.text()
 
-        ranges = self._compute_enclosing_xml_ranges(text)
+        ranges = self._compute_enclosing_xml_ranges(text, editor)
         
         # Find range that starts at the node's line
         # node.line_number is 1-based
         target_line_idx = node.line_number - 1
         
-        candidates = []
-        
-        for r in ranges:
-            tag, start, end = r
-            # Map char start position to line index
-            # Optimization: use count which is fast in C-implemented python strings
-            line_idx = text.count('\n', 0, start)
-            if line_idx == target_line_idx:
-                candidates.append(r)
+        # Ranges opening on that line, mapped through one newline index
+        line_at = _line_number_lookup(text)
+        candidates = [r for r in ranges if line_at(r[1]) - 1 == target_line_idx]
         
         if not candidates:
             return None
@@ -5994,7 +6368,7 @@ class MainWindow(QMainWindow):
 
 
         # Compute containing ranges at cursor and sort deepest->root
-        ranges = self._compute_enclosing_xml_ranges(text)
+        ranges = self._compute_enclosing_xml_ranges(text, editor)
         containing_sorted = sorted([r for r in ranges if r[1] <= pos <= r[2]], key=lambda r: (r[2] - r[1]))
         if not containing_sorted:
             # Fallback: select the nearest XML element range to the cursor
@@ -6126,7 +6500,7 @@ class MainWindow(QMainWindow):
         pos = editor.get_cursor_char_position()
              
         # Find TABREF comment around cursor
-        pattern = re.compile(r"<!--\s*TABREF:\s*([A-Za-z0-9_\-]+)\s*-->")
+        pattern = _TABREF_RE
         # Search a window around the cursor to find the comment boundaries
         start_search = max(0, pos - 200)
         end_search = min(len(text), pos + 200)
@@ -6195,7 +6569,7 @@ class MainWindow(QMainWindow):
         
         # Clear recent files list when creating a new file
         # This ensures that closing the app after "New File" doesn't reopen the previous file
-        self.recent_files = []
+        self.recent_files.clear()
         self._save_recent_files()
     
     def open_from_ftp(self):
@@ -6318,8 +6692,8 @@ class MainWindow(QMainWindow):
                     content = self._read_file_robust(file_path)
                     
                     # Update splash for tree building phase
+                    # showMessage() repaints the already visible splash itself
                     splash.show_message(f"Building tree structure...")
-                    QApplication.processEvents()
                 else:
                     # Read small files using robust reader too (to handle encodings)
                     content = self._read_file_robust(file_path)
@@ -6339,8 +6713,9 @@ class MainWindow(QMainWindow):
                         splash.close()
                         splash = None
                     
+                    # No processEvents() needed: the singleShot below returns to the event
+                    # loop first, which paints the status text
                     self.status_label.setText(f"File loaded. Building tree in background...")
-                    QApplication.processEvents()
                     
                     # Defer tree building to allow UI to be responsive
                     # Optimization: Call populate_tree directly with file_path to use lxml fast path
@@ -6425,8 +6800,7 @@ class MainWindow(QMainWindow):
                     self.tab_widget.setTabToolTip(idx, new_path)
             
             # Update recent files
-            if old_path in self.recent_files:
-                self.recent_files.remove(old_path)
+            self.recent_files.pop(old_path, None)
             self._add_to_recent_files(new_path) # This saves and updates menu
             
             self.status_label.setText(f"File renamed to: {new_path}")
@@ -6503,7 +6877,7 @@ class MainWindow(QMainWindow):
                 selected_arcname = xml_files[0]
             else:
                 # Load default preference
-                settings = QSettings("visxml.net", "LotusXmlEditor")
+                settings = self._get_settings()
                 default_pattern = settings.value("zip_default_file_pattern", "ExchangeRules.xml")
                 
                 default_index = 0
@@ -6592,7 +6966,7 @@ class MainWindow(QMainWindow):
         content = self.xml_editor.get_content()
         if hasattr(self, 'tab_link_map') and self.tab_link_map:
             try:
-                pattern = re.compile(r"<!--\s*TABREF:\s*([A-Za-z0-9_\-]+)\s*-->")
+                pattern = _TABREF_RE
                 def replace_link(match):
                     link_id = match.group(1)
                     if link_id in self.tab_link_map:
@@ -6861,35 +7235,22 @@ class MainWindow(QMainWindow):
             new_content = content
 
             if use_regex:
-                flags = re.MULTILINE
-                if not case_sensitive:
-                    flags |= re.IGNORECASE
-                pattern_text = find_text
-                if whole_word:
-                    pattern_text = fr"\b{pattern_text}\b"
                 try:
-                    pattern = re.compile(pattern_text, flags)
+                    pattern = _compile_search_pattern(find_text, case_sensitive, whole_word, True, True)
                     new_content, replaced_count = pattern.subn(replace_text, content)
                 except re.error as e:
                     QMessageBox.critical(self, "Regex Error", f"Invalid regex: {e}")
                     return
+            elif case_sensitive and not whole_word:
+                replaced_count = content.count(find_text)
+                new_content = content.replace(find_text, replace_text)
             else:
-                # Non-regex path
-                if whole_word:
-                    flags = 0 if case_sensitive else re.IGNORECASE
-                    pattern = re.compile(fr"\b{re.escape(find_text)}\b", flags)
-                    new_content, replaced_count = pattern.subn(replace_text, content)
-                else:
-                    if case_sensitive:
-                        replaced_count = content.count(find_text)
-                        new_content = content.replace(find_text, replace_text)
-                    else:
-                        # Case-insensitive replace using regex
-                        pattern = re.compile(re.escape(find_text), re.IGNORECASE)
-                        new_content, replaced_count = pattern.subn(replace_text, content)
+                # Whole-word or case-insensitive literal replace using an escaped pattern
+                pattern = _compile_search_pattern(find_text, case_sensitive, whole_word)
+                new_content, replaced_count = pattern.subn(replace_text, content)
 
             if replaced_count > 0:
-                self.xml_editor.setText(new_content)
+                self.xml_editor.replace_document_text(new_content)
                 try:
                     self.status_label.setText(f"Replaced {replaced_count} occurrence(s)")
                 except Exception:
@@ -6927,6 +7288,8 @@ class MainWindow(QMainWindow):
     def show_settings_dialog(self):
         """Show settings dialog"""
         try:
+            # The dialog reads and writes flags directly; settle queued writes first
+            self._flush_flags()
             dialog = SettingsDialog(self)
             dialog.exec()
         except Exception as e:
@@ -7107,40 +7470,32 @@ class MainWindow(QMainWindow):
         case_sensitive = params.get('case_sensitive', False)
         whole_word = params.get('whole_word', False)
 
+        # Compile once per query (cached across F3 presses), not once per line
+        pattern = None
+        if use_regex or whole_word:
+            try:
+                pattern = _compile_search_pattern(search_text, case_sensitive, whole_word, use_regex)
+            except re.error as e:
+                QMessageBox.critical(self, "Regex Error", f"Invalid regex: {e}")
+                return
+
         lines = content.split('\n')
         for i, line in enumerate(lines, 1):
             matches = []
-            if use_regex:
-                flags = 0
-                if not case_sensitive:
-                    flags |= re.IGNORECASE
-                pattern_text = search_text
-                if whole_word:
-                    pattern_text = fr"\b{pattern_text}\b"
-                try:
-                    pattern = re.compile(pattern_text, flags)
-                    for m in pattern.finditer(line):
-                        matches.append((m.start(), m.end()))
-                except re.error as e:
-                    QMessageBox.critical(self, "Regex Error", f"Invalid regex: {e}")
-                    return
+            if pattern is not None:
+                for m in pattern.finditer(line):
+                    matches.append((m.start(), m.end()))
             else:
-                # Non-regex path
-                if whole_word:
-                    flags = 0 if case_sensitive else re.IGNORECASE
-                    pattern = re.compile(fr"\b{re.escape(search_text)}\b", flags)
-                    for m in pattern.finditer(line):
-                        matches.append((m.start(), m.end()))
-                else:
-                    src = line if case_sensitive else line.lower()
-                    needle = search_text if case_sensitive else search_text.lower()
-                    start = 0
-                    while True:
-                        pos = src.find(needle, start)
-                        if pos == -1:
-                            break
-                        matches.append((pos, pos + len(search_text)))
-                        start = pos + 1
+                # Plain substring path
+                src = line if case_sensitive else line.lower()
+                needle = search_text if case_sensitive else search_text.lower()
+                start = 0
+                while True:
+                    pos = src.find(needle, start)
+                    if pos == -1:
+                        break
+                    matches.append((pos, pos + len(search_text)))
+                    start = pos + 1
 
             if matches:
                 for (s, e) in matches:
@@ -7268,7 +7623,7 @@ class MainWindow(QMainWindow):
                 return
             
             # Find and select the tree item for current line using path-based approach
-            element_path = self._get_element_path_at_line(content, current_line)
+            element_path = self._cached_path_for_line(current_line)
             if element_path and element_path != "/":
                 tree_item = self._find_tree_item_by_path(element_path)
             else:
@@ -7327,7 +7682,7 @@ class MainWindow(QMainWindow):
         
         try:
             formatted = self.xml_service.format_xml(content)
-            self.xml_editor.set_content(formatted)
+            self.xml_editor.replace_document_text(formatted)
             self.status_label.setText("XML formatted")
             
         except Exception as e:
@@ -7368,7 +7723,7 @@ class MainWindow(QMainWindow):
             if modified:
                 # Update editor with fixed content
                 if hasattr(self, 'xml_editor'):
-                    self.xml_editor.set_content(fixed_content)
+                    self.xml_editor.replace_document_text(fixed_content)
                     self.auto_fold_special_tags()
                 self.status_label.setText("Auto-closed unclosed tags and rebuilt tree")
             else:
@@ -7392,7 +7747,7 @@ class MainWindow(QMainWindow):
             # Reset caches and optionally rebuild index
             try:
                 self.path_line_cache = {}
-                lines_count = len(fixed_content.split('\n')) if fixed_content else 0
+                lines_count = fixed_content.count('\n') + 1 if fixed_content else 0
                 if self.sync_index_enabled and lines_count < 50000:
                     self._build_path_line_index(fixed_content)
             except Exception:
@@ -7694,14 +8049,14 @@ Total size: {stats.total_size} bytes"""
                  self._debug_print("DEBUG: Using direct lxml sourceline support (skipping separate index)")
             else:
                 # Fallback logic for ElementTree
-                lines_count = len(content.split('\n')) if content else 0
+                lines_count = content.count('\n') + 1 if content else 0
                 self.sync_index_enabled = lines_count > 8000
                 self.sync_cache_enabled = lines_count > 8000
-                self.path_line_cache = {}
-                self.path_line_index = {}
                 if self.sync_index_enabled:
-                    self._build_path_line_index(content)
-                    self._debug_print(f"DEBUG: Rebuilt index after content change, entries={len(self.path_line_index)}")
+                    # Rebuilt lazily from the first edited line on the next lookup
+                    if not self.path_line_index:
+                        self._index_dirty_line = 1
+                    self._debug_print("DEBUG: Index will be refreshed on next lookup after content change")
                 else:
                     self._debug_print("DEBUG: Index/cache disabled after content change (small file)")
         except Exception as e:
@@ -7756,8 +8111,7 @@ Total size: {stats.total_size} bytes"""
             self._sync_tree_to_cursor(line)
             # Also propagate selection to multicolumn tree windows, if any
             try:
-                content = self.xml_editor.get_content()
-                path = self._get_element_path_at_line(content, line)
+                path = self._cached_path_for_line(line)
                 if path:
                     for win in getattr(self, 'multicolumn_windows', []):
                         try:
@@ -7857,7 +8211,7 @@ Total size: {stats.total_size} bytes"""
                 return
             
             # Resolve the element path at the given cursor line (index-aware, e.g., Tag[2])
-            element_path = self._get_element_path_at_line(content, line_number)
+            element_path = self._cached_path_for_line(line_number)
             print(f"SYNC: Cursor at line {line_number}, resolved path: '{element_path}'")
             
             if element_path:
@@ -8083,86 +8437,57 @@ Total size: {stats.total_size} bytes"""
             print(f"Error in _find_tree_item_by_path_index_aware: {e}")
         return None
     
+    def _cached_path_for_line(self, line_number: int) -> str:
+        """Element path at line_number in the current editor, memoized per content version"""
+        return self._line_to_path_cache(self.xml_editor.content_version, line_number)
+
+    def _path_for_line(self, content_version: int, line_number: int) -> str:
+        # content_version only keys the cache; the content is read once per version
+        return self._get_element_path_at_line(self.xml_editor.get_content(), line_number)
+
     def _get_element_path_at_line(self, xml_content: str, line_number: int) -> str:
         """Get the proper XPath of the element at the given line number using XML parsing with line numbers"""
-        self._debug_print(f"DEBUG: _get_element_path_at_line called with line_number={line_number}")
+        self._debug_print("DEBUG: _get_element_path_at_line called with line_number=%s", line_number)
         
-        import xml.sax
-        import io
-
-        class PathFinder(xml.sax.ContentHandler):
-            def __init__(self, target_line):
-                self.target_line = target_line
-                self.best_path = ""
-                self.stack = [] # (tag, path, start_line, child_counters)
-                self.locator = None
-                self.found = False
-
-            def setDocumentLocator(self, locator):
-                self.locator = locator
-
-            def startElement(self, name, attrs):
-                if self.found:
-                    return
-
-                start_line = self.locator.getLineNumber()
-                
-                # Calculate path
-                if not self.stack:
-                    # Root element
-                    path = f"/{name}[1]"
-                    child_counters = {}
-                    self.stack.append((name, path, start_line, child_counters))
-                else:
-                    parent_tag, parent_path, parent_start, parent_counters = self.stack[-1]
-                    
-                    # Update parent's child counters
-                    count = parent_counters.get(name, 0) + 1
-                    parent_counters[name] = count
-                    
-                    path = f"{parent_path}/{name}[{count}]"
-                    child_counters = {}
-                    self.stack.append((name, path, start_line, child_counters))
+        import xml.parsers.expat
 
-            def endElement(self, name):
-                if self.found:
-                    return
+        class Found(Exception):
+            """Raised from the end handler to stop parsing at the first match"""
 
-                if not self.stack:
-                    return
+        stack = [("", 0, {})]  # (path, start_line, child_counters) per open element, document first
+        best_path = ""
+        parser = xml.parsers.expat.ParserCreate()
 
-                tag, path, start_line, _ = self.stack.pop()
-                end_line = self.locator.getLineNumber()
+        def start_element(name, attrs):
+            parent_path, _, counters = stack[-1]
+            count = counters.get(name, 0) + 1
+            counters[name] = count
+            stack.append((f"{parent_path}/{name}[{count}]", parser.CurrentLineNumber, {}))
 
-                # Check if this element covers the target line
-                # Note: SAX line numbers are 1-based.
-                if start_line <= self.target_line <= end_line:
-                    # Found a candidate!
-                    # Since we process children before parents (in endElement),
-                    # the first match we hit is the deepest one.
-                    self.best_path = path
-                    self.found = True
+        def end_element(name):
+            nonlocal best_path
+            path, start_line, _ = stack.pop()
+            # Check if this element covers the target line.
+            # Children end before their parents, so the first match is the deepest one.
+            if start_line <= line_number <= parser.CurrentLineNumber:
+                best_path = path
+                raise Found()
 
-        handler = PathFinder(line_number)
-        parser = xml.sax.make_parser()
-        parser.setContentHandler(handler)
-        
+        parser.StartElementHandler = start_element
+        parser.EndElementHandler = end_element
         try:
-            parser.parse(io.StringIO(xml_content))
-        except Exception as e:
-            # If we found the path, we might have stopped parsing early (if we optimized)
-            # But here we parse full to be safe, or we could raise exception to stop
-            if handler.best_path:
-                self._debug_print(f"DEBUG: Resolved path (early exit): {handler.best_path}")
-                return handler.best_path
-            self._debug_print(f"DEBUG: SAX Parsing error: {e}")
+            parser.Parse(xml_content, True)
+        except Found:
+            pass
+        except xml.parsers.expat.ExpatError as e:
+            self._debug_print("DEBUG: XML parsing error: %s", e)
             return ""
             
-        if handler.best_path:
-            self._debug_print(f"DEBUG: Resolved path: {handler.best_path}")
-            return handler.best_path
+        if best_path:
+            self._debug_print("DEBUG: Resolved path: %s", best_path)
+            return best_path
             
-        self._debug_print(f"DEBUG: No element found containing line {line_number}")
+        self._debug_print("DEBUG: No element found containing line %s", line_number)
         return ""
     
     def _build_element_paths(self, element, current_path, element_paths, parent=None):
@@ -8362,8 +8687,8 @@ Total size: {stats.total_size} bytes"""
             # Determine tag and index from path (for column targeting on same line)
             col_pos = None
             try:
-                content = self.xml_editor.get_content()
-                line_text = content.split('\n')[line_number - 1]
+                # Only the target line is needed; avoid splitting the whole document
+                line_text = self.xml_editor.text(line_number - 1)
                 last_part = None
                 if hasattr(xml_node, 'path') and xml_node.path:
                     parts = xml_node.path.split('/')
@@ -8457,8 +8782,7 @@ Total size: {stats.total_size} bytes"""
             line, _ = self.xml_editor.getCursorPosition()
             line += 1
                 
-            content = self.xml_editor.get_content()
-            path = self._get_element_path_at_line(content, line)
+            path = self._cached_path_for_line(line)
             if path:
                 item = self._find_tree_item_by_path(path)
                 if item:
@@ -8796,32 +9120,34 @@ Total size: {stats.total_size} bytes"""
         3) Parent-anchored subtree search
         4) Chunked full-file scan (no 10k cap)
         """
-        self._debug_print(f"DEBUG: _find_element_line_by_path called with path: {element_path}")
+        self._debug_print("DEBUG: _find_element_line_by_path called with path: %s", element_path)
 
         if not element_path or element_path == "/":
-            self._debug_print(f"DEBUG: Returning line 1 for root element")
+            self._debug_print("DEBUG: Returning line 1 for root element")
             return 1  # Root element
 
-        # Cache fast path
+        # Cache fast path (entries at or after the first edited line may be stale)
         if self.sync_cache_enabled and element_path in self.path_line_cache:
             line_cached = self.path_line_cache[element_path]
-            self._debug_print(f"DEBUG: Cache hit for {element_path} -> line {line_cached}")
-            return line_cached
+            dirty = self._path_line_index_watermark()
+            if dirty is None or line_cached < dirty:
+                self._debug_print("DEBUG: Cache hit for %s -> line %s", element_path, line_cached)
+                return line_cached
 
         lines = content.split('\n')
         path_parts = element_path.split('/')[1:]  # Remove leading empty string
 
         if not path_parts:
-            self._debug_print(f"DEBUG: No path parts, returning 0")
+            self._debug_print("DEBUG: No path parts, returning 0")
             return 0
 
-        self._debug_print(f"DEBUG: Processing {len(lines)} lines for path parts: {path_parts}")
+        self._debug_print("DEBUG: Processing %s lines for path parts: %s", len(lines), path_parts)
 
-        # lxml index lookup
-        if self.sync_index_enabled and self._sync_index_available:
-            if element_path in self.path_line_index:
-                line = self.path_line_index[element_path]
-                self._debug_print(f"DEBUG: Index hit for {element_path} -> line {line}")
+        # Path/line index lookup
+        if self.sync_index_enabled:
+            line = self._lookup_path_line_index(content, element_path)
+            if line:
+                self._debug_print("DEBUG: Index hit for %s -> line %s", element_path, line)
                 if self.sync_cache_enabled:
                     self.path_line_cache[element_path] = line
                 return line
@@ -8832,7 +9158,7 @@ Total size: {stats.total_size} bytes"""
         if len(path_parts) > 1:
             parent_path = '/' + '/'.join(path_parts[:-1])
             if self.sync_index_enabled and self._sync_index_available:
-                parent_line = self.path_line_index.get(parent_path, 0)
+                parent_line = self._lookup_path_line_index(content, parent_path)
             if parent_line == 0 and self.sync_cache_enabled:
                 parent_line = self.path_line_cache.get(parent_path, 0)
 
@@ -8855,7 +9181,7 @@ Total size: {stats.total_size} bytes"""
             return expected_tag_name, expected_index, expected_attr_value
 
         if parent_line > 0:
-            self._debug_print(f"DEBUG: Anchored search from parent path {parent_path} at line {parent_line}")
+            self._debug_print("DEBUG: Anchored search from parent path %s at line %s", parent_path, parent_line)
             parent_tag, parent_idx, _ = _parse_part(path_parts[-2])
             depth = 0
             start_index = max(parent_line - 1, 0)
@@ -8879,9 +9205,9 @@ Total size: {stats.total_size} bytes"""
                 # Build ordered list of tag events (open/close) on this line
                 events = []
                 try:
-                    for m in re.finditer(r'</\s*([^\s>]+)\s*>', line_stripped):
+                    for m in _CLOSE_TAG_NAME_RE.finditer(line_stripped):
                         events.append((m.start(), 'close', m.group(1), False))
-                    for m in re.finditer(r'<\s*([^\s>/!?]+)([^>]*)>', line_stripped):
+                    for m in _OPEN_TAG_NAME_RE.finditer(line_stripped):
                         full = m.group(0)
                         tn = m.group(1)
                         self_closing = full.strip().endswith('/>')
@@ -8909,19 +9235,19 @@ Total size: {stats.total_size} bytes"""
                         if tn == exp_tag:
                             if exp_attr and f'Наименование="{exp_attr}"' in line_stripped:
                                 if current_depth == len(relative_parts):
-                                    self._debug_print(f"DEBUG: Anchored match (attr) at line {i}")
+                                    self._debug_print("DEBUG: Anchored match (attr) at line %s", i)
                                     if self.sync_cache_enabled:
                                         self.path_line_cache[element_path] = i
                                     return i
                             elif exp_idx == tag_index:
                                 if current_depth == len(relative_parts):
-                                    self._debug_print(f"DEBUG: Anchored match at line {i}")
+                                    self._debug_print("DEBUG: Anchored match at line %s", i)
                                     if self.sync_cache_enabled:
                                         self.path_line_cache[element_path] = i
                                     return i
                             elif exp_idx == 1 and not exp_attr and tag_index == 1:
                                 if current_depth == len(relative_parts):
-                                    self._debug_print(f"DEBUG: Anchored simple match at line {i}")
+                                    self._debug_print("DEBUG: Anchored simple match at line %s", i)
                                     if self.sync_cache_enabled:
                                         self.path_line_cache[element_path] = i
                                     return i
@@ -8942,9 +9268,9 @@ Total size: {stats.total_size} bytes"""
                 # Build ordered list of tag events (open/close) on this line
                 events = []
                 try:
-                    for m in re.finditer(r'</\s*([^\s>]+)\s*>', line_stripped):
+                    for m in _CLOSE_TAG_NAME_RE.finditer(line_stripped):
                         events.append((m.start(), 'close', m.group(1), False))
-                    for m in re.finditer(r'<\s*([^\s>/!?]+)([^>]*)>', line_stripped):
+                    for m in _OPEN_TAG_NAME_RE.finditer(line_stripped):
                         full = m.group(0)
                         tn = m.group(1)
                         self_closing = full.strip().endswith('/>')
@@ -8972,19 +9298,19 @@ Total size: {stats.total_size} bytes"""
                         if tn == exp_tag:
                             if exp_attr and f'Наименование="{exp_attr}"' in line_stripped:
                                 if current_depth == len(path_parts):
-                                    self._debug_print(f"DEBUG: Found target element by attribute at line {i}")
+                                    self._debug_print("DEBUG: Found target element by attribute at line %s", i)
                                     if self.sync_cache_enabled:
                                         self.path_line_cache[element_path] = i
                                     return i
                             elif exp_idx == tag_index:
                                 if current_depth == len(path_parts):
-                                    self._debug_print(f"DEBUG: Found target element at line {i}")
+                                    self._debug_print("DEBUG: Found target element at line %s", i)
                                     if self.sync_cache_enabled:
                                         self.path_line_cache[element_path] = i
                                     return i
                             elif exp_idx == 1 and not exp_attr and tag_index == 1:
                                 if current_depth == len(path_parts):
-                                    self._debug_print(f"DEBUG: Found target element by simple match at line {i}")
+                                    self._debug_print("DEBUG: Found target element by simple match at line %s", i)
                                     if self.sync_cache_enabled:
                                         self.path_line_cache[element_path] = i
                                     return i
@@ -8992,7 +9318,7 @@ Total size: {stats.total_size} bytes"""
                     if not self_closing:
                         element_stack.append((tn, tag_index))
 
-        self._debug_print(f"DEBUG: Element not found, returning 0")
+        self._debug_print("DEBUG: Element not found, returning 0")
         return 0
     
     def _find_element_end_line(self, content: str, tag_name: str, start_line: int) -> int:
@@ -9015,10 +9341,13 @@ Total size: {stats.total_size} bytes"""
         
         # Track nesting depth
         depth = 0
+        # Compiled once; used for every following line
+        open_tag_re = re.compile(r'<\s*' + re.escape(tag_name) + r'\b[^/>]*(?<!/)>')
+        close_tag_re = re.compile(r'</' + re.escape(tag_name) + r'>')
         
         # Count opening tags on the start line
-        opening_tags = len(re.findall(r'<\s*' + re.escape(tag_name) + r'\b[^/>]*(?<!/)>', start_line_text))
-        closing_tags = len(re.findall(r'</' + re.escape(tag_name) + r'>', start_line_text))
+        opening_tags = len(open_tag_re.findall(start_line_text))
+        closing_tags = len(close_tag_re.findall(start_line_text))
         depth = opening_tags - closing_tags
         
         # Search for closing tag in subsequent lines
@@ -9026,8 +9355,8 @@ Total size: {stats.total_size} bytes"""
             line = lines[i]
             
             # Count opening and closing tags
-            opening_tags = len(re.findall(r'<\s*' + re.escape(tag_name) + r'\b[^/>]*(?<!/)>', line))
-            closing_tags = len(re.findall(r'</' + re.escape(tag_name) + r'>', line))
+            opening_tags = len(open_tag_re.findall(line))
+            closing_tags = len(close_tag_re.findall(line))
             
             depth += opening_tags - closing_tags
             
@@ -9055,17 +9384,7 @@ Total size: {stats.total_size} bytes"""
             
             # QScintilla highlighting using Indicators
             if isinstance(self.xml_editor, QsciScintilla):
-                INDIC_BLOCK = 10 # Custom indicator for block highlight
-                self.xml_editor.clearIndicatorRange(0, 0, self.xml_editor.lines(), self.xml_editor.lineLength(self.xml_editor.lines()-1), INDIC_BLOCK)
-                self.xml_editor.indicatorDefine(QsciScintilla.StraightBoxIndicator, INDIC_BLOCK)
-                self.xml_editor.setIndicatorForegroundColor(QColor(255, 140, 0), INDIC_BLOCK)
-                self.xml_editor.setIndicatorAlpha(INDIC_BLOCK, 60)
-                self.xml_editor.setIndicatorOutlineAlpha(INDIC_BLOCK, 255)
-                self.xml_editor.setIndicatorDrawUnder(True, INDIC_BLOCK)
-                l_start = start_line - 1
-                l_end = end_line - 1
-                len_end = self.xml_editor.lineLength(l_end)
-                self.xml_editor.fillIndicatorRange(l_start, 0, l_end, len_end, INDIC_BLOCK)
+                self.xml_editor.set_block_highlight(start_line - 1, end_line - 1)
                 
                 # Update status bar
                 self.status_label.setText(f"Selected {xml_node.name} at line {start_line} ({line_count} line{'s' if line_count != 1 else ''})")
@@ -9077,9 +9396,12 @@ Total size: {stats.total_size} bytes"""
     
     def _auto_save(self):
         """Auto-save functionality"""
-        if self.current_file and self.xml_editor.get_content().strip():
+        if not self.xml_editor.isModified():
+            self.auto_save_timer.stop()
+            return
+        content = self.xml_editor.get_content()
+        if self.current_file and content.strip():
             try:
-                content = self.xml_editor.get_content()
                 auto_save_path = self.current_file + '.autosave'
                 with open(auto_save_path, 'w', encoding='utf-8') as file:
                     file.write(content)
@@ -9125,7 +9447,7 @@ Total size: {stats.total_size} bytes"""
                 json.dump(self.file_states, f, indent=2)
             
             # Sidecar save (if enabled)
-            settings = QSettings("visxml.net", "LotusXmlEditor")
+            settings = self._get_settings()
             use_sidecar = settings.value("flags/store_settings_in_file_dir", False, type=bool)
             
             if use_sidecar:
@@ -9145,10 +9467,8 @@ Total size: {stats.total_size} bytes"""
     def _capture_editor_state(self, editor):
         """Capture state from an editor widget"""
         try:
-            from PyQt6.QtCore import QSettings
-            
             # Check if feature is enabled
-            settings = QSettings("visxml.net", "LotusXmlEditor")
+            settings = self._get_settings()
             save_cursor = settings.value("flags/save_cursor_position", True, type=bool)
             
             if not save_cursor:
@@ -9200,10 +9520,8 @@ Total size: {stats.total_size} bytes"""
     def _restore_editor_state(self, editor):
         """Restore state to an editor widget"""
         try:
-            from PyQt6.QtCore import QSettings
-            
             # Check if feature is enabled
-            settings = QSettings("visxml.net", "LotusXmlEditor")
+            settings = self._get_settings()
             save_cursor = settings.value("flags/save_cursor_position", True, type=bool)
             
             if not save_cursor:
@@ -9359,9 +9677,9 @@ Total size: {stats.total_size} bytes"""
                         session['tabs'].append(tab_data)
             
             # Save find results
-            if hasattr(self, 'bottom_panel') and hasattr(self.bottom_panel, 'find_results'):
-                for i in range(self.bottom_panel.find_results.count()):
-                    item = self.bottom_panel.find_results.item(i)
+            if self._bottom_panel is not None:
+                for i in range(self._bottom_panel.find_results.count()):
+                    item = self._bottom_panel.find_results.item(i)
                     session['find_results'].append(item.text())
             
             # Save fragment editors
@@ -9435,8 +9753,7 @@ Total size: {stats.total_size} bytes"""
                              self.xml_editor = new_editor
                              self.current_file = None
                              # Connect signals for the new editor
-                             self.xml_editor.content_changed.connect(self.on_content_changed)
-                             self.xml_editor.cursor_position_changed.connect(self.on_cursor_changed)
+                             self._bind_editor_signals(new_editor)
                         
                         # Open file
                         if zip_source:
@@ -9475,7 +9792,7 @@ Total size: {stats.total_size} bytes"""
                         editor.ensureCursorVisible()
                             
                         if 'bookmarks' in tab_data:
-                            bookmarks = {int(k): v for k, v in tab_data['bookmarks'].items()}
+                            bookmarks = BookmarkMap((int(k), v) for k, v in tab_data['bookmarks'].items())
                             editor.bookmarks = bookmarks
                             
                         if 'numbered_bookmarks' in tab_data:
@@ -9545,6 +9862,7 @@ Total size: {stats.total_size} bytes"""
     def closeEvent(self, event):
         """Handle close event"""
         self._save_session()
+        self._flush_flags()
         
         # Clean up auto-save file
         if self.current_file:
@@ -9579,6 +9897,7 @@ Total size: {stats.total_size} bytes"""
     
     def set_dark_theme(self):
         """Apply dark theme"""
+        XmlEditorWidget.dark_theme_default = True
         dark_style = """
         QMainWindow {
             background-color: #1e1e1e;
@@ -9757,16 +10076,7 @@ Total size: {stats.total_size} bytes"""
                     widget.set_dark_theme(True)
         
         # Update breadcrumb label styling
-        if hasattr(self, 'breadcrumb_label'):
-            self.breadcrumb_label.setStyleSheet("""
-                QLabel {
-                    background-color: #2d2d30;
-                    color: #d4d4d4;
-                    padding: 4px 8px;
-                    border: 1px solid #464647;
-                    border-radius: 3px;
-                }
-            """)
+        self._apply_breadcrumb_style(True)
         
         self.status_label.setText("Dark theme enabled")
         # Persist theme selection
@@ -9777,6 +10087,7 @@ Total size: {stats.total_size} bytes"""
     
     def set_light_theme(self):
         """Apply light theme"""
+        XmlEditorWidget.dark_theme_default = False
         light_style = """
         QMainWindow {
             background-color: #f0f0f0;
@@ -9954,16 +10265,7 @@ Total size: {stats.total_size} bytes"""
                     widget.set_dark_theme(False)
         
         # Update breadcrumb label styling for light theme
-        if hasattr(self, 'breadcrumb_label'):
-            self.breadcrumb_label.setStyleSheet("""
-                QLabel {
-                    background-color: #f0f0f0;
-                    color: #000000;
-                    padding: 4px 8px;
-                    border: 1px solid #ccc;
-                    border-radius: 3px;
-                }
-            """)
+        self._apply_breadcrumb_style(False)
         
         self.status_label.setText("Light theme enabled")
         # Persist theme selection
@@ -9986,13 +10288,9 @@ Total size: {stats.total_size} bytes"""
     def toggle_bottom_panel(self):
         """Toggle bottom panel visibility"""
         is_visible = self.toggle_bottom_panel_action.isChecked()
-        try:
+        # Hiding a panel that was never built needs no work
+        if is_visible or self._bottom_dock is not None:
             self.bottom_dock.setVisible(is_visible)
-        except Exception:
-            try:
-                self.bottom_panel.setVisible(is_visible)
-            except Exception:
-                pass
         self.status_label.setText(f"Bottom panel {'shown' if is_visible else 'hidden'}")
         # Persist
         try:
@@ -10006,9 +10304,7 @@ Total size: {stats.total_size} bytes"""
             self.bottom_dock.setVisible(True)
             # Sync the menu action without emitting signals
             if hasattr(self, 'toggle_bottom_panel_action'):
-                self.toggle_bottom_panel_action.blockSignals(True)
-                self.toggle_bottom_panel_action.setChecked(True)
-                self.toggle_bottom_panel_action.blockSignals(False)
+                self._set_checked_silently(self.toggle_bottom_panel_action, True)
             # Switch to specific tab if requested
             if tab_name and hasattr(self, 'bottom_panel'):
                 if tab_name == "bookmarks":
@@ -10354,19 +10650,8 @@ Total size: {stats.total_size} bytes"""
         
         current_line = self.xml_editor.getCursorPosition()[0] + 1
         
-        # Get sorted list of bookmark lines
-        bookmark_lines = sorted(self.bookmarks.keys())
-        
-        # Find next bookmark
-        next_line = None
-        for line in bookmark_lines:
-            if line > current_line:
-                next_line = line
-                break
-        
-        # If no next bookmark, go to first one
-        if next_line is None:
-            next_line = bookmark_lines[0]
+        # Next bookmark, wrapping to the first one
+        next_line = self.bookmarks.next_after(current_line)
         
         self.goto_line(next_line)
         self.status_label.setText(f"Jumped to bookmark at line {next_line}")
@@ -10379,19 +10664,8 @@ Total size: {stats.total_size} bytes"""
         
         current_line = self.xml_editor.getCursorPosition()[0] + 1
         
-        # Get sorted list of bookmark lines
-        bookmark_lines = sorted(self.bookmarks.keys())
-        
-        # Find previous bookmark
-        prev_line = None
-        for line in reversed(bookmark_lines):
-            if line < current_line:
-                prev_line = line
-                break
-        
-        # If no previous bookmark, go to last one
-        if prev_line is None:
-            prev_line = bookmark_lines[-1]
+        # Previous bookmark, wrapping to the last one
+        prev_line = self.bookmarks.previous_before(current_line)
         
         self.goto_line(prev_line)
         self.status_label.setText(f"Jumped to bookmark at line {prev_line}")
@@ -10405,7 +10679,7 @@ Total size: {stats.total_size} bytes"""
                 content_lines = self.xml_editor.get_content().splitlines()
             except Exception:
                 pass
-            for line in sorted(self.bookmarks.keys()):
+            for line in self.bookmarks.lines:
                 line_text = ""
                 try:
                     if 0 <= (line - 1) < len(content_lines):
@@ -10447,7 +10721,7 @@ Total size: {stats.total_size} bytes"""
                 return
             
             # Get XPath for current line
-            xpath = self._get_element_path_at_line(content, line_number)
+            xpath = self._cached_path_for_line(line_number)
             
             if xpath:
                 # Add XPath to Links tab (append new line)
@@ -10546,11 +10820,14 @@ Total size: {stats.total_size} bytes"""
             config_path = os.path.join(os.path.expanduser("~"), ".visxml_recent")
             if os.path.exists(config_path):
                 with open(config_path, 'r', encoding='utf-8') as f:
-                    self.recent_files = [line.strip() for line in f.readlines() if line.strip()]
-                    # Remove non-existent files
-                    self.recent_files = [f for f in self.recent_files if os.path.exists(f)]
+                    paths = [line.strip() for line in f.readlines() if line.strip()]
+                # File is newest first; skip non-existent files and stale duplicates
+                self.recent_files.clear()
+                for file_path in reversed(paths):
+                    if os.path.exists(file_path):
+                        self._touch_recent_file(file_path)
         except Exception:
-            self.recent_files = []
+            self.recent_files.clear()
         
         # Update menu after loading
         self._update_recent_files_menu()
@@ -10560,17 +10837,21 @@ Total size: {stats.total_size} bytes"""
         try:
             config_path = os.path.join(os.path.expanduser("~"), ".visxml_recent")
             with open(config_path, 'w', encoding='utf-8') as f:
-                for file_path in self.recent_files[:self.max_recent_files]:
+                for file_path in reversed(self.recent_files):
                     f.write(file_path + '\n')
         except Exception:
             pass
     
+    def _touch_recent_file(self, file_path):
+        """Move file_path to the most recent end of the LRU, evicting the oldest entries"""
+        self.recent_files.pop(file_path, None)
+        self.recent_files[file_path] = None
+        while len(self.recent_files) > self.max_recent_files:
+            self.recent_files.popitem(last=False)
+
     def _add_to_recent_files(self, file_path):
         """Add file to recent files list"""
-        if file_path in self.recent_files:
-            self.recent_files.remove(file_path)
-        self.recent_files.insert(0, file_path)
-        self.recent_files = self.recent_files[:self.max_recent_files]
+        self._touch_recent_file(file_path)
         self._save_recent_files()
         self._update_recent_files_menu()
     
@@ -10579,30 +10860,23 @@ Total size: {stats.total_size} bytes"""
         if not self.recent_files_menu:
             return
         
-        # Clear existing actions
-        self.recent_files_menu.clear()
-        
-        # Add recent files
-        if self.recent_files:
-            for i, file_path in enumerate(self.recent_files[:self.max_recent_files]):
-                if os.path.exists(file_path):
-                    # Show just the filename, with full path as tooltip
-                    display_name = f"{i+1}. {os.path.basename(file_path)}"
-                    action = QAction(display_name, self)
-                    action.setToolTip(file_path)
-                    action.triggered.connect(lambda checked, path=file_path: self._open_recent_file(path))
-                    self.recent_files_menu.addAction(action)
-            
-            # Add separator and clear action
-            self.recent_files_menu.addSeparator()
-            clear_action = QAction("Clear Recent Files", self)
-            clear_action.triggered.connect(self._clear_recent_files)
-            self.recent_files_menu.addAction(clear_action)
-        else:
-            # Show "No recent files" when list is empty
-            no_files_action = QAction("No recent files", self)
-            no_files_action.setEnabled(False)
-            self.recent_files_menu.addAction(no_files_action)
+        # Fill the pre-created actions in order and hide the unused ones
+        paths = [p for p in reversed(self.recent_files) if os.path.exists(p)]
+        for i, action in enumerate(self._recent_actions):
+            if i < len(paths):
+                # Show just the filename, with full path as tooltip
+                action.setText(f"{i+1}. {os.path.basename(paths[i])}")
+                action.setToolTip(paths[i])
+                action.setData(paths[i])
+                action.setVisible(True)
+            else:
+                action.setVisible(False)
+        
+        has_files = bool(self.recent_files)
+        self._recent_separator.setVisible(has_files)
+        self._clear_recent_action.setVisible(has_files)
+        # Show "No recent files" when list is empty
+        self._no_recent_action.setVisible(not has_files)
     
     def _open_recent_file(self, file_path):
         """Open a file from the recent files list"""
@@ -10614,7 +10888,7 @@ Total size: {stats.total_size} bytes"""
                               f"The file no longer exists:\n{file_path}")
             # Remove from recent files
             if file_path in self.recent_files:
-                self.recent_files.remove(file_path)
+                del self.recent_files[file_path]
                 self._save_recent_files()
                 self._update_recent_files_menu()
     
@@ -10624,16 +10898,17 @@ Total size: {stats.total_size} bytes"""
                                     "Are you sure you want to clear the recent files list?",
                                     QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No)
         if reply == QMessageBox.StandardButton.Yes:
-            self.recent_files = []
+            self.recent_files.clear()
             self._save_recent_files()
             self._update_recent_files_menu()
             self.status_label.setText("Recent files cleared")
     
     def _open_most_recent_file(self):
         """Open the most recent file on startup"""
-        if self.recent_files and os.path.exists(self.recent_files[0]):
-            self._load_file_from_path(self.recent_files[0])
-            self.status_label.setText(f"Opened recent file: {os.path.basename(self.recent_files[0])}")
+        most_recent = next(reversed(self.recent_files), None)
+        if most_recent and os.path.exists(most_recent):
+            self._load_file_from_path(most_recent)
+            self.status_label.setText(f"Opened recent file: {os.path.basename(most_recent)}")
             # Hide file navigator since we opened a file from history
             self._set_file_navigator_visible(False)
         else:
@@ -10646,9 +10921,11 @@ Total size: {stats.total_size} bytes"""
             file_path: Path to the file to load
             use_cache: If True, try to load from cache for faster startup
         """
+        # Enter loading mode to prevent redundant content-change handling. Editor signals
+        # are not blocked: content versions, edit watermarks and modification state
+        # are all tracked through them.
+        self._loading_file = True
         try:
-            # Enter loading mode to prevent redundant content-change handling
-            self._loading_file = True
             self._debug_print(f"DEBUG: Loading file from path: {file_path}")
             self._debug_print(f"DEBUG: File exists: {os.path.exists(file_path)}")
             
@@ -10665,7 +10942,8 @@ Total size: {stats.total_size} bytes"""
                 # For large files (>1MB), show progress and use chunked reading
                 if file_size > 1024 * 1024:
                     self.status_label.setText(f"Loading large file ({file_size / 1024 / 1024:.1f} MB)...")
-                    QApplication.processEvents()  # Update UI
+                    # Paint just the label; processEvents() would dispatch queued user input mid-load
+                    self.status_label.repaint()
                     
                     # Read large files in chunks to avoid memory issues
                     content = self._read_file_robust(file_path)
@@ -10690,13 +10968,13 @@ Total size: {stats.total_size} bytes"""
                 self.xml_editor.set_content(content)
                 
                 # Defer tree building for large files to speed up initial load
-                lines_count = len(content.split('\n')) if content else 0
+                lines_count = content.count('\n') + 1 if content else 0
                 file_size_mb = (file_size / (1024 * 1024)) if file_size else 0
                 
                 if file_size_mb > 1.0:  # For files > 1MB, defer tree building
                     self.status_label.setText(f"File loaded. Building tree in background...")
-                    QApplication.processEvents()
                     # Use QTimer to defer tree building, allowing UI to be responsive
+                    # (returning to the event loop also paints the status text)
                     QTimer.singleShot(100, lambda: self._deferred_tree_build(content, file_path, file_size))
                 else:
                     try:
@@ -10711,14 +10989,12 @@ Total size: {stats.total_size} bytes"""
                 if use_cache:
                     self._save_to_cache(file_path, content, file_size)
             
-            # Exit loading mode
-            self._loading_file = False
-            
         except Exception as e:
             self._debug_print(f"DEBUG: Error loading file: {str(e)}")
             QMessageBox.critical(self, "Error", f"Failed to open file: {str(e)}")
             self.status_label.setText("Ready")
-            # Ensure we exit loading mode even on failure
+        finally:
+            # Exit loading mode (also on failure)
             self._loading_file = False
     
     def _deferred_tree_build(self, content: str, file_path: str, file_size: int):
@@ -10770,7 +11046,7 @@ Total size: {stats.total_size} bytes"""
     def _finalize_file_load(self, file_path: str, file_size: int, content: str):
         """Finalize file loading after tree is built"""
         # Decide index/cache enablement based on size/lines
-        lines_count = len(content.split('\n')) if content else 0
+        lines_count = content.count('\n') + 1 if content else 0
         file_size_mb = (file_size / (1024 * 1024)) if file_size else 0
         self.sync_index_enabled = (lines_count > 8000 or file_size_mb > 1.0)
         self.sync_cache_enabled = (lines_count > 8000 or file_size_mb > 1.0)
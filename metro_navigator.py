@@ -950,6 +950,9 @@ class MetroCanvasView(QGraphicsView):
     """Interactive canvas view with zoom and pan support"""
     
     zoom_changed = pyqtSignal(float)  # Emits zoom ratio
+
+    # Ctrl bit as a plain int: wheel events arrive in bursts while scrolling
+    _CTRL = Qt.KeyboardModifier.ControlModifier.value
     
     def __init__(self, parent=None):
         """Initialize canvas view"""
@@ -964,7 +967,7 @@ class MetroCanvasView(QGraphicsView):
     def wheelEvent(self, event: QWheelEvent):
         """Handle mouse wheel for zooming"""
         # Zoom with Ctrl key
-        if event.modifiers() & Qt.KeyboardModifier.ControlModifier:
+        if event.modifiers().value & self._CTRL:
             factor = 1.15 if event.angleDelta().y() > 0 else 1 / 1.15
             new_zoom = self.current_zoom * factor
             
@@ -18,12 +18,41 @@ class XmlTreeNode:
     children: List['XmlTreeNode'] = field(default_factory=list)
     path: str = ""
     line_number: int = 0
-    
+    _truncated_value: Optional[str] = field(default=None, repr=False, compare=False)
+    _attrs_str: Optional[str] = field(default=None, repr=False, compare=False)
+
     def __post_init__(self):
         """Post-initialization processing"""
         if self.value is None:
             self.value = ""
 
+    def attributes_string(self) -> str:
+        """Attributes formatted as 'k="v" k2="v2"' (memoized)"""
+        attrs_str = self._attrs_str
+        if attrs_str is None:
+            attrs = self.attributes
+            attrs_str = " ".join(f'{k}="{v}"' for k, v in attrs.items()) if attrs else ""
+            self._attrs_str = attrs_str
+        return attrs_str
+
+    def truncated_value(self, max_words: int = 2) -> str:
+        """Value truncated to max_words words with ellipsis (memoized for the default width)"""
+        if not self.value:
+            return ""
+        if max_words == 2 and self._truncated_value is not None:
+            return self._truncated_value
+
+        # Split by whitespace and take first max_words
+        words = self.value.strip().split()
+        if len(words) <= max_words:
+            result = self.value
+        else:
+            result = " ".join(words[:max_words]) + "..."
+
+        if max_words == 2:
+            self._truncated_value = result
+        return result
+
 
 @dataclass
 class XmlValidationError:
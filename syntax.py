@@ -3,10 +3,14 @@ Syntax module for Lotus XML Editor.
 Handles User Defined Language (UDL) profiles.
 """
 import os
+import re
 import xml.etree.ElementTree as ET
 from dataclasses import dataclass, field
 from typing import List, Dict, Optional
 
+# Character references ElementTree rejects (vertical tab, form feed)
+_INVALID_CHAR_REF_RE = re.compile(r'&#x000[B-C];')
+
 @dataclass
 class LanguageDefinition:
     """Defines a language profile for syntax highlighting."""
@@ -51,9 +55,8 @@ def load_udl_xml(path: str) -> Optional[LanguageDefinition]:
             
         # Replace invalid XML entities like &#x000C; (Form Feed) which crash ElementTree
         # XML 1.0 only allows #x9 | #xA | #xD | [#x20-#xD7FF] | ...
-        import re
         # Remove vertical tab, form feed, etc.
-        content = re.sub(r'&#x000[B-C];', '', content)
+        content = _INVALID_CHAR_REF_RE.sub('', content)
         
         root = ET.fromstring(content)
         
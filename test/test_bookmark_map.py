@@ -0,0 +1,82 @@
+import unittest
+
+from main import BookmarkMap
+
+
+class TestBookmarkMap(unittest.TestCase):
+    def assertInSync(self, bookmarks):
+        self.assertEqual(bookmarks.lines, sorted(bookmarks))
+
+    def test_add_and_delete(self):
+        bookmarks = BookmarkMap()
+        bookmarks[30] = "c"
+        bookmarks[10] = "a"
+        bookmarks[20] = "b"
+        bookmarks[10] = "a2"  # relabel must not duplicate the line
+        self.assertEqual(bookmarks.lines, [10, 20, 30])
+
+        del bookmarks[20]
+        self.assertEqual(bookmarks.pop(30), "c")
+        self.assertEqual(bookmarks.pop(99, None), None)
+        self.assertEqual(bookmarks.lines, [10])
+
+        bookmarks.clear()
+        self.assertEqual(bookmarks.lines, [])
+
+    def test_other_mutators_keep_lines_in_sync(self):
+        bookmarks = BookmarkMap({5: "e"})
+        bookmarks.update({3: "c", 5: "e2"}, **{})
+        bookmarks.update([(9, "i")])
+        self.assertInSync(bookmarks)
+
+        self.assertEqual(bookmarks.setdefault(7, "g"), "g")
+        self.assertEqual(bookmarks.setdefault(7, "x"), "g")
+        self.assertInSync(bookmarks)
+
+        bookmarks |= {1: "a"}
+        self.assertIsInstance(bookmarks, BookmarkMap)
+        self.assertInSync(bookmarks)
+
+        line, _ = bookmarks.popitem()
+        self.assertNotIn(line, bookmarks.lines)
+        self.assertInSync(bookmarks)
+
+        copied = bookmarks.copy()
+        self.assertIsInstance(copied, BookmarkMap)
+        copied[100] = "z"
+        self.assertNotIn(100, bookmarks.lines)
+        self.assertInSync(copied)
+
+    def test_restore_from_saved_session(self):
+        # Session data stores keys as strings (JSON)
+        saved = {"42": "x", "7": "y", "19": ""}
+        bookmarks = BookmarkMap((int(k), v) for k, v in saved.items())
+        self.assertEqual(bookmarks.lines, [7, 19, 42])
+        self.assertEqual(bookmarks[42], "x")
+
+    def test_navigation_wraps_around(self):
+        bookmarks = BookmarkMap({10: "", 20: "", 30: ""})
+        self.assertEqual(bookmarks.next_after(1), 10)
+        self.assertEqual(bookmarks.next_after(10), 20)
+        self.assertEqual(bookmarks.next_after(25), 30)
+        self.assertEqual(bookmarks.next_after(30), 10)
+        self.assertEqual(bookmarks.next_after(99), 10)
+
+        self.assertEqual(bookmarks.previous_before(99), 30)
+        self.assertEqual(bookmarks.previous_before(30), 20)
+        self.assertEqual(bookmarks.previous_before(15), 10)
+        self.assertEqual(bookmarks.previous_before(10), 30)
+        self.assertEqual(bookmarks.previous_before(1), 30)
+
+    def test_navigation_after_removal(self):
+        bookmarks = BookmarkMap({10: "", 20: "", 30: ""})
+        del bookmarks[20]
+        bookmarks.update({25: ""})
+        self.assertEqual(bookmarks.next_after(10), 25)
+        bookmarks.popitem()
+        self.assertInSync(bookmarks)
+        self.assertNotEqual(bookmarks.next_after(10), 20)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,59 @@
+import os
+import unittest
+from unittest.mock import patch
+
+from xml_service import XmlService
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data")
+
+
+def _read_sample(name):
+    with open(os.path.join(DATA_DIR, name), encoding="utf-8") as f:
+        return f.read()
+
+
+class TestBuildPathLineIndex(unittest.TestCase):
+    SAMPLES = ["test_debug.xml", "xpath_links_demo.xml", "test_friendly_labels.xml", "large_test.xml"]
+
+    def setUp(self):
+        self.service = XmlService()
+
+    def test_matches_scanner_on_samples(self):
+        for name in self.SAMPLES:
+            content = _read_sample(name)
+            with patch.object(self.service, "_scan_path_line_index",
+                              wraps=self.service._scan_path_line_index) as scan:
+                index = self.service.build_path_line_index(content)
+                # Well-formed samples go through expat, not the fallback
+                scan.assert_not_called()
+            self.assertEqual(index, self.service._scan_path_line_index(content), name)
+
+    def test_indexed_sibling_paths(self):
+        content = "<root>\n  <a/>\n  <b>\n    <a/>\n  </b>\n  <a>x</a>\n  <ns:a xmlns:ns='u'/>\n</root>"
+        index = self.service.build_path_line_index(content)
+        self.assertEqual(index, {
+            "/root[1]": 1,
+            "/root[1]/a[1]": 2,
+            "/root[1]/b[1]": 3,
+            "/root[1]/b[1]/a[1]": 4,
+            "/root[1]/a[2]": 6,
+            "/root[1]/a[3]": 7,
+        })
+        self.assertEqual(index, self.service._scan_path_line_index(content))
+
+    def test_malformed_document_falls_back_to_scanner(self):
+        content = _read_sample("xpath_links_demo.xml")
+        # Break the document partway: an unclosed element and a stray close tag
+        cut = content.index("<Application>")
+        broken = content[:cut] + "<Broken>\n</Mismatch>\n" + content[cut:]
+        with patch.object(self.service, "_scan_path_line_index",
+                          wraps=self.service._scan_path_line_index) as scan:
+            index = self.service.build_path_line_index(broken)
+            scan.assert_called_once_with(broken)
+        self.assertEqual(index, self.service._scan_path_line_index(broken))
+        self.assertIn("/Configuration[1]/Database[1]/Connection[1]/Server[1]", index)
+        self.assertIn("/Configuration[1]/Broken[1]", index)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,94 @@
+import random
+import unittest
+
+from main import _span_containment_test, _line_number_lookup, _LINE_COMMENT_BLOCK_RE, _XML_SCAN_RE
+
+
+def _linear_contains(spans, pos):
+    return any(start <= pos < end for start, end in spans)
+
+
+class TestSpanContainment(unittest.TestCase):
+    def assertMatchesLinearScan(self, spans, limit):
+        contains = _span_containment_test(spans)
+        for pos in range(-1, limit + 2):
+            self.assertEqual(contains(pos), _linear_contains(spans, pos), (spans, pos))
+
+    def test_empty(self):
+        contains = _span_containment_test([])
+        self.assertFalse(contains(0))
+
+    def test_random_overlapping_spans(self):
+        rng = random.Random(1234)
+        for _ in range(300):
+            spans = []
+            for _ in range(rng.randint(1, 12)):
+                start = rng.randint(0, 60)
+                spans.append((start, start + rng.randint(0, 25)))
+            self.assertMatchesLinearScan(spans, 90)
+
+    def test_nested_and_touching_spans(self):
+        self.assertMatchesLinearScan([(0, 50), (10, 20), (50, 60), (55, 56)], 70)
+        self.assertMatchesLinearScan([(5, 5), (5, 6), (6, 6)], 10)
+
+    def test_markup_and_line_comment_spans(self):
+        # XML comments/CDATA that contain "//" lines, and "//" blocks that
+        # contain markup, so the two kinds of span overlap both ways
+        text = (
+            '<root>\n'
+            '<!-- start\n'
+            '// commented inside xml comment\n'
+            'end -->\n'
+            '// <a>\n'
+            '   // <b/> <!-- x -->\n'
+            '<c><![CDATA[\n'
+            '// cdata line\n'
+            ']]></c>\n'
+            '<?pi // ?>\n'
+            '// last'
+        )
+        markup = [m.span() for m in _XML_SCAN_RE.finditer(text) if m.lastgroup == 'special']
+        line_comments = [m.span() for m in _LINE_COMMENT_BLOCK_RE.finditer(text)]
+        self.assertTrue(markup and line_comments)
+        self.assertMatchesLinearScan(line_comments, len(text))
+        self.assertMatchesLinearScan(markup + line_comments, len(text))
+
+        rng = random.Random(99)
+        pieces = ['<a>', '</a>', '<!-- c -->', '<!--\n// x\n-->', '// y\n', '  // z\n',
+                  '<![CDATA[ // ]]>', 'text\n', '\n']
+        for _ in range(100):
+            text = ''.join(rng.choice(pieces) for _ in range(rng.randint(1, 20)))
+            spans = ([m.span() for m in _XML_SCAN_RE.finditer(text) if m.lastgroup == 'special']
+                     + [m.span() for m in _LINE_COMMENT_BLOCK_RE.finditer(text)])
+            self.assertMatchesLinearScan(spans, len(text))
+
+
+class TestLineNumberLookup(unittest.TestCase):
+    def assertMatchesCount(self, text):
+        line_at = _line_number_lookup(text)
+        for pos in range(len(text) + 1):
+            self.assertEqual(line_at(pos), text.count('\n', 0, pos) + 1, (text, pos))
+
+    def test_simple_text(self):
+        text = '<a>\n<b/>\n</a>'
+        line_at = _line_number_lookup(text)
+        self.assertEqual(line_at(0), 1)
+        # A position on the newline itself still belongs to the line it ends
+        self.assertEqual(line_at(text.index('\n')), 1)
+        self.assertEqual(line_at(text.index('\n') + 1), 2)
+        self.assertEqual(line_at(len(text)), 3)
+        self.assertMatchesCount(text)
+
+    def test_edge_cases(self):
+        for text in ('', '\n', '\n\n\n', 'no newline', 'trailing\n', '\r\n\r\nx\r\n'):
+            self.assertMatchesCount(text)
+
+    def test_random_text(self):
+        rng = random.Random(4321)
+        for _ in range(200):
+            text = ''.join(rng.choice('ab<>/\n\r\n') for _ in range(rng.randint(0, 80)))
+            self.assertMatchesCount(text)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,74 @@
+import random
+import sys
+import unittest
+
+from PyQt6.QtWidgets import QApplication
+from PyQt6.Qsci import QsciScintilla
+
+app = QApplication.instance()
+if not app:
+    app = QApplication(sys.argv)
+
+from main import XmlEditorWidget
+
+
+class TestReplaceDocumentText(unittest.TestCase):
+    ALPHABET = ['a', 'b', '<', '>', '/', ' ', '\n', '\r\n', 'Ж', 'я', 'Ё', '😀', '𝄞', '漢']
+
+    def setUp(self):
+        self.editor = XmlEditorWidget()
+
+    def assertReplaces(self, old, new):
+        editor = self.editor
+        editor.set_content(old)
+        editor.SendScintilla(QsciScintilla.SCI_EMPTYUNDOBUFFER)
+        editor.replace_document_text(new)
+        self.assertEqual(editor.text(), new, (old, new))
+        if old != new:
+            # The whole replacement is one undo step
+            editor.undo()
+            self.assertEqual(editor.text(), old, (old, new))
+            self.assertFalse(editor.isUndoAvailable())
+
+    def random_text(self, rng, max_len):
+        return ''.join(rng.choice(self.ALPHABET) for _ in range(rng.randint(0, max_len)))
+
+    def test_fixed_cases(self):
+        cases = [
+            ('', ''),
+            ('', '<a/>'),
+            ('<a/>', ''),
+            ('<a>Привет</a>', '<a>Пока</a>'),
+            ('<a>😀</a>\r\n', '<a>😀😀</a>\r\n'),
+            ('aaaa', 'aa'),
+            ('aa', 'aaaa'),
+            ('x\r\ny', 'x\ny'),
+            ('𝄞ab𝄞', '𝄞𝄞'),
+        ]
+        for old, new in cases:
+            self.assertReplaces(old, new)
+
+    def test_random_pairs(self):
+        rng = random.Random(2024)
+        for _ in range(200):
+            old = self.random_text(rng, 30)
+            if rng.random() < 0.5:
+                # Related strings share a prefix and/or suffix
+                cut = rng.randint(0, len(old))
+                new = old[:cut] + self.random_text(rng, 5) + old[cut + rng.randint(0, 5):]
+            else:
+                new = self.random_text(rng, 30)
+            self.assertReplaces(old, new)
+
+    def test_common_suffix_length(self):
+        suffix = XmlEditorWidget._common_suffix_length
+        self.assertEqual(suffix('abc', 'xbc', 3), 2)
+        self.assertEqual(suffix('abc', 'abc', 2), 2)
+        self.assertEqual(suffix('abc', 'abd', 3), 0)
+        long_a = 'q' + 'z' * 200000
+        long_b = 'r' + 'z' * 200000
+        self.assertEqual(suffix(long_a, long_b, 200001), 200000)
+
+
+if __name__ == "__main__":
+    unittest.main()
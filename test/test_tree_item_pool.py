@@ -0,0 +1,78 @@
+import sys
+import unittest
+
+from PyQt6.QtCore import Qt
+from PyQt6.QtWidgets import QApplication, QTreeWidgetItem, QTreeWidgetItemIterator
+
+app = QApplication.instance()
+if not app:
+    app = QApplication(sys.argv)
+
+from main import XmlTreeWidget
+
+XML = "<root>" + "".join(
+    f'<item id="{i}"><group><value>x</value></group><leaf>v</leaf></item>' for i in range(5)
+) + "</root>"
+
+
+class TestTreeItemPool(unittest.TestCase):
+    def setUp(self):
+        self.tree = XmlTreeWidget()
+        self.tree.show()
+
+    def tearDown(self):
+        self.tree.close()
+
+    def items(self):
+        result = []
+        iterator = QTreeWidgetItemIterator(self.tree)
+        while iterator.value():
+            result.append(iterator.value())
+            iterator += 1
+        return result
+
+    def build(self, content):
+        self.tree.populate_tree(content, show_progress=False)
+        app.processEvents()
+
+    def expand_all(self):
+        # Lazy children are created on expand, from the pool after a rebuild
+        self.tree.expandAll()
+        app.processEvents()
+
+    def test_rebuild_and_expand_from_pool_resets_view_state(self):
+        tree = self.tree
+        self.build(XML)
+        self.expand_all()
+        tree.set_hide_leaves(True)
+        items = self.items()
+        self.assertTrue(any(item.isHidden() for item in items))
+        tree.setCurrentItem(items[-1])
+        items[-1].setFlags(Qt.ItemFlag.NoItemFlags)
+        tree.set_hide_leaves(False)
+        tree.set_hide_leaves(True)
+        # Rebuild with leaf hiding off, so nothing should come back hidden
+        tree.hide_leaves_enabled = False
+
+        self.build(XML + " ")
+        self.assertTrue(tree._item_pool)
+        self.expand_all()
+
+        items = self.items()
+        self.assertEqual(len(items), 21)
+        self.assertEqual([item.text(0) for item in items if item.isHidden()], [])
+        self.assertEqual([item.text(0) for item in items if item.isSelected()], [])
+        default_flags = QTreeWidgetItem().flags()
+        self.assertTrue(all(item.flags() == default_flags for item in items))
+
+    def test_rebuild_starts_collapsed(self):
+        self.build(XML)
+        self.expand_all()
+        self.build(XML + " ")
+        # populate_tree expands the root again; everything below starts collapsed
+        expanded = [item.text(0) for item in self.items() if item.isExpanded()]
+        self.assertEqual(expanded, [self.tree.topLevelItem(0).text(0)])
+
+
+if __name__ == "__main__":
+    unittest.main()
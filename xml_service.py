@@ -4,8 +4,10 @@ XML Service - Core XML processing functionality
 
 import xml.etree.ElementTree as ET
 import xml.dom.minidom
+import xml.parsers.expat
 from typing import List, Optional, Dict, Any
 import re
+import sys
 import os
 import pickle
 import hashlib
@@ -21,6 +23,19 @@ try:
 except ImportError:
     LXML_AVAILABLE = False
 
+# Markup scanner for the path->line index: comments, CDATA, PIs and DTD
+# declarations are matched (and skipped) so their contents never look like tags.
+_INDEX_MARKUP_RE = re.compile(
+    r'<(?:!--.*?-->'
+    r'|!\[CDATA\[.*?\]\]>'
+    r'|\?.*?\?>'
+    r'|!(?:[^\[>]|\[.*?\])*>'
+    r'|(/?)([^\s/>]+)(?:[^>"\']|"[^"]*"|\'[^\']*\')*?(/?)>)',
+    re.S)
+
+# Characters passed to expat per Parse() call when building the path index
+_INDEX_FEED_CHUNK = 1 << 20
+
 
 class XmlService:
     """Service for XML processing operations"""
@@ -341,28 +356,34 @@ class XmlService:
             print(f"Error building XML tree: {e}")
             return None
 
-    def _lxml_element_to_tree_node(self, element, parent_path: str = "", index: int = 1) -> XmlTreeNode:
+    def _lxml_element_to_tree_node(self, element, parent_path: str = "", index: int = 1,
+                                   local_names: Optional[Dict[str, str]] = None) -> XmlTreeNode:
         """Convert lxml element to tree node using native sourceline"""
+        if local_names is None:
+            local_names = {}  # "{ns}name" -> interned local name, shared by the whole build
         # Determine tag name (handling namespaces)
         tag = element.tag
-        if isinstance(tag, str) and tag.startswith("{"):
-            tag = tag.split('}', 1)[1]
+        local = local_names.get(tag)
+        if local is None:
+            local = local_names[tag] = self._local_name(tag)
+        tag = local
             
         current_path = f"{parent_path}/{tag}[{index}]" if parent_path else f"/{tag}[{index}]"
 
         text = element.text.strip() if element.text and element.text.strip() else ""
         
         # Process attributes
+        # Names repeat across thousands of nodes, so intern them to share one string each
         attributes = {}
+        attr_string = ""
         if element.attrib:
             for k, v in element.attrib.items():
                 # Handle namespaced attributes
-                attr_name = k
-                if isinstance(k, str) and k.startswith("{"):
-                    attr_name = k.split('}', 1)[1]
+                attr_name = local_names.get(k)
+                if attr_name is None:
+                    attr_name = local_names[k] = self._local_name(k)
                 attributes[attr_name] = v
-                
-        attr_string = " ".join([f"{k}=\"{v}\"" for k, v in attributes.items()])
+            attr_string = " ".join(f"{k}=\"{v}\"" for k, v in attributes.items())
         display_name = tag if not attr_string else f"{tag} [{attr_string}]"
 
         # lxml provides line number directly
@@ -374,21 +395,22 @@ class XmlService:
             value=text,
             attributes=attributes,
             path=current_path,
-            line_number=line_number
+            line_number=line_number,
+            _attrs_str=attr_string
         )
 
         tag_counts: Dict[str, int] = {}
         for child in element:
             # Get tag name for child (handling namespaces)
-            child_tag = child.tag
-            if isinstance(child_tag, str) and child_tag.startswith("{"):
-                child_tag = child_tag.split('}', 1)[1]
+            child_tag = local_names.get(child.tag)
+            if child_tag is None:
+                child_tag = local_names[child.tag] = self._local_name(child.tag)
                 
             cnt = tag_counts.get(child_tag, 0) + 1
             tag_counts[child_tag] = cnt
             
             # Recursively build children
-            child_node = self._lxml_element_to_tree_node(child, current_path, cnt)
+            child_node = self._lxml_element_to_tree_node(child, current_path, cnt, local_names)
             try:
                 child_node.parent_node = node
             except Exception:
@@ -397,6 +419,15 @@ class XmlService:
 
         return node
 
+    @staticmethod
+    def _local_name(name):
+        """Interned local part of an lxml "{namespace}name"; non-string tags are returned as is"""
+        if not isinstance(name, str):
+            return name
+        if name.startswith("{"):
+            name = name.split('}', 1)[1]
+        return sys.intern(name)
+
     def _build_tree_with_line_numbers(self, xml_content: str, root: ET.Element) -> XmlTreeNode:
         """Build tree with line numbers from XML content (Legacy/Fallback)"""
         lines = xml_content.split('\n')
@@ -407,7 +438,7 @@ class XmlService:
     def _element_to_shallow_node_with_lines(self, element: ET.Element, lines: List[str], parent_path: str = "", start_line: int = 0, index: int = 1, line_index: Optional[Dict[str, List[int]]] = None) -> XmlTreeNode:
         current_path = f"{parent_path}/{element.tag}[{index}]" if parent_path else f"/{element.tag}[{index}]"
         text = element.text.strip() if element.text and element.text.strip() else ""
-        attr_string = " ".join([f"{k}=\"{v}\"" for k, v in element.attrib.items()])
+        attr_string = " ".join(f"{k}=\"{v}\"" for k, v in element.attrib.items()) if element.attrib else ""
         display_name = element.tag if not attr_string else f"{element.tag} [{attr_string}]"
         if line_index is None:
             line_number = 0
@@ -422,7 +453,8 @@ class XmlService:
             value=text,
             attributes=dict(element.attrib),
             path=current_path,
-            line_number=line_number
+            line_number=line_number,
+            _attrs_str=attr_string
         )
         return node
     
@@ -440,16 +472,18 @@ class XmlService:
         current_path = f"{parent_path}/{element.tag}[{index}]" if parent_path else f"/{element.tag}[{index}]"
 
         text = element.text.strip() if element.text and element.text.strip() else ""
-        attr_string = " ".join([f"{k}=\"{v}\"" for k, v in element.attrib.items()])
+        attributes = {sys.intern(k): v for k, v in element.attrib.items()} if element.attrib else {}
+        attr_string = " ".join(f"{k}=\"{v}\"" for k, v in attributes.items()) if attributes else ""
         display_name = element.tag if not attr_string else f"{element.tag} [{attr_string}]"
 
         node = XmlTreeNode(
             name=display_name,
             tag=element.tag,
             value=text,
-            attributes=dict(element.attrib),
+            attributes=attributes,
             path=current_path,
-            line_number=0
+            line_number=0,
+            _attrs_str=attr_string
         )
 
         tag_counts: Dict[str, int] = {}
@@ -483,6 +517,84 @@ class XmlService:
         except Exception:
             return -1
     
+    def build_path_line_index(self, xml_content: str) -> Dict[str, int]:
+        """Map element paths ("/root[1]/child[2]") to 1-based start lines.
+
+        Driven by expat start/end callbacks, so no element objects are created.
+        Paths use local names, matching XmlTreeNode.path. Content that fails to
+        parse is indexed by scanning the markup instead.
+        """
+        index = {}
+        path_stack = ['']  # full path of each open element, '' for the document
+        counters_stack = [{}]  # sibling counters of each open element
+        local_names = {}  # qualified name -> interned local name
+        parser = xml.parsers.expat.ParserCreate()
+
+        def start(name, attrs):
+            # Index by local name (strip any namespace prefix)
+            tag = local_names.get(name)
+            if tag is None:
+                tag = local_names[name] = sys.intern(name.rpartition(':')[2])
+            level_counters = counters_stack[-1]
+            idx = level_counters.get(tag, 0) + 1
+            level_counters[tag] = idx
+            # Extend the parent's path and push it
+            path = f"{path_stack[-1]}/{tag}[{idx}]"
+            path_stack.append(path)
+            counters_stack.append({})
+            index[path] = parser.CurrentLineNumber
+
+        def end(name):
+            path_stack.pop()
+            counters_stack.pop()
+
+        parser.StartElementHandler = start
+        parser.EndElementHandler = end
+        try:
+            # Feed slices so only one chunk at a time is held as an encoded copy
+            chunk = _INDEX_FEED_CHUNK
+            for offset in range(0, len(xml_content), chunk):
+                parser.Parse(xml_content[offset:offset + chunk], False)
+            parser.Parse('', True)
+        except xml.parsers.expat.ExpatError:
+            return self._scan_path_line_index(xml_content)
+        return index
+
+    def _scan_path_line_index(self, xml_content: str) -> Dict[str, int]:
+        """build_path_line_index for malformed content: scans the markup directly"""
+        index = {}
+        path_stack = ['']  # path of each open element, '' for the document
+        counters = [{}]  # sibling counters per open element
+        local_names = {}  # qualified name -> interned local name
+        line = 1
+        last = 0
+        count = xml_content.count
+        for match in _INDEX_MARKUP_RE.finditer(xml_content):
+            name = match.group(2)
+            if name is None:
+                continue  # comment, CDATA, PI or DTD
+            if match.group(1):
+                # Closing tag
+                if len(path_stack) > 1:
+                    path_stack.pop()
+                    counters.pop()
+                continue
+            start = match.start()
+            line += count('\n', last, start)
+            last = start
+            tag = local_names.get(name)
+            if tag is None:
+                tag = local_names[name] = sys.intern(name.rpartition(':')[2])
+            level_counters = counters[-1]
+            idx = level_counters.get(tag, 0) + 1
+            level_counters[tag] = idx
+            path = f"{path_stack[-1]}/{tag}[{idx}]"
+            index[path] = line
+            if not match.group(3):
+                path_stack.append(path)
+                counters.append({})
+        return index
+    
     def find_elements_by_xpath(self, xml_content: str, xpath: str) -> List[ET.Element]:
         """Find XML elements by XPath (basic implementation)"""
         try: